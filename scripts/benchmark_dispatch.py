@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Benchmark for command routing: one Pyrogram filter per command vs. the single-pass dispatcher.
+
+Builds synthetic command registries of increasing size (plus the real userbot commands with
+hidden hook commands) and measures the average time needed to route a single message.
+"""
+
+import asyncio
+import functools
+import operator
+import re
+import sys
+import time
+from argparse import ArgumentParser
+from types import SimpleNamespace
+
+try:
+    from pyrogram import filters
+    from pyrogram.types import Message
+
+    from userbot.meta.modules import CommandsModule, HooksModule
+    from userbot.meta.modules.commands import CommandsHandler, _CommandDispatcher
+except ImportError as e:
+    import os
+
+    sys.path.append(os.getcwd())  # https://stackoverflow.com/a/37927943/12519972
+    try:
+        from pyrogram import filters
+        from pyrogram.types import Message
+
+        from userbot.meta.modules import CommandsModule, HooksModule
+        from userbot.meta.modules.commands import CommandsHandler, _CommandDispatcher
+    except ImportError:
+        raise RuntimeError("This script must be run from the root of the project.") from e
+
+_PREFIX = ","
+_CLIENT = SimpleNamespace(me=SimpleNamespace(username="userbot"))
+
+
+def _legacy_filter(handler: CommandsHandler) -> filters.Filter:
+    """Builds the filter the way it was built for each command before the dispatcher."""
+    f: list[filters.Filter] = []
+    for cmd in handler.commands:
+        if isinstance(cmd, re.Pattern):
+            command_re = re.compile(f"^[{re.escape(handler.prefix)}]{cmd.pattern}", cmd.flags)
+            f.append(filters.regex(command_re))
+        else:
+            f.append(filters.command(cmd, prefixes=handler.prefix))
+    return functools.reduce(operator.or_, f) & filters.me & ~filters.scheduled
+
+
+async def _legacy_route(flts: list[filters.Filter], message: Message) -> int | None:
+    for i, flt in enumerate(flts):
+        if await flt(_CLIENT, message):
+            return i
+    return None
+
+
+async def _dispatcher_route(dispatcher: _CommandDispatcher, message: Message) -> object | None:
+    # Pyrogram still checks `filters.me & ~filters.scheduled` once before calling the dispatcher
+    if not await (filters.me & ~filters.scheduled)(_CLIENT, message):
+        return None
+    return dispatcher.resolve(message.text or message.caption, _CLIENT.me.username)
+
+
+async def _noop() -> None:
+    pass
+
+
+def _synthetic_handlers(n: int) -> list[CommandsHandler]:
+    module = CommandsModule(default_prefix=_PREFIX)
+    for i in range(n):
+        module.add(_noop, f"command{i}", f"cmd{i}")
+    module._set_prefix()
+    return module._handlers
+
+
+def _real_handlers() -> list[CommandsHandler]:
+    from userbot.commands import commands
+    from userbot.hooks import hooks
+
+    root = CommandsModule(default_prefix=_PREFIX)
+    root.add_submodule(commands)
+    root_hooks = HooksModule(commands=root, storage=SimpleNamespace())
+    root_hooks.add_submodule(hooks)
+    for handler in root_hooks._handlers:
+        root.add(handler.add_handler, f"{handler.name}here", f"{handler.name}_here")
+        root.add(handler.remove_handler, f"no{handler.name}here", f"no_{handler.name}_here")
+    root._set_prefix()
+    return root._handlers
+
+
+def _messages(handlers: list[CommandsHandler]) -> dict[str, Message]:
+    first = next(iter(handlers[0].commands))
+    last = next(iter(handlers[-1].commands))
+    return {
+        "first command": Message(id=1, text=f"{_PREFIX}{first} arg", outgoing=True),
+        "last command": Message(id=1, text=f"{_PREFIX}{last} arg", outgoing=True),
+        "not a command": Message(id=1, text="just a regular message", outgoing=True),
+    }
+
+
+async def _measure(func, arg, message: Message, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await func(arg, message)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def _run(sizes: list[int], iterations: int) -> None:
+    registries = [(f"{n} synthetic", _synthetic_handlers(n)) for n in sizes]
+    registries.append(("real userbot", _real_handlers()))
+    print(f"{'registry':<16} {'handlers':>8} {'message':<14} {'legacy, us':>11} {'new, us':>8}")
+    for name, handlers in registries:
+        flts = [_legacy_filter(h) for h in handlers]
+        dispatcher = _CommandDispatcher(handlers)
+        for kind, message in _messages(handlers).items():
+            legacy = await _measure(_legacy_route, flts, message, iterations)
+            new = await _measure(_dispatcher_route, dispatcher, message, iterations)
+            print(f"{name:<16} {len(handlers):>8} {kind:<14} {legacy:>11.2f} {new:>8.2f}")
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(_run(args.sizes, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
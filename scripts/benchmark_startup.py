@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Startup benchmark: import time and memory of each commands module and the time and memory
+needed to compile argument parsers for its commands.
+
+Import time is the cumulative one reported by `python -X importtime`, import memory is the memory
+allocated (and still held) by the module code, including the libraries called from it.
+
+Parsers are compiled two ways: the way it was done before (Earley only) and the current one (LALR
+where possible). LALR parsers are also checked to produce the same results as Earley ones on
+a generated set of inputs.
+"""
+
+import importlib
+import itertools
+import subprocess
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable, Iterable
+
+try:
+    from lark import Lark
+    from lark.exceptions import UnexpectedInput
+
+    import userbot.utils  # noqa: F401  # must be imported first to avoid circular import
+    from userbot.meta.args_parser import (
+        _is_lalr_compatible,
+        create_args_parser,
+        create_args_parser_grammar,
+    )
+    from userbot.meta.modules.commands import CommandsHandler
+    from userbot.meta.usage_parser import LiteralArgumentVariant, Usage
+except ImportError as e:
+    import os
+
+    sys.path.append(os.getcwd())  # https://stackoverflow.com/a/37927943/12519972
+    try:
+        from lark import Lark
+        from lark.exceptions import UnexpectedInput
+
+        import userbot.utils  # noqa: F401
+        from userbot.meta.args_parser import (
+            _is_lalr_compatible,
+            create_args_parser,
+            create_args_parser_grammar,
+        )
+        from userbot.meta.modules.commands import CommandsHandler
+        from userbot.meta.usage_parser import LiteralArgumentVariant, Usage
+    except ImportError:
+        raise RuntimeError("This script must be run from the root of the project.") from e
+
+_WORDS = ("foo", "123", "@user", "reply", "-1", "*")
+
+
+def _measure(func: Callable[[], object]) -> tuple[float, int]:
+    """Returns time in milliseconds and memory allocated and held by the result in KiB."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed * 1000, current // 1024
+
+
+def _import_times(package: str) -> dict[str, float]:
+    """Imports the package in a fresh interpreter, returns cumulative import time of each module
+    in milliseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import userbot.utils, {package}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        _, _, cumulative, name = (part.strip() for part in line.replace(":", "|", 1).split("|"))
+        if cumulative.isdigit():
+            times[name] = int(cumulative) / 1000
+    return times
+
+
+def _import_memory(package: str, commands_dir: Path) -> dict[str, int]:
+    """Imports the package, returns memory in KiB held by the allocations made while executing
+    the code of each module in it."""
+    tracemalloc.start(64)
+    importlib.import_module(package)
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    memory: dict[str, int] = {}
+    for trace in snapshot.traces:
+        for frame in trace.traceback:
+            path = Path(frame.filename)
+            if path.parent == commands_dir and path.stem != "__init__":
+                memory[path.stem] = memory.get(path.stem, 0) + trace.size
+                break
+    return {name: size // 1024 for name, size in memory.items()}
+
+
+def _corpus(usage: Usage) -> Iterable[str]:
+    """Generates inputs for the usage: literals, regular words and their combinations."""
+    words = set(_WORDS)
+    for variant in usage.variants:
+        for arg in variant.args:
+            for arg_variant in arg.variants:
+                if isinstance(arg_variant, LiteralArgumentVariant):
+                    words.add(arg_variant.value)
+                    words.add(f"{arg_variant.value}x")
+    words = sorted(words)
+    yield ""
+    yield " "
+    for n in range(1, 4):
+        for combination in itertools.product(words, repeat=n):
+            yield " ".join(combination)
+    yield "foo  bar"
+    yield "foo bar "
+    yield "foo\nbar baz"
+
+
+def _parse(parser: Lark, text: str) -> object:
+    try:
+        return parser.parse(text)
+    except UnexpectedInput:
+        return UnexpectedInput
+
+
+def _check_lalr(handlers: list[CommandsHandler]) -> list[str]:
+    """Compares LALR parsers with Earley ones, returns descriptions of mismatches."""
+    mismatches: list[str] = []
+    for handler in handlers:
+        if not _is_lalr_compatible(handler.usage_tree):
+            continue
+        earley = Lark(create_args_parser_grammar(handler.usage_tree), maybe_placeholders=False)
+        lalr = create_args_parser(handler.usage_tree)
+        for text in _corpus(handler.usage_tree):
+            if (expected := _parse(earley, text)) != (actual := _parse(lalr, text)):
+                mismatches.append(f"{handler.usage!r} on {text!r}: {expected!r} != {actual!r}")
+    return mismatches
+
+
+def _compile_earley(handlers: list[CommandsHandler]) -> list[Lark]:
+    return [
+        Lark(create_args_parser_grammar(handler.usage_tree), maybe_placeholders=False)
+        for handler in handlers
+    ]
+
+
+def _compile(handlers: list[CommandsHandler]) -> list[Lark]:
+    return [create_args_parser(handler.usage_tree) for handler in handlers]
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--skip-check", action="store_true", help="don't compare LALR and Earley")
+    args = parser.parse_args()
+
+    commands_dir = Path(userbot.__file__).parent / "commands"
+    names = sorted(p.stem for p in commands_dir.glob("*.py") if p.stem != "__init__")
+    import_times = _import_times("userbot.commands")
+    import_memory = _import_memory("userbot.commands", commands_dir)
+    print(
+        f"{'module':<20} {'cmds':>4} {'lalr':>4} {'import, ms':>10} {'KiB':>6}"
+        f" {'earley, ms':>10} {'KiB':>6} {'lalr, ms':>8} {'KiB':>6}"
+    )
+    totals = [0.0] * 6
+    all_handlers: list[CommandsHandler] = []
+    for name in names:
+        module = importlib.import_module(f"userbot.commands.{name}")
+        import_ms = import_times.get(module.__name__, 0.0)
+        import_kib = import_memory.get(name, 0)
+        handlers: list[CommandsHandler] = module.commands._handlers
+        all_handlers.extend(handlers)
+        lalr = sum(_is_lalr_compatible(h.usage_tree) for h in handlers)
+        earley_ms, earley_kib = _measure(lambda: _compile_earley(handlers))
+        lalr_ms, lalr_kib = _measure(lambda: _compile(handlers))
+        row = (import_ms, import_kib, earley_ms, earley_kib, lalr_ms, lalr_kib)
+        totals = [t + v for t, v in zip(totals, row)]
+        print(
+            f"{name:<20} {len(handlers):>4} {lalr:>4} {import_ms:>10.1f} {import_kib:>6}"
+            f" {earley_ms:>10.1f} {earley_kib:>6} {lalr_ms:>8.1f} {lalr_kib:>6}"
+        )
+    lalr = sum(_is_lalr_compatible(h.usage_tree) for h in all_handlers)
+    print(
+        f"{'total':<20} {len(all_handlers):>4} {lalr:>4} {totals[0]:>10.1f} {totals[1]:>6.0f}"
+        f" {totals[2]:>10.1f} {totals[3]:>6.0f} {totals[4]:>8.1f} {totals[5]:>6.0f}"
+    )
+
+    if args.skip_check:
+        return
+    mismatches = _check_lalr(all_handlers)
+    for mismatch in mismatches:
+        print(mismatch)
+    if mismatches:
+        sys.exit(1)
+    print("LALR parsers produce the same results as Earley ones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Benchmark of `Storage` operations.
+
+Runs every storage method a number of times with the given concurrency against each requested
+backend and prints latency percentiles and throughput for each method as JSON. The only method not
+benchmarked is `sticker_cache_job`, as it never returns.
+
+Redis backend needs an empty database, it's cleaned up after the benchmark. Use `--spawn-redis`
+to run a throwaway `redis-server` instead.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterator
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+try:
+    import userbot.utils  # noqa: F401  # must be imported first to avoid circular import
+    from userbot.storage import RedisStorage, SQLiteStorage, Storage
+    from userbot.utils import CommandUsage, StickerInfo, UserInfo
+except ImportError as e:
+    sys.path.append(os.getcwd())  # https://stackoverflow.com/a/37927943/12519972
+    try:
+        import userbot.utils  # noqa: F401
+        from userbot.storage import RedisStorage, SQLiteStorage, Storage
+        from userbot.utils import CommandUsage, StickerInfo, UserInfo
+    except ImportError:
+        raise RuntimeError("This script must be run from the root of the project.") from e
+
+_Op = Callable[[int], Awaitable[Any]]
+_PERCENTILES = (50, 90, 99)
+
+
+async def _consume(iterable: AsyncIterable[Any]) -> None:
+    async for _ in iterable:
+        pass
+
+
+def _stickers(keys: int) -> dict[str, list[StickerInfo]]:
+    stickers: dict[str, list[StickerInfo]] = {}
+    for i in range(keys):
+        emoji = f"{chr(0x1F600 + i % 80)}{i // 80}"
+        stickers[emoji] = [
+            StickerInfo(id=i * 10 + j, access_hash=j, file_reference_b64="AQIDBA==")
+            for j in range(10)
+        ]
+    return stickers
+
+
+def _cases(storage: Storage, keys: int) -> Iterator[tuple[str, _Op]]:
+    """Yields method names and functions calling them with an operation number.
+
+    Cases are ordered so that every method reads the data written by the previous ones.
+    """
+    today = date.today()
+    chat = lambda i: -1000000000000 - i % keys  # noqa: E731
+    yield "enable_hook", lambda i: storage.enable_hook(f"hook{i % 10}", chat(i))
+    yield "is_hook_enabled", lambda i: storage.is_hook_enabled(f"hook{i % 10}", chat(i))
+    yield "list_enabled_hooks", lambda i: _consume(storage.list_enabled_hooks(chat(i)))
+    yield "disable_hook", lambda i: storage.disable_hook(f"hook{i % 10}", chat(i))
+    yield "add_react2ban", lambda i: storage.add_react2ban(chat(i), i)
+    yield "is_react2ban_enabled", lambda i: storage.is_react2ban_enabled(chat(i), i)
+    yield "remove_react2ban", lambda i: storage.remove_react2ban(chat(i), i)
+    stickers = _stickers(keys)
+    emojis = list(stickers)
+    yield "put_sticker_cache", lambda i: storage.put_sticker_cache(stickers)
+    yield "has_sticker_cache", lambda i: storage.has_sticker_cache()
+    yield "wait_sticker_cache", lambda i: storage.wait_sticker_cache()
+    yield "get_cached_stickers", lambda i: storage.get_cached_stickers(emojis[i % keys])
+    yield "get_sticker_cache", lambda i: storage.get_sticker_cache()
+    content = json.dumps({"text": "Lorem ipsum dolor sit amet " * 4})
+    yield "save_note", lambda i: storage.save_note(f"note{i % keys}", content, "text")
+    yield "get_note", lambda i: storage.get_note(f"note{i % keys}")
+    yield "saved_notes", lambda i: _consume(storage.saved_notes())
+    yield "list_notes", lambda i: _consume(storage.list_notes())
+    yield "delete_note", lambda i: storage.delete_note(f"note{i % keys}")
+    yield "set_chat_language", lambda i: storage.set_chat_language(chat(i), "en")
+    yield "get_chat_language", lambda i: storage.get_chat_language(chat(i))
+    yield "commands_used", lambda i: storage.commands_used(
+        {CommandUsage(f"cmd{j}", chat(i + j), today - timedelta(days=j % 7)): 1 for j in range(10)}
+    )
+    yield "list_command_usage", lambda i: _consume(storage.list_command_usage(limit=5))
+    yield "get_total_command_usage", lambda i: storage.get_total_command_usage()
+    yield "list_daily_command_usage", lambda i: _consume(
+        storage.list_daily_command_usage(today - timedelta(days=6), today)
+    )
+    yield "list_chat_command_usage", lambda i: _consume(
+        storage.list_chat_command_usage(today - timedelta(days=6), today, limit=3)
+    )
+    users = range(10)
+    yield "add_users_to_group", lambda i: storage.add_users_to_group(users, f"group{i % keys}")
+    yield "list_users_in_group", lambda i: _consume(storage.list_users_in_group(f"group{i % keys}"))
+    yield "list_groups", lambda i: _consume(storage.list_groups())
+    yield "remove_users_from_group", lambda i: storage.remove_users_from_group(
+        users, f"group{i % keys}"
+    )
+    yield "save_transcription", lambda i: storage.save_transcription(i % keys, i)
+    yield "get_transcription", lambda i: storage.get_transcription(i % keys)
+    yield "delete_transcription", lambda i: storage.delete_transcription(i % keys)
+    user = lambda i: UserInfo(  # noqa: E731
+        id=i % keys,
+        first_name="Name",
+        last_name=None,
+        username=f"user{i % keys}",
+        is_bot=False,
+        is_deleted=False,
+    )
+    yield "put_cached_users", lambda i: storage.put_cached_users(map(user, range(i, i + 10)), 600)
+    yield "get_cached_users", lambda i: storage.get_cached_users(j % keys for j in range(i, i + 10))
+    yield "save_checkpoint", lambda i: storage.save_checkpoint(f"job{i % keys}", i)
+    yield "get_checkpoint", lambda i: storage.get_checkpoint(f"job{i % keys}")
+    yield "delete_checkpoint", lambda i: storage.delete_checkpoint(f"job{i % keys}")
+    yield "compact", lambda i: storage.compact()
+
+
+def _percentile(sorted_values: list[int], p: float) -> int:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+async def _run_case(op: _Op, operations: int, concurrency: int) -> dict[str, float]:
+    latencies: list[int] = []
+    counter = iter(range(operations))
+
+    async def worker() -> None:
+        for i in counter:
+            start = time.perf_counter_ns()
+            await op(i)
+            latencies.append(time.perf_counter_ns() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "operations": operations,
+        "throughput_ops": round(operations / elapsed, 1),
+        "mean_us": round(sum(latencies) / len(latencies) / 1000, 1),
+        **{f"p{p}_us": round(_percentile(latencies, p) / 1000, 1) for p in _PERCENTILES},
+        "max_us": round(latencies[-1] / 1000, 1),
+    }
+
+
+async def _benchmark(storage: Storage, args: Namespace) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+    async with storage:
+        for name, op in _cases(storage, args.keys):
+            if args.methods and name not in args.methods:
+                continue
+            # Heavy operations on the whole data set are repeated less
+            operations = args.operations
+            if name in ("get_sticker_cache", "put_sticker_cache", "saved_notes", "list_notes"):
+                operations = max(1, operations // 10)
+            results[name] = await _run_case(op, operations, args.concurrency)
+            print(f"{storage.__class__.__name__}.{name}: {results[name]}", file=sys.stderr)
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+async def _benchmark_redis(args: Namespace) -> dict[str, dict[str, float]]:
+    host, port = args.redis_host, args.redis_port
+    server: subprocess.Popen | None = None
+    if args.spawn_redis:
+        redis_server = shutil.which("redis-server")
+        if redis_server is None:
+            raise RuntimeError("redis-server is not found in PATH")
+        host, port = "localhost", _free_port()
+        server = subprocess.Popen(
+            [redis_server, "--port", str(port), "--save", "", "--appendonly", "no"],
+            stdout=subprocess.DEVNULL,
+        )
+    try:
+        storage = RedisStorage(host, port, args.redis_db, client_cache_size=args.client_cache)
+        for _ in range(50):
+            try:
+                size = await storage._pool.dbsize()
+                break
+            except RedisConnectionError:
+                await asyncio.sleep(0.1)  # spawned server is not ready yet
+        else:
+            raise RuntimeError(f"Redis at {host}:{port} is not available")
+        if size != 0:
+            raise RuntimeError(f"Redis database {args.redis_db} is not empty, refusing to use it")
+        try:
+            results = await _benchmark(storage, args)
+            if (client_cache_stats := storage.client_cache_stats()) is not None:
+                results["client_cache"] = client_cache_stats
+            return results
+        finally:
+            cleanup = RedisStorage(host, port, args.redis_db)
+            await cleanup._pool.flushdb()
+            await cleanup._pool.close()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+async def _benchmark_sqlite(args: Namespace) -> dict[str, dict[str, float]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        return await _benchmark(SQLiteStorage(Path(tmp) / "benchmark.sqlite3"), args)
+
+
+async def _main(args: Namespace) -> dict[str, Any]:
+    runners = {"redis": _benchmark_redis, "sqlite": _benchmark_sqlite}
+    return {
+        "config": {
+            "keys": args.keys,
+            "operations": args.operations,
+            "concurrency": args.concurrency,
+            "client_cache": args.client_cache,
+            "python": sys.version.split()[0],
+        },
+        "results": {backend: await runners[backend](args) for backend in args.backends},
+    }
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--backend",
+        dest="backends",
+        action="append",
+        choices=("redis", "sqlite"),
+        help="backend to benchmark, can be repeated, all by default",
+    )
+    parser.add_argument("--keys", type=int, default=100, help="number of chats, notes, etc.")
+    parser.add_argument("--operations", type=int, default=1000, help="operations per method")
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent operations")
+    parser.add_argument("--method", dest="methods", action="append", help="benchmark only these")
+    parser.add_argument("--redis-host", default="localhost")
+    parser.add_argument("--redis-port", type=int, default=6379)
+    parser.add_argument("--redis-db", type=int, default=15, help="must be empty, 15 by default")
+    parser.add_argument(
+        "--client-cache",
+        type=int,
+        default=0,
+        help="client cache size for Redis, disabled by default",
+    )
+    parser.add_argument(
+        "--spawn-redis",
+        action="store_true",
+        help="run a throwaway redis-server instead of connecting to an existing one",
+    )
+    parser.add_argument("-o", "--output", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+    if not args.backends:
+        args.backends = ["redis", "sqlite"]
+
+    report = json.dumps(asyncio.run(_main(args)), indent=2)
+    if args.output is not None:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
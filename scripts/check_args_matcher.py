@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Differential check of `ArgsMatcher` against Lark-based arguments parsing.
+
+For every usage of userbot commands and a set of synthetic usages, generates inputs and checks
+that `Arguments` built by both ways are the same (or both ways reject the input). Also reports
+the average time to parse arguments each way.
+"""
+
+import itertools
+import sys
+import time
+from argparse import ArgumentParser
+from typing import Callable, Iterable
+
+try:
+    from lark import Lark, UnexpectedInput
+
+    import userbot.utils  # noqa: F401  # must be imported first to avoid circular import
+    from userbot.meta.args_parser import ArgsMatcher, ParsedArgsT, create_args_parser_grammar
+    from userbot.meta.usage_parser import LiteralArgumentVariant, Usage, parser
+    from userbot.middlewares import Arguments, _parse_arguments
+except ImportError as e:
+    import os
+
+    sys.path.append(os.getcwd())  # https://stackoverflow.com/a/37927943/12519972
+    try:
+        from lark import Lark, UnexpectedInput
+
+        import userbot.utils  # noqa: F401
+        from userbot.meta.args_parser import ArgsMatcher, ParsedArgsT, create_args_parser_grammar
+        from userbot.meta.usage_parser import LiteralArgumentVariant, Usage, parser
+        from userbot.middlewares import Arguments, _parse_arguments
+    except ImportError:
+        raise RuntimeError("This script must be run from the root of the project.") from e
+
+_SYNTHETIC_USAGES = (
+    "",
+    "<a>",
+    "[a]",
+    "<a> <b>",
+    "<a> [b]",
+    "[a] [b]",
+    "<a|b>",
+    "['x']",
+    "<'x'|'y'>",
+    "['x'|a]",
+    "<'x'|a|b> ['y'|c]",
+    "<a...>",
+    "[a...]",
+    "<a> [b...]",
+    "<a>...",
+    "[a]...",
+    "<a> [b|c]...",
+    "<'x'|a> [b]...",
+    "<a> ['x'|'xy'] [c...]",
+)
+_WORDS = ("foo", "123", "@user", "reply", "-1", "*")
+
+
+def _corpus(usage: Usage) -> Iterable[str]:
+    """Generates inputs for the usage: literals, regular words and their combinations."""
+    words = set(_WORDS)
+    for variant in usage.variants:
+        for arg in variant.args:
+            for arg_variant in arg.variants:
+                if isinstance(arg_variant, LiteralArgumentVariant):
+                    words.add(arg_variant.value)
+                    words.add(f"{arg_variant.value}x")
+    words = sorted(words)
+    yield ""
+    yield " "
+    for n in range(1, 4):
+        for combination in itertools.product(words, repeat=n):
+            yield " ".join(combination)
+    yield " foo"
+    yield "foo  bar"
+    yield "foo bar "
+    yield "foo\nbar baz"
+    yield "foo\tbar baz\n"
+
+
+def _arguments(func: Callable[[str], ParsedArgsT | None], args: str) -> Arguments | None:
+    try:
+        parsed_args = func(args)
+    except UnexpectedInput:
+        return None
+    return None if parsed_args is None else Arguments(args, parsed_args)
+
+
+def _same(expected: Arguments | None, actual: Arguments | None) -> bool:
+    if expected is None or actual is None:
+        return expected is actual
+    if list(expected) != list(actual):
+        return False
+    # Lark-based parsing may have several keys that are equal as strings, but only the first one
+    # is accessible by a string key
+    keys = {str(key) for key in (*expected._args_dict, *actual._args_dict)}
+    missing = object()
+    for key in keys:
+        try:
+            expected_value = expected[key]
+        except KeyError:
+            expected_value = missing
+        try:
+            actual_value = actual[key]
+        except KeyError:
+            actual_value = missing
+        if expected_value != actual_value:
+            return False
+    return True
+
+
+def _usages() -> list[str]:
+    from userbot.commands import commands
+
+    return sorted({handler.usage for handler in commands._handlers} | set(_SYNTHETIC_USAGES))
+
+
+def main() -> None:
+    argparser = ArgumentParser(description=__doc__)
+    argparser.add_argument("--iterations", type=int, default=20)
+    args = argparser.parse_args()
+
+    mismatches = 0
+    lark_total = matcher_total = 0.0
+    inputs = 0
+    for usage_str in _usages():
+        usage = parser.parse(usage_str)
+        if not ArgsMatcher.supports(usage):
+            print(f"Not supported, falls back to Lark: {usage_str!r}")
+            continue
+        matcher = ArgsMatcher(usage)
+        lark_parser = Lark(create_args_parser_grammar(usage), maybe_placeholders=False)
+        lark_func = lambda a: _parse_arguments(lark_parser, a, usage)  # noqa: E731
+        for text in _corpus(usage):
+            expected = _arguments(lark_func, text)
+            actual = _arguments(matcher.match, text)
+            if not _same(expected, actual):
+                mismatches += 1
+                print(
+                    f"Mismatch for {usage_str!r} on {text!r}:"
+                    f" {expected and expected._args_dict!r} != {actual and actual._args_dict!r}"
+                )
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                _arguments(lark_func, text)
+            lark_total += time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                _arguments(matcher.match, text)
+            matcher_total += time.perf_counter() - start
+            inputs += 1
+    runs = inputs * args.iterations
+    print(
+        f"{inputs} inputs, average time per input:"
+        f" Lark (Earley) {lark_total / runs * 1e6:.2f} us,"
+        f" ArgsMatcher {matcher_total / runs * 1e6:.2f} us"
+    )
+    if mismatches:
+        print(f"{mismatches} mismatches found")
+        sys.exit(1)
+    print("No mismatches found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Reports import time of each userbot module, like `python -X importtime` does, but third-party
+modules are attributed to the userbot module that imported them first.
+
+Modules are imported in a fresh interpreter the same way `userbot.__main__` imports them (without
+running the bot). Peak RSS of that interpreter is reported too.
+"""
+
+import os
+import subprocess
+import sys
+from argparse import ArgumentParser
+from dataclasses import dataclass, field
+from pathlib import Path
+
+_MODULES = (
+    "userbot.utils",  # must be imported first to avoid circular import
+    "userbot.commands",
+    "userbot.config",
+    "userbot.hooks",
+    "userbot.meta.job_manager",
+    "userbot.meta.modules",
+    "userbot.middlewares",
+    "userbot.shortcuts",
+    "userbot.storage",
+    "userbot.utils.clients",
+)
+_RSS_MARKER = "maxrss:"
+
+
+@dataclass()
+class _Import:
+    name: str
+    self_us: int
+    cumulative_us: int
+    children: list["_Import"] = field(default_factory=list)
+
+    @property
+    def is_own(self) -> bool:
+        return self.name == "userbot" or self.name.startswith("userbot.")
+
+
+def _run_importtime(modules: tuple[str, ...]) -> tuple[list[_Import], int]:
+    """Imports modules in a fresh interpreter, returns top-level imports and peak RSS in KiB."""
+    code = (
+        f"import {', '.join(modules)}\n"
+        f"import resource\n"
+        f"print({_RSS_MARKER!r}, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+    )
+    if not Path("userbot").is_dir():
+        raise RuntimeError("This script must be run from the root of the project.")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+    )
+    rss = int(result.stdout.split(_RSS_MARKER, 1)[1])
+    # Output is in post-order: children are printed before their parent with more indentation
+    pending: list[tuple[int, _Import]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        if not self_us.strip().isdigit():
+            continue  # header
+        depth = (len(name) - len(name.lstrip())) // 2
+        node = _Import(name.strip(), int(self_us), int(cumulative_us))
+        while pending and pending[-1][0] > depth:
+            node.children.insert(0, pending.pop()[1])
+        pending.append((depth, node))
+    return [node for _, node in pending], rss
+
+
+def _collect(node: _Import, owner: _Import | None, res: dict[str, dict[str, int]]) -> None:
+    """Attributes the time of the third-party modules to the nearest userbot module."""
+    if node.is_own:
+        res[node.name] = {"self": node.self_us, "deps": 0}
+        owner = node
+    elif owner is not None:
+        # Third-party subtree: count it as a whole, userbot modules can't be imported from there
+        res[owner.name]["deps"] += node.cumulative_us
+        deps = res[owner.name].setdefault(node.name, 0)
+        res[owner.name][node.name] = deps + node.cumulative_us
+        return
+    for child in node.children:
+        _collect(child, owner, res)
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=3, help="number of heaviest dependencies shown")
+    parser.add_argument("modules", nargs="*", default=_MODULES, help="modules to import")
+    args = parser.parse_args()
+
+    roots, rss = _run_importtime(tuple(args.modules))
+    res: dict[str, dict[str, int]] = {}
+    third_party_us = 0
+    for root in roots:
+        if not root.is_own:
+            third_party_us += root.cumulative_us
+        _collect(root, None, res)
+
+    rows = sorted(res.items(), key=lambda item: item[1]["self"] + item[1]["deps"], reverse=True)
+    print(f"{'module':<45} {'self, ms':>9} {'deps, ms':>9} {'total, ms':>9}  heaviest deps")
+    for name, times in rows:
+        self_us, deps_us = times.pop("self"), times.pop("deps")
+        heaviest = sorted(times.items(), key=lambda item: item[1], reverse=True)[: args.top]
+        print(
+            f"{name:<45} {self_us / 1000:>9.1f} {deps_us / 1000:>9.1f}"
+            f" {(self_us + deps_us) / 1000:>9.1f}"
+            f"  {', '.join(f'{dep} ({us / 1000:.1f})' for dep, us in heaviest)}"
+        )
+    total_us = sum(root.cumulative_us for root in roots)
+    print(f"Imported outside of userbot modules: {third_party_us / 1000:.1f} ms")
+    print(f"Total import time: {total_us / 1000:.1f} ms, peak RSS: {rss / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+import userbot.utils  # noqa: F401  # must be imported before `userbot.storage` to avoid circular import
@@ -0,0 +1,31 @@
+import asyncio
+
+from userbot.utils import BulkProgress, run_bulk
+
+
+async def test_final_progress_is_reported() -> None:
+    reported: list[tuple[int, int, int | None]] = []
+
+    async def action(item: int) -> None:
+        if item % 2:
+            raise ValueError(item)
+
+    async def on_progress(progress: BulkProgress) -> None:
+        reported.append((progress.done, progress.failed, progress.total))
+
+    result = await run_bulk(range(10), action, on_progress=on_progress, progress_interval=60)
+    assert len(result.succeeded) == len(result.failed) == 5
+    assert reported == [(10, 5, 10)]
+    # The reporter and the workers are awaited, not left pending
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+async def test_progress_errors_are_ignored() -> None:
+    async def action(item: int) -> None:
+        pass
+
+    async def on_progress(progress: BulkProgress) -> None:
+        raise RuntimeError("Message to edit is deleted")
+
+    result = await run_bulk(range(3), action, on_progress=on_progress)
+    assert result.succeeded == [0, 1, 2]
@@ -0,0 +1,240 @@
+import asyncio
+import random
+from pathlib import Path
+from types import SimpleNamespace
+from typing import AsyncIterator
+
+import pytest
+from pyrogram.errors import PeerIdInvalid, UserAdminInvalid
+from pyrogram.raw import types
+from pyrogram.types import User
+
+from userbot.commands import chat_admin
+from userbot.storage import SQLiteStorage
+from userbot.utils import PeerCache, Translation
+
+_UNKNOWN_USER = 999
+_ADMIN = 7
+
+
+class _FakeAdminClient:
+    def __init__(self) -> None:
+        self.me = SimpleNamespace(id=1)
+        self.banned: list[int] = []
+        self.unbanned: list[int] = []
+        self.chat_requests = 0
+
+    async def get_users(self, user_ids: list[int]) -> list[User]:
+        if _UNKNOWN_USER in user_ids:
+            raise PeerIdInvalid()
+        return [User(client=self, id=i, first_name=f"User {i}") for i in user_ids]
+
+    async def get_chat(self, chat_id: int) -> SimpleNamespace:
+        self.chat_requests += 1
+        return SimpleNamespace(id=chat_id, permissions=None)
+
+    async def ban_chat_member(self, chat_id: int, user_id: int, until_date: object) -> None:
+        if user_id in (_UNKNOWN_USER, _ADMIN):
+            raise PeerIdInvalid() if user_id == _UNKNOWN_USER else UserAdminInvalid()
+        self.banned.append(user_id)
+
+    async def unban_chat_member(self, chat_id: int, user_id: int) -> None:
+        if user_id == _UNKNOWN_USER:
+            raise PeerIdInvalid()
+        self.unbanned.append(user_id)
+
+
+class _FakeMessage:
+    def __init__(self) -> None:
+        self.chat = SimpleNamespace(id=-100)
+        self.outgoing = True
+        self.from_user = None
+        self.edit_date = None
+        self.date = None
+        self.reply_to_message = None
+        self.edits: list[str] = []
+
+    async def edit_text(self, text: str) -> None:
+        self.edits.append(text)
+
+
+@pytest.fixture()
+def user_group(monkeypatch: pytest.MonkeyPatch) -> set[int]:
+    users = {*range(2, 12), _UNKNOWN_USER}
+
+    async def resolve_users(*args: object, **kwargs: object) -> set[int]:
+        return users
+
+    monkeypatch.setattr(chat_admin, "resolve_users", resolve_users)
+    return users
+
+
+async def test_ban_reports_each_user(user_group: set[int]) -> None:
+    client = _FakeAdminClient()
+    command = SimpleNamespace(args=("group", None, None, None))
+    text = await chat_admin.restrict_user(
+        client,
+        _FakeMessage(),
+        command,
+        None,
+        PeerCache(client),
+        Translation(None),
+    )
+    assert sorted(client.banned) == sorted(user_group - {_UNKNOWN_USER, _ADMIN})
+    banned, failed = text.split("Failed")
+    assert "User 2" in banned and "User 7" not in banned
+    assert f"<code>{_UNKNOWN_USER}</code>: <code>PEER_ID_INVALID</code>" in failed
+    assert "User 7</a>: <code>USER_ADMIN_INVALID</code>" in failed
+
+
+async def test_ban_gets_fresh_chat_permissions(user_group: set[int]) -> None:
+    client = _FakeAdminClient()
+    peers = PeerCache(client)
+    command = SimpleNamespace(args=("group", None, None, None))
+    for _ in range(2):
+        await chat_admin.restrict_user(
+            client, _FakeMessage(), command, None, peers, Translation(None)
+        )
+    assert client.chat_requests == 2
+
+
+async def test_unban_reports_each_user(user_group: set[int]) -> None:
+    client = _FakeAdminClient()
+    text = await chat_admin.chat_unban(
+        client,
+        _FakeMessage(),
+        SimpleNamespace(args=("group",)),
+        None,
+        PeerCache(client),
+        Translation(None),
+    )
+    assert sorted(client.unbanned) == sorted(user_group - {_UNKNOWN_USER})
+    assert "User 7" in text.split("Failed")[0]
+    assert f"<code>{_UNKNOWN_USER}</code>: <code>PEER_ID_INVALID</code>" in text
+
+
+class _FakeGroupClient:
+    """Members of a chat, kicking a member shifts the following ones like in Telegram."""
+
+    def __init__(self, count: int, *, basic: bool = False, admins: tuple[int, ...] = ()) -> None:
+        self.me = SimpleNamespace(id=0)
+        self.members = list(range(1, count + 1))
+        self.deleted = {user_id for user_id in self.members if user_id % 3 == 0}
+        self.admins = set(admins)
+        self.basic = basic
+        self.pages = 0
+        self.resolved = 0
+        # Members returned by each page
+        self.fetched: list[int] = []
+        self.fail_at_page: int | None = None
+        self.page_fetched = asyncio.Event()
+        # Bans of these members never finish
+        self.stuck: set[int] = set()
+        self.random = random.Random(0)
+
+    async def resolve_peer(self, chat_id: int) -> types.InputPeerChat | types.InputPeerChannel:
+        self.resolved += 1
+        if self.basic:
+            return types.InputPeerChat(chat_id=-chat_id)
+        return types.InputPeerChannel(channel_id=1, access_hash=0)
+
+    async def get_chat_member(self, chat_id: int, user_id: int) -> SimpleNamespace:
+        return SimpleNamespace(privileges=SimpleNamespace(can_restrict_members=True))
+
+    async def get_chat_members(self, chat_id: int) -> AsyncIterator[SimpleNamespace]:
+        assert self.basic
+        for user_id in list(self.members):
+            yield SimpleNamespace(
+                user=SimpleNamespace(id=user_id, is_deleted=user_id in self.deleted)
+            )
+
+    async def invoke(self, query: types.channels.ChannelParticipants) -> SimpleNamespace:
+        self.pages += 1
+        if self.pages == self.fail_at_page:
+            raise ConnectionError("Connection lost")
+        await asyncio.sleep(0.005)
+        page = self.members[query.offset : query.offset + query.limit]
+        self.fetched.extend(page)
+        self.page_fetched.set()
+        return SimpleNamespace(
+            participants=[SimpleNamespace(user_id=user_id) for user_id in page],
+            users=[
+                SimpleNamespace(id=user_id, deleted=user_id in self.deleted) for user_id in page
+            ],
+        )
+
+    async def ban_chat_member(self, chat_id: int, user_id: int, until_date: object) -> None:
+        if user_id in self.stuck:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.random.random() * 0.01)
+        if user_id in self.admins:
+            raise UserAdminInvalid()
+        self.members.remove(user_id)
+
+    def deleted_left(self) -> list[int]:
+        return [user_id for user_id in self.members if user_id in self.deleted]
+
+
+@pytest.fixture()
+async def storage(tmp_path: Path) -> AsyncIterator[SQLiteStorage]:
+    async with SQLiteStorage(tmp_path / "storage.sqlite3") as storage:
+        yield storage
+
+
+async def _kick_deleted(client: _FakeGroupClient, storage: SQLiteStorage, arg: str | None) -> str:
+    return await chat_admin.kick_deleted_accounts(
+        client, _FakeMessage(), SimpleNamespace(args=(arg,)), storage, Translation(None)
+    )
+
+
+async def test_chatcleardel_checks_each_member_once(storage: SQLiteStorage) -> None:
+    client = _FakeGroupClient(2000, admins=(3, 999))
+    text = await _kick_deleted(client, storage, None)
+    assert "664/666" in text and "2000 members checked" in text
+    assert client.deleted_left() == [3, 999]
+    assert client.resolved == 1
+
+
+async def test_chatcleardel_resumes_without_skipping_members(storage: SQLiteStorage) -> None:
+    client = _FakeGroupClient(3000)
+    members = set(client.members)
+    client.fail_at_page = 6
+    with pytest.raises(ConnectionError):
+        await _kick_deleted(client, storage, None)
+    assert await storage.get_checkpoint("chatcleardel:-100") > 0
+    first = set(client.fetched)
+    client.fetched.clear()
+    client.fail_at_page = None
+    await _kick_deleted(client, storage, "resume")
+    second = set(client.fetched)
+    assert first | second == members
+    # Only the pages unfinished when stopped are requested again, about a page of members
+    assert len(first & second) < 2 * 200
+    assert not client.deleted_left()
+
+
+async def test_chatcleardel_resumes_after_cancel(storage: SQLiteStorage) -> None:
+    client = _FakeGroupClient(3000)
+    # Stays unfinished in the first page until cancelled
+    client.stuck.add(9)
+    task = asyncio.create_task(_kick_deleted(client, storage, None))
+    while client.pages < 5:
+        client.page_fetched.clear()
+        await client.page_fetched.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert await storage.get_checkpoint("chatcleardel:-100") == 0
+    client.stuck.clear()
+    await _kick_deleted(client, storage, "resume")
+    assert not client.deleted_left()
+    assert await storage.get_checkpoint("chatcleardel:-100") is None
+
+
+async def test_chatcleardel_ignores_checkpoint_in_basic_groups(storage: SQLiteStorage) -> None:
+    client = _FakeGroupClient(100, basic=True)
+    # Left by another run, e.g. before the group was converted to a supergroup
+    await storage.save_checkpoint("chatcleardel:-100", 50)
+    text = await _kick_deleted(client, storage, "resume")
+    assert "33/33" in text and "100 members checked" in text
+    assert not client.deleted_left()
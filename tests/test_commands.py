@@ -0,0 +1,37 @@
+import pytest
+
+from userbot.meta.modules import CommandsModule
+from userbot.meta.modules.base import HandlerFiltersModule
+from userbot.meta.modules.commands import _CommandDispatcher
+
+
+async def _handler() -> str:
+    return "ok"
+
+
+async def _other_handler() -> str:
+    return "ok"
+
+
+def test_commands_are_case_insensitive() -> None:
+    commands = CommandsModule(default_prefix=".")
+    commands.add(_handler, "Ping")
+    commands._set_prefix()
+    dispatcher = _CommandDispatcher(commands._handlers)
+    assert dispatcher.resolve(".ping") is dispatcher.resolve(".PING") is not None
+
+
+def test_duplicates_differing_in_case_are_rejected() -> None:
+    commands = CommandsModule(default_prefix=".")
+    commands.add(_handler, "ping")
+    commands.add(_other_handler, "PING")
+    with pytest.raises(ValueError, match="Duplicate command: PING"):
+        commands._check_duplicates()
+
+
+def test_modules_must_implement_registration() -> None:
+    class _Module(HandlerFiltersModule):
+        pass
+
+    with pytest.raises(TypeError, match="_create_handlers_filters"):
+        _Module()
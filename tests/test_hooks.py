@@ -0,0 +1,73 @@
+from collections import Counter
+from types import SimpleNamespace
+
+from pyrogram import filters
+
+from userbot.meta.modules import HooksModule
+from userbot.meta.modules.hooks import _FilterStage, _HookEnabledFilter, _StagedFilter
+
+
+class _FakeStorage:
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.calls = 0
+
+    async def is_hook_enabled(self, name: str, chat_id: int) -> bool:
+        self.calls += 1
+        return self.enabled
+
+
+def _staged_filter(storage: _FakeStorage, calls: list[str]) -> _StagedFilter:
+    def sync_filter(flt: filters.Filter, client: object, message: SimpleNamespace) -> bool:
+        calls.append("sync")
+        return "hi" in message.text
+
+    async def async_filter(flt: filters.Filter, client: object, message: SimpleNamespace) -> bool:
+        calls.append("async")
+        return not message.outgoing
+
+    return _StagedFilter(
+        [
+            _FilterStage("incoming", filters.create(async_filter)),
+            _FilterStage("enabled", _HookEnabledFilter("hook", storage)),
+            _FilterStage("filters", ~filters.create(sync_filter) | filters.create(sync_filter)),
+        ],
+        Counter(),
+    )
+
+
+async def test_cheap_filters_go_first() -> None:
+    storage = _FakeStorage(enabled=True)
+    calls: list[str] = []
+    flt = _staged_filter(storage, calls)
+    assert [stage.name for stage in flt.stages] == ["filters", "incoming", "enabled"]
+    # No executor, synchronous filters are called right away
+    client = SimpleNamespace()
+    message = SimpleNamespace(text="hi", outgoing=False, chat=SimpleNamespace(id=1))
+    assert await flt(client, message)
+    assert calls == ["sync", "sync", "async"]
+    assert storage.calls == 1
+
+
+async def test_rejections_are_counted() -> None:
+    storage = _FakeStorage(enabled=False)
+    flt = _staged_filter(storage, [])
+    client = SimpleNamespace()
+    message = SimpleNamespace(text="hi", outgoing=True, chat=SimpleNamespace(id=1))
+    assert not await flt(client, message)
+    message.outgoing = False
+    assert not await flt(client, message)
+    assert flt.rejections == {"incoming": 1, "enabled": 1}
+    assert storage.calls == 1
+
+
+def test_module_collects_rejections() -> None:
+    async def hook() -> None:
+        pass
+
+    module = HooksModule()
+    module.add(hook, "quiet", filters.all)
+    module.add(hook, "noisy", filters.all)
+    noisy = module._handlers[1]
+    noisy.rejections["enabled"] += 2
+    assert module.rejections() == {"noisy": {"enabled": 2}}
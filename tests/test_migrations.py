@@ -0,0 +1,63 @@
+import logging
+import time
+from importlib import import_module
+from typing import Any
+
+import pytest
+import redis
+from redis.asyncio import Redis
+
+from userbot.migrations._redis import run_redis_migration
+
+_log = logging.getLogger(__name__)
+
+
+@pytest.fixture(autouse=True)
+def _env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SESSION", "test")
+    monkeypatch.setenv("REDIS_HOST", "localhost")
+    monkeypatch.setenv("REDIS_DB", "15")
+
+
+def test_skipped_for_other_storages(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+
+    async def migrate(redis: Redis) -> None:
+        raise AssertionError("Must not be run")
+
+    run_redis_migration(migrate, _log)
+
+
+def test_runs_with_configured_redis(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("STORAGE_BACKEND", "redis")
+    connections: list[dict[str, Any]] = []
+
+    async def migrate(redis: Redis) -> None:
+        async with redis:
+            connections.append(redis.connection_pool.connection_kwargs)
+
+    run_redis_migration(migrate, _log)
+    assert len(connections) == 1
+    assert connections[0]["host"] == "localhost"
+    assert connections[0]["db"] == 15
+    assert connections[0]["decode_responses"]
+
+
+def test_react2ban_sets_are_converted_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("STORAGE_BACKEND", "redis")
+    sync_redis = redis.Redis(db=15, decode_responses=True)
+    keys = ["userbot:react2ban:1", "userbot:react2ban:2"]
+    try:
+        sync_redis.delete(*keys)
+        sync_redis.sadd(keys[0], 10)
+        sync_redis.sadd(keys[1], 20)
+        sync_redis.expire(keys[1], 100)
+        for name in ("09_react2ban_expiry", "10_expiring_entries"):
+            import_module(f"userbot.migrations.{name}").main()
+        assert sync_redis.type(keys[0]) == sync_redis.type(keys[1]) == "zset"
+        assert 29 * 24 * 60 * 60 < sync_redis.ttl(keys[0]) <= 30 * 24 * 60 * 60
+        assert 0 < sync_redis.ttl(keys[1]) <= 100
+        assert sync_redis.zscore(keys[1], 20) <= time.time() + 100
+    finally:
+        sync_redis.delete(*keys)
+        sync_redis.close()
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+import pytest
+from pyrogram.errors import FloodWait, SlowmodeWait
+
+from userbot.utils.request_scheduler import (
+    _MAX_FLOOD_RETRIES,
+    RequestPriority,
+    RequestScheduler,
+    request_priority,
+)
+
+# Timings are measured with the real clock, this is the allowed error
+_TOLERANCE = 0.03
+
+
+def _query(method: str = "messages.Method", chat_id: int | None = None) -> SimpleNamespace:
+    peer = None if chat_id is None else SimpleNamespace(channel_id=chat_id)
+    return SimpleNamespace(QUALNAME=method, peer=peer)
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        # (time, query, priority) of every request sent
+        self.sent: list[tuple[float, SimpleNamespace, Any]] = []
+        # Raised for the next requests instead of sending them
+        self.errors: list[Exception] = []
+        self.should_fail: Callable[[SimpleNamespace], bool] = lambda query: True
+
+    # Same parameters as `Client.invoke`
+    async def invoke(
+        self,
+        query: SimpleNamespace,
+        retries: int = 5,
+        timeout: float = 15,
+        sleep_threshold: float | None = None,
+        *,
+        tag: Any = None,
+    ) -> Any:
+        assert sleep_threshold == 0
+        self.sent.append((time.monotonic(), query, tag))
+        if self.errors and self.should_fail(query):
+            raise self.errors.pop(0)
+        return tag
+
+
+@pytest.fixture()
+async def client() -> _FakeClient:
+    return _FakeClient()
+
+
+def _times(
+    client: _FakeClient, *, method: str | None = None, chat_id: int | None = None
+) -> list[float]:
+    return [
+        sent_at
+        for sent_at, query, _ in client.sent
+        if (method is None or query.QUALNAME == method)
+        and (chat_id is None or query.peer is not None and query.peer.channel_id == chat_id)
+    ]
+
+
+async def test_method_rate_is_limited(client: _FakeClient) -> None:
+    async with RequestScheduler(client, method_rate=20, chat_rate=1000) as scheduler:
+        start = time.monotonic()
+        await asyncio.gather(*(scheduler.invoke(_query()) for _ in range(25)))
+    times = _times(client)
+    # The bucket is full at first, then requests are spaced by 1/rate
+    assert all(t - start < _TOLERANCE for t in times[:20])
+    for previous, current in zip(times[20:], times[21:]):
+        assert current - previous == pytest.approx(0.05, abs=_TOLERANCE)
+    assert times[-1] - start == pytest.approx(0.25, abs=_TOLERANCE * 2)
+
+
+async def test_chat_rate_is_limited_per_chat(client: _FakeClient) -> None:
+    async with RequestScheduler(client, method_rate=1000, chat_rate=5) as scheduler:
+        start = time.monotonic()
+        await asyncio.gather(
+            *(scheduler.invoke(_query(chat_id=1)) for _ in range(8)),
+            *(scheduler.invoke(_query(chat_id=2)) for _ in range(5)),
+        )
+    assert _times(client, chat_id=2)[-1] - start < _TOLERANCE
+    assert _times(client, chat_id=1)[-1] - start == pytest.approx(0.6, abs=_TOLERANCE * 2)
+
+
+async def test_interactive_requests_go_first(client: _FakeClient) -> None:
+    async with RequestScheduler(client, method_rate=10, chat_rate=1000) as scheduler:
+        with request_priority(RequestPriority.BULK):
+            bulk = [asyncio.create_task(scheduler.invoke(_query(), tag="bulk")) for _ in range(15)]
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queued"]["bulk"] == 5
+        await scheduler.invoke(_query(), tag="interactive")
+        await asyncio.gather(*bulk)
+        stats = scheduler.stats()
+    tags = [tag for _, _, tag in client.sent]
+    # The bucket was emptied by the bulk requests, the next token goes to the interactive one
+    assert tags.index("interactive") == 10
+    assert stats["queued"] == {"interactive": 0, "background": 0, "bulk": 0}
+    assert stats["max_queued"]["bulk"] == 15
+    assert stats["requests"] == 16
+
+
+async def test_flood_wait_pauses_the_method(client: _FakeClient) -> None:
+    client.errors.append(FloodWait(value=1))
+    client.should_fail = lambda query: query.QUALNAME == "messages.Flooded"
+    async with RequestScheduler(client, method_rate=1000, chat_rate=1000) as scheduler:
+        start = time.monotonic()
+        first = asyncio.create_task(scheduler.invoke(_query("messages.Flooded"), tag="retried"))
+        await asyncio.sleep(0.1)
+        results = await asyncio.gather(
+            first,
+            *(scheduler.invoke(_query("messages.Flooded")) for _ in range(3)),
+            scheduler.invoke(_query("messages.Other")),
+        )
+        stats = scheduler.stats()
+    assert results[0] == "retried"
+    flooded = _times(client, method="messages.Flooded")
+    # The failed request, then everyone waits for the pause to end, including the retry
+    assert len(flooded) == 5
+    assert flooded[0] - start < _TOLERANCE
+    assert all(t - start >= 1 - _TOLERANCE for t in flooded[1:])
+    # Other methods are not paused
+    assert _times(client, method="messages.Other")[0] - start < 0.1 + _TOLERANCE
+    assert stats["flood_waits"] == 1
+    assert stats["flood_wait_seconds"] == 1
+
+
+async def test_slowmode_wait_pauses_the_chat(client: _FakeClient) -> None:
+    client.errors.append(SlowmodeWait(value=1))
+    client.should_fail = lambda query: query.peer is not None and query.peer.channel_id == 1
+    async with RequestScheduler(client, method_rate=1000, chat_rate=1000) as scheduler:
+        start = time.monotonic()
+        first = asyncio.create_task(scheduler.invoke(_query(chat_id=1)))
+        await asyncio.sleep(0.1)
+        await asyncio.gather(
+            first,
+            scheduler.invoke(_query(chat_id=1)),
+            scheduler.invoke(_query(chat_id=2)),
+        )
+    # The same method is sent to another chat meanwhile
+    assert _times(client, chat_id=2)[0] - start < 0.1 + _TOLERANCE
+    assert all(t - start >= 1 - _TOLERANCE for t in _times(client, chat_id=1)[1:])
+
+
+async def test_sleep_threshold_is_overridden(client: _FakeClient) -> None:
+    async with RequestScheduler(client) as scheduler:
+        await scheduler.invoke(_query(), 3, 10, 60)
+        await scheduler.invoke(_query(), sleep_threshold=60)
+        await scheduler.invoke(_query())
+    assert len(client.sent) == 3
+
+
+async def test_long_flood_wait_is_raised(client: _FakeClient) -> None:
+    client.errors.append(FloodWait(value=10))
+    async with RequestScheduler(client, max_flood_wait=5) as scheduler:
+        with pytest.raises(FloodWait):
+            await scheduler.invoke(_query())
+        assert scheduler.stats()["flood_waits"] == 0
+    assert len(client.sent) == 1
+
+
+async def test_flood_wait_is_retried_limited_times(client: _FakeClient) -> None:
+    client.errors.extend(FloodWait(value=0) for _ in range(_MAX_FLOOD_RETRIES + 1))
+    async with RequestScheduler(client) as scheduler:
+        with pytest.raises(FloodWait):
+            await scheduler.invoke(_query())
+    assert len(client.sent) == _MAX_FLOOD_RETRIES + 1
+
+
+async def test_cancelled_requests_are_not_counted(client: _FakeClient) -> None:
+    async with RequestScheduler(client, method_rate=1, chat_rate=1000) as scheduler:
+        await scheduler.invoke(_query())
+        with request_priority(RequestPriority.BACKGROUND):
+            waiting = [asyncio.create_task(scheduler.invoke(_query())) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queued"]["background"] == 3
+        for task in waiting[1:]:
+            task.cancel()
+        await waiting[0]
+        assert scheduler.stats()["queued"]["background"] == 0
+        # Cancelled while waiting, when closed
+        waiting = asyncio.create_task(scheduler.invoke(_query()))
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queued"]["interactive"] == 1
+    assert scheduler.stats()["queued"]["interactive"] == 0
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert len(client.sent) == 2
@@ -0,0 +1,89 @@
+import asyncio
+import re
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from pyrogram.types.messages_and_media.message import Str
+
+from userbot.meta.middleware_manager import provides
+from userbot.meta.modules import ShortcutsModule
+from userbot.utils import Translation
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        self.handlers = []
+
+    def add_handler(self, handler, group: int = 0) -> None:
+        self.handlers.append(handler)
+
+
+def _message(text: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        text=Str(text).init([]),
+        caption=None,
+        outgoing=True,
+        from_user=None,
+        edit_text=AsyncMock(),
+    )
+
+
+@provides("tr")
+async def _translate_middleware(handler, data):
+    # Needed by the waiting message
+    data["tr"] = Translation(None)
+    return await handler(data)
+
+
+async def _handle(module: ShortcutsModule, text: str) -> SimpleNamespace:
+    module.add_middleware(_translate_middleware)
+    client = _FakeClient()
+    module.register(client)
+    message = _message(text)
+    # The first handler is for new messages, the second one is for edits
+    await client.handlers[0].callback(client, message)
+    return message
+
+
+async def test_expands_all_shortcuts_with_one_edit() -> None:
+    module = ShortcutsModule()
+
+    @module.add(r"a:(\d)")
+    async def a(match: re.Match[str]) -> str:
+        return f"A{match[1]}"
+
+    @module.add(r"b:(\d)")
+    async def b(match: re.Match[str]) -> str:
+        return f"B{match[1]}"
+
+    message = await _handle(module, "a:1 b:2 a:3")
+    message.edit_text.assert_awaited_once()
+    assert message.edit_text.await_args.args[0] == "A1 B2 A3"
+
+
+async def test_failing_shortcuts_leave_message_untouched() -> None:
+    module = ShortcutsModule()
+
+    @module.add(r"fail:(\d)")
+    async def fail(match: re.Match[str]) -> str:
+        raise RuntimeError("expected")
+
+    message = await _handle(module, "fail:1 fail:2")
+    message.edit_text.assert_not_awaited()
+
+
+async def test_slow_shortcuts_leave_message_untouched() -> None:
+    module = ShortcutsModule()
+
+    # Slower than the delay of the waiting message, but times out, so nothing is expanded
+    @module.add(r"slow:(\d)", timeout=1)
+    async def slow(match: re.Match[str]) -> str:
+        await asyncio.sleep(2)
+        return "never"
+
+    @module.add(r"fail:(\d)")
+    async def fail(match: re.Match[str]) -> str:
+        raise RuntimeError("expected")
+
+    message = await _handle(module, "slow:1 fail:2")
+    message.edit_text.assert_not_awaited()
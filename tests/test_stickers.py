@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from userbot.commands.stickers import random_sticker
+from userbot.utils import Translation
+
+
+class _FakeStorage:
+    def __init__(self, stickers: list | None) -> None:
+        self.stickers = stickers
+
+    async def get_cached_stickers(self, emoji: str) -> list | None:
+        return self.stickers
+
+    async def wait_sticker_cache(self) -> None:
+        pass
+
+
+async def _random_sticker(stickers: list | None) -> str | None:
+    client = SimpleNamespace(invoke=AsyncMock())
+    message = SimpleNamespace(delete=AsyncMock())
+    result = await random_sticker(
+        client,
+        message,
+        SimpleNamespace(args=("🤷",)),
+        _FakeStorage(stickers),
+        SimpleNamespace(),
+        Translation(None),
+    )
+    client.invoke.assert_not_awaited()
+    message.delete.assert_not_awaited()
+    return result
+
+
+async def test_no_stickers_for_emoji() -> None:
+    assert "No stickers found" in await _random_sticker([])
+
+
+async def test_no_sticker_cache() -> None:
+    assert "No stickers found" in await _random_sticker(None)
@@ -0,0 +1,270 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Callable, TypeVar
+
+import pytest
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import ResponseError
+
+from userbot.storage import _KEYSPACE_EVENTS, RedisStorage, SQLiteStorage, Storage
+from userbot.utils import CommandUsage
+
+_T = TypeVar("_T")
+_REDIS_DB = 15
+_STICKER = {"id": 1, "access_hash": 2, "file_reference_b64": "AQI="}
+_OTHER_STICKER = {"id": 3, "access_hash": 4, "file_reference_b64": "AwQ="}
+
+
+@asynccontextmanager
+async def _connect_redis(
+    prepare: Callable[[RedisStorage], object] | None = None,
+) -> AsyncIterator[RedisStorage]:
+    """Connects a storage to a local Redis server, its keys are removed after the test."""
+    namespace = f"test-{uuid.uuid4().hex}"
+    storage = RedisStorage("localhost", 6379, _REDIS_DB, client_cache_size=16, namespace=namespace)
+    if prepare is not None:
+        prepare(storage)
+    try:
+        await storage.connect()
+    except RedisConnectionError as e:
+        pytest.skip(f"Redis is not available: {e}")
+    try:
+        yield storage
+    finally:
+        await storage.close()
+        async with Redis(db=_REDIS_DB) as redis:
+            async for key in redis.scan_iter(match=f"{namespace}:*"):
+                await redis.delete(key)
+
+
+@pytest.fixture()
+async def redis_storage() -> AsyncIterator[RedisStorage]:
+    async with _connect_redis() as storage:
+        yield storage
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+async def storage(request: pytest.FixtureRequest, tmp_path: Path) -> AsyncIterator[Storage]:
+    """Every backend, they must behave the same."""
+    if request.param == "redis":
+        async with _connect_redis() as storage:
+            yield storage
+    else:
+        async with SQLiteStorage(tmp_path / "storage.sqlite3") as storage:
+            yield storage
+
+
+async def _list(items: AsyncIterable[_T]) -> list[_T]:
+    return [item async for item in items]
+
+
+async def _wait_for(condition: object, timeout: float = 5) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+async def test_redis_sets_cache_survives_unexpected_errors(redis_storage: RedisStorage) -> None:
+    await redis_storage.enable_hook("hook", 1)
+    async with Redis(db=_REDIS_DB, decode_responses=True) as redis:
+        # Not a set, loading it fails with WRONGTYPE
+        await redis.set(redis_storage._key("hooks", "broken"), "value")
+        await _wait_for(lambda: redis_storage._sets_cache is None)
+        await _wait_for(lambda: redis_storage._sets_cache is not None)
+        assert not redis_storage._cache_task.done()
+        # Changes made by others are seen again
+        await redis.sadd(redis_storage._key("hooks", "hook"), 2)
+        await _wait_for(lambda: 2 in redis_storage._sets_cache["hooks"].get("hook", ()))
+    assert await redis_storage.is_hook_enabled("hook", 1)
+    assert await redis_storage.is_hook_enabled("hook", 2)
+
+
+async def test_redis_close_stops_listeners(redis_storage: RedisStorage) -> None:
+    tasks = [redis_storage._cache_task, redis_storage._client_cache_task]
+    await redis_storage.close()
+    assert all(task.done() for task in tasks)
+    assert redis_storage._sets_cache is None
+    assert redis_storage._languages_cache is None
+    # Closing twice is harmless, the fixture closes the storage again
+    await redis_storage.close()
+
+
+async def test_hooks(storage: Storage) -> None:
+    await storage.enable_hook("a", 1)
+    await storage.enable_hook("b", 1)
+    await storage.enable_hook("a", 2)
+    assert await storage.is_hook_enabled("a", 1)
+    assert not await storage.is_hook_enabled("b", 2)
+    assert sorted(await _list(storage.list_enabled_hooks(1))) == ["a", "b"]
+    await storage.disable_hook("a", 1)
+    await storage.disable_hook("c", 1)
+    assert not await storage.is_hook_enabled("a", 1)
+    assert await storage.is_hook_enabled("a", 2)
+    assert await _list(storage.list_enabled_hooks(1)) == ["b"]
+    assert await _list(storage.list_enabled_hooks(3)) == []
+
+
+async def test_react2ban_expires(storage: Storage) -> None:
+    await storage.add_react2ban(1, 10, ttl=1)
+    await storage.add_react2ban(1, 11)
+    await storage.add_react2ban(2, 10)
+    assert await storage.is_react2ban_enabled(1, 10)
+    await storage.remove_react2ban(2, 10)
+    assert not await storage.is_react2ban_enabled(2, 10)
+    await asyncio.sleep(1.1)
+    assert not await storage.is_react2ban_enabled(1, 10)
+    assert await storage.is_react2ban_enabled(1, 11)
+    # Expired entries of a chat still having others are removed only here
+    assert await storage.compact() == 1
+    assert await storage.compact() == 0
+    assert await storage.is_react2ban_enabled(1, 11)
+    # Prolonged
+    await storage.add_react2ban(1, 12, ttl=1)
+    await storage.add_react2ban(1, 12)
+    await asyncio.sleep(1.1)
+    assert await storage.is_react2ban_enabled(1, 12)
+
+
+async def test_sticker_cache(storage: Storage) -> None:
+    assert not await storage.has_sticker_cache()
+    assert await storage.get_sticker_cache() == {}
+    assert await storage.get_cached_stickers("👍") is None
+    await storage.put_sticker_cache({"👍": [_STICKER], "❤️": [_OTHER_STICKER]})
+    await asyncio.wait_for(storage.wait_sticker_cache(), 1)
+    assert await storage.has_sticker_cache()
+    assert await storage.get_cached_stickers("👍") == [_STICKER]
+    # Emoji with and without the variation selector are the same
+    assert await storage.get_cached_stickers("❤") == [_OTHER_STICKER]
+    assert await storage.get_cached_stickers("🤷") == []
+    await storage.put_sticker_cache({"🤷": [_STICKER]}, ttl=1)
+    assert await storage.get_cached_stickers("👍") == []
+    assert await storage.get_sticker_cache() == {"🤷": [_STICKER]}
+    await asyncio.sleep(1.1)
+    assert not await storage.has_sticker_cache()
+    assert await storage.get_cached_stickers("🤷") is None
+
+
+async def test_command_stats(storage: Storage) -> None:
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    await storage.commands_used(
+        {
+            CommandUsage("help", 1, today): 3,
+            CommandUsage("help", 2, yesterday): 1,
+            CommandUsage("ping", 2, today): 1,
+        }
+    )
+    await storage.commands_used({CommandUsage("ping", 3, today): 4})
+    assert await _list(storage.list_command_usage()) == [("ping", 5), ("help", 4)]
+    assert await _list(storage.list_command_usage(1)) == [("ping", 5)]
+    assert await storage.get_total_command_usage() == 9
+    assert await _list(storage.list_daily_command_usage(yesterday - timedelta(days=1), today)) == [
+        (yesterday - timedelta(days=1), 0),
+        (yesterday, 1),
+        (today, 8),
+    ]
+    assert await _list(storage.list_daily_command_usage(today, yesterday)) == []
+    assert await _list(storage.list_chat_command_usage(yesterday, today)) == [
+        (3, 4),
+        (1, 3),
+        (2, 2),
+    ]
+    assert await _list(storage.list_chat_command_usage(today, today, limit=1)) == [(3, 4)]
+
+
+async def test_checkpoints(storage: Storage) -> None:
+    assert await storage.get_checkpoint("job") is None
+    await storage.save_checkpoint("job", 10)
+    await storage.save_checkpoint("job", 20)
+    await storage.save_checkpoint("expiring", 30, ttl=1)
+    assert await storage.get_checkpoint("job") == 20
+    assert await storage.get_checkpoint("expiring") == 30
+    await storage.delete_checkpoint("job")
+    await storage.delete_checkpoint("missing")
+    assert await storage.get_checkpoint("job") is None
+    await asyncio.sleep(1.1)
+    assert await storage.get_checkpoint("expiring") is None
+    await storage.compact()
+    assert await storage.get_checkpoint("expiring") is None
+
+
+async def test_empty_sticker_cache(storage: Storage) -> None:
+    waiter = asyncio.create_task(storage.wait_sticker_cache())
+    await asyncio.sleep(0.1)
+    await storage.put_sticker_cache({})
+    await asyncio.wait_for(waiter, 1)
+    assert await storage.has_sticker_cache()
+    assert await storage.get_sticker_cache() == {}
+    assert await storage.get_cached_stickers("👍") == []
+
+
+def _forbid_config_set(storage: RedisStorage) -> None:
+    async def config_set(*args: object) -> None:
+        raise AssertionError("Must not be called")
+
+    storage._pool.config_set = config_set
+
+
+async def test_redis_keyspace_events_are_merged() -> None:
+    async with Redis(db=_REDIS_DB, decode_responses=True) as redis:
+        original = (await redis.config_get("notify-keyspace-events"))["notify-keyspace-events"]
+        try:
+            await redis.config_set("notify-keyspace-events", "El")
+            async with _connect_redis():
+                config = await redis.config_get("notify-keyspace-events")
+            assert set(config["notify-keyspace-events"]) >= set("El") | set(_KEYSPACE_EVENTS)
+            # Nothing is missing, the value is not changed
+            await redis.config_set("notify-keyspace-events", "AK")
+            async with _connect_redis(_forbid_config_set) as storage:
+                assert storage._cache_task is not None
+        finally:
+            await redis.config_set("notify-keyspace-events", original)
+
+
+async def test_redis_works_without_config_access() -> None:
+    def deny_config(storage: RedisStorage) -> None:
+        async def config_get(*args: object) -> None:
+            raise ResponseError("unknown command 'CONFIG'")
+
+        storage._pool.config_get = config_get
+
+    async with _connect_redis(deny_config) as storage:
+        assert storage._cache_task is None
+        await storage.enable_hook("hook", 1)
+        assert await storage.is_hook_enabled("hook", 1)
+        await storage.set_chat_language(1, "en")
+        assert await storage.get_chat_language(1) == "en"
+        job = asyncio.create_task(storage.sticker_cache_job(_sticker_provider))
+        try:
+            await asyncio.wait_for(storage.wait_sticker_cache(), 2)
+            assert await storage.get_cached_stickers("👍") == [_STICKER]
+        finally:
+            job.cancel()
+
+
+async def _sticker_provider() -> dict[str, list[dict[str, object]]]:
+    return {"👍": [_STICKER]}
+
+
+async def test_redis_bulk_changes_are_reloaded_once(redis_storage: RedisStorage) -> None:
+    loaded: list[set[tuple[str, str]]] = []
+    load_sets = redis_storage._load_sets
+
+    async def count_loads(sets: set[tuple[str, str]]) -> list[object]:
+        loaded.append(set(sets))
+        return await load_sets(sets)
+
+    redis_storage._load_sets = count_loads
+    async with Redis(db=_REDIS_DB, decode_responses=True) as redis:
+        for chat_id in range(200):
+            await redis.sadd(redis_storage._key("hooks", "hook"), chat_id)
+            await redis.zadd(redis_storage._key("react2ban", chat_id), {1: 2**40})
+    await _wait_for(lambda: len(redis_storage._sets_cache["react2ban"]) == 200)
+    await _wait_for(lambda: len(redis_storage._sets_cache["hooks"].get("hook", ())) == 200)
+    assert len(loaded) < 20
+    assert sum(("hooks", "hook") in sets for sets in loaded) < 20
+    assert await redis_storage.is_react2ban_enabled(199, 1)
@@ -1,8 +1,11 @@
 __all__: list[str] = []
 
+import asyncio
 import logging
 import os
+from contextlib import AsyncExitStack
 from functools import partial
+from typing import NamedTuple
 
 from pyrogram import Client
 from pyrogram.handlers import RawUpdateHandler
@@ -29,38 +32,105 @@ from userbot.middlewares import (
     update_command_stats_middleware,
 )
 from userbot.shortcuts import shortcuts
-from userbot.storage import RedisStorage, Storage
-from userbot.utils import AppLimitsController, SecretValue, StatsController, fetch_stickers
+from userbot.storage import RedisStorage, SQLiteStorage, Storage
+from userbot.utils import (
+    AppLimitsController,
+    CommandStatsBuffer,
+    PeerCache,
+    RequestPriority,
+    RequestScheduler,
+    SecretValue,
+    StatsController,
+    StickerInfo,
+    Translation,
+    fetch_stickers,
+    request_priority,
+)
 from userbot.utils.clients import GitHubClient, WakatimeClient
 
 RAW_UPDATES_GROUP = 1
 _log = logging.getLogger(__name__)
 
 
+async def _fetch_stickers_in_background(client: Client) -> dict[str, list[StickerInfo]]:
+    with request_priority(RequestPriority.BACKGROUND):
+        return await fetch_stickers(client)
+
+
 async def _fetch_and_put_stickers_to_cache(storage: Storage, client: Client) -> None:
-    await storage.put_sticker_cache(await fetch_stickers(client))
+    await storage.put_sticker_cache(await _fetch_stickers_in_background(client))
+
+
+async def _compact_storage(storage: Storage) -> None:
+    removed = await storage.compact()
+    _log.info("Storage compacted, %d stale entries removed", removed)
+
+
+class _Account(NamedTuple):
+    """Objects specific to an account, everything else is shared between accounts."""
+
+    client: Client
+    storage: Storage
+    command_stats: CommandStatsBuffer
+    app_limits: AppLimitsController
+    peers: PeerCache
+    scheduler: RequestScheduler
+
+
+async def _start_account(
+    account: _Account,
+    job_manager: AsyncJobManager,
+    storage_compaction_interval: int,
+) -> None:
+    client, storage = account.client, account.storage
+    _log.debug("Checking for sticker cache presence of %r...", client.name)
+    if not await storage.has_sticker_cache():
+        # don't wait for it, let it run in the background
+        job_manager.add_job(_fetch_and_put_stickers_to_cache(storage, client))
+    job_manager.add_job(storage.sticker_cache_job(lambda: _fetch_stickers_in_background(client)))
+    job_manager.add_job(account.command_stats.flush_job())
+    job_manager.add_periodic_job(
+        partial(_compact_storage, storage),
+        storage_compaction_interval,
+        name=f"storage compaction of {client.name!r}",
+    )
+    await account.app_limits.load_limits(client)
 
 
 async def _main(
     *,
-    client: Client,
-    storage: Storage,
+    accounts: list[_Account],
     github_client: GitHubClient,
+    hooks: HooksModule,
     job_manager: AsyncJobManager,
     stats: StatsController,
-    app_limits_controller: AppLimitsController,
+    storage_compaction_interval: int,
 ) -> None:
-    async with client, storage, github_client, job_manager:
-        _log.debug("Checking for sticker cache presence...")
-        cache = await storage.get_sticker_cache()
-        if len(cache) == 0:
-            # don't wait for it, let it run in the background
-            job_manager.add_job(_fetch_and_put_stickers_to_cache(storage, client))
-        job_manager.add_job(storage.sticker_cache_job(lambda: fetch_stickers(client)))
-        await app_limits_controller.load_limits(client)
+    async with AsyncExitStack() as stack:
+        for account in accounts:
+            # `command_stats` must be exited before `storage` to flush the buffered stats. Storages
+            # sharing the connection pool of the first one are closed before it. `client` may
+            # still make requests when stopping, so `scheduler` is closed after it.
+            await stack.enter_async_context(account.scheduler)
+            await stack.enter_async_context(account.client)
+            await stack.enter_async_context(account.storage)
+            await stack.enter_async_context(account.command_stats)
+        await stack.enter_async_context(github_client)
+        await stack.enter_async_context(job_manager)
+        await asyncio.gather(
+            *(_start_account(a, job_manager, storage_compaction_interval) for a in accounts)
+        )
         stats.startup()
-        _log.info("Bot started")
+        _log.info("Bot started with %d account(s)", len(accounts))
         await idle()
+        for account in accounts:
+            _log.debug("Peer cache stats of %r: %r", account.client.name, account.peers.stats())
+            _log.debug(
+                "Request scheduler stats of %r: %r",
+                account.client.name,
+                account.scheduler.stats(),
+            )
+        _log.debug("Hook filter rejections: %r", hooks.rejections())
 
 
 def main() -> None:
@@ -75,27 +145,52 @@ def main() -> None:
     os.chdir(storage_config.data_location)
 
     telegram_config = TelegramConfig.from_env()
-    client = Client(
-        name=storage_config.session_name,
-        api_id=telegram_config.api_id,
-        api_hash=telegram_config.api_hash.value,
-        app_version=f"evgfilim1/userbot {__version__}",
-        device_model="Linux",
-        workdir=str(storage_config.data_location),
-        **{
-            k: (v.value if isinstance(v, SecretValue) else v)
-            for k, v in telegram_config.pyrogram_kwargs.items()
-        },
-    )
+    pyrogram_kwargs = {
+        k: (v.value if isinstance(v, SecretValue) else v)
+        for k, v in telegram_config.pyrogram_kwargs.items()
+    }
+    # Secrets (phone number, password, session string) belong to the main account only
+    extra_pyrogram_kwargs = {
+        k: v for k, v in telegram_config.pyrogram_kwargs.items() if not isinstance(v, SecretValue)
+    }
+    session_names = (storage_config.session_name, *storage_config.extra_session_names)
+    clients = [
+        Client(
+            name=session_name,
+            api_id=telegram_config.api_id,
+            api_hash=telegram_config.api_hash.value,
+            app_version=f"evgfilim1/userbot {__version__}",
+            device_model="Linux",
+            workdir=str(storage_config.data_location),
+            **(pyrogram_kwargs if i == 0 else extra_pyrogram_kwargs),
+        )
+        for i, session_name in enumerate(session_names)
+    ]
 
-    redis_config = RedisConfig.from_env()
-    password = redis_config.password.value if redis_config.password else None
-    storage = RedisStorage(
-        redis_config.host,
-        redis_config.port,
-        redis_config.db,
-        password,
-    )
+    storages: list[Storage]
+    if storage_config.backend == "sqlite":
+        storages = [
+            SQLiteStorage(storage_config.data_location / f"{session_name}.sqlite3")
+            for session_name in session_names
+        ]
+    else:
+        redis_config = RedisConfig.from_env()
+        password = redis_config.password.value if redis_config.password else None
+        # The main account keeps using the keys without the session name
+        main_storage = RedisStorage(
+            redis_config.host,
+            redis_config.port,
+            redis_config.db,
+            password,
+            client_cache_size=redis_config.client_cache_size,
+        )
+        storages = [
+            main_storage,
+            *(
+                main_storage.namespaced(f"userbot.{session_name}")
+                for session_name in storage_config.extra_session_names
+            ),
+        ]
 
     third_party_services_config = ThirdPartyServicesConfig.from_env()
     github_client = GitHubClient()
@@ -105,22 +200,57 @@ def main() -> None:
         wakatime_client = None
 
     stats = StatsController()
-    app_limits = AppLimitsController()
+    accounts = [
+        _Account(
+            client=client,
+            storage=storage,
+            command_stats=CommandStatsBuffer(storage, app_config.command_stats_flush_interval),
+            app_limits=AppLimitsController(),
+            peers=PeerCache(
+                client,
+                storage if app_config.persist_peer_cache else None,
+                ttl=app_config.peer_cache_ttl,
+            ),
+            scheduler=RequestScheduler(
+                client,
+                method_rate=app_config.api_method_rate,
+                chat_rate=app_config.api_chat_rate,
+                max_flood_wait=app_config.max_flood_wait,
+            ),
+        )
+        for client, storage in zip(clients, storages)
+    ]
+
+    _log.debug("Loading translations...")
+    Translation.preload()
 
     _log.debug("Registering handlers...")
-    client.add_handler(
-        RawUpdateHandler(partial(react2ban_raw_reaction_handler, storage=storage)),
-        group=RAW_UPDATES_GROUP,
-    )
-    client.add_handler(
-        RawUpdateHandler(partial(transcribed_audio_raw_handler, storage=storage)),
-        group=RAW_UPDATES_GROUP,
-    )
+    for account in accounts:
+        account.client.add_handler(
+            RawUpdateHandler(partial(react2ban_raw_reaction_handler, storage=account.storage)),
+            group=RAW_UPDATES_GROUP,
+        )
+        account.client.add_handler(
+            RawUpdateHandler(
+                partial(
+                    transcribed_audio_raw_handler,
+                    storage=account.storage,
+                    peers=account.peers,
+                )
+            ),
+            group=RAW_UPDATES_GROUP,
+        )
 
-    root_commands = CommandsModule(default_prefix=app_config.command_prefix)
+    root_commands = CommandsModule(
+        default_prefix=app_config.command_prefix,
+        lazy=app_config.lazy_commands,
+    )
     root_commands.add_submodule(commands)
 
-    root_hooks = HooksModule(commands=root_commands, storage=storage)
+    root_hooks = HooksModule(
+        commands=root_commands,
+        storage={account.client: account.storage for account in accounts},
+    )
     root_hooks.add_submodule(hooks)
 
     # `HooksModule` must be present before `CommandsModule` because it adds some commands
@@ -129,17 +259,26 @@ def main() -> None:
 
     kwargs_middleware = KwargsMiddleware(
         {
-            "storage": storage,
             "data_dir": storage_config.data_location,
             "notes_chat": app_config.media_notes_chat,
             "github_client": github_client,
             "traceback_chat": app_config.tracebacks_chat,
             "stats": stats,
-            "limits": app_limits,
             "allow_unsafe": app_config.allow_unsafe_commands,
             "wakatime_client": wakatime_client,
         }
     )
+    for account in accounts:
+        kwargs_middleware.set_client_kwargs(
+            account.client,
+            {
+                "storage": account.storage,
+                "command_stats": account.command_stats,
+                "limits": account.app_limits,
+                "peers": account.peers,
+                "scheduler": account.scheduler,
+            },
+        )
     common_middlewares = (kwargs_middleware, translate_middleware)
 
     for module in all_modules:
@@ -148,20 +287,21 @@ def main() -> None:
     root_commands.add_middleware(ParseCommandMiddleware(app_config.command_prefix))
     root_commands.add_middleware(update_command_stats_middleware)
 
+    # Handlers, middleware chains and argument parsers are built once and shared by the clients
     for module in all_modules:
-        module.register(client)
+        module.register(*clients)
 
     job_manager = AsyncJobManager()
 
     _log.debug("Starting bot...")
-    client.run(
+    clients[0].run(
         _main(
-            client=client,
-            storage=storage,
+            accounts=accounts,
             github_client=github_client,
+            hooks=root_hooks,
             job_manager=job_manager,
             stats=stats,
-            app_limits_controller=app_limits,
+            storage_compaction_interval=storage_config.compaction_interval,
         )
     )
 
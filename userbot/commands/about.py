@@ -9,10 +9,12 @@ from .. import __git_commit__
 from ..constants import Icons
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
-from ..storage import Storage
 from ..utils import (
     AppLimitsController,
+    CommandStatsBuffer,
     DialogCount,
+    PeerCache,
+    RequestScheduler,
     StatsController,
     Translation,
     call_subprocess,
@@ -72,10 +74,12 @@ async def about(client: Client, tr: Translation) -> str:
 async def stats_handler(
     client: Client,
     command: CommandObject,
-    storage: Storage,
+    command_stats: CommandStatsBuffer,
     tr: Translation,
     stats: StatsController,
     limits: AppLimitsController,
+    peers: PeerCache,
+    scheduler: RequestScheduler,
 ) -> str:
     """Shows some statistics about this userbot.
 
@@ -123,7 +127,12 @@ async def stats_handler(
 
     top5 = [
         f"• {Icons.DIAGRAM} <code>{cmd}</code>: {count}"
-        async for cmd, count in storage.list_command_usage(limit=5)
+        async for cmd, count in command_stats.list_command_usage(limit=5)
+    ]
+    daily_usage = [count async for __, count in command_stats.list_daily_command_usage(days=7)]
+    top_chats = [
+        f"• {Icons.GROUP_CHAT} <code>{chat_id}</code>: {count}"
+        async for chat_id, count in command_stats.list_chat_command_usage(days=7, limit=3)
     ]
 
     lines = [
@@ -134,10 +143,36 @@ async def stats_handler(
         ),
         _("{icon} Commands used: {count}").format(
             icon=Icons.COMMAND,
-            count=await storage.get_total_command_usage(),
+            count=await command_stats.get_total_command_usage(),
         ),
         *top5,
+        _("{icon} Commands used in the last 7 days: {counts}").format(
+            icon=Icons.DIAGRAM,
+            counts=" → ".join(map(str, daily_usage)),
+        ),
+        *top_chats,
     ]
+    # Users found in the storage are counted as misses of the memory cache
+    peer_stats = peers.stats().values()
+    lookups = sum(kind["hits"] + kind["misses"] for kind in peer_stats)
+    if lookups > 0:
+        hits = sum(kind["hits"] + kind.get("storage_hits", 0) for kind in peer_stats)
+        lines.append(
+            _("{icon} Peer cache hit rate: {rate:.0%} of {lookups} lookups").format(
+                icon=Icons.DIAGRAM,
+                rate=hits / lookups,
+                lookups=lookups,
+            )
+        )
+    scheduler_stats = scheduler.stats()
+    lines.append(
+        _("{icon} API requests: {count}, FloodWaits: {flood_waits}, queued: {queued}").format(
+            icon=Icons.WATCH,
+            count=scheduler_stats["requests"],
+            flood_waits=scheduler_stats["flood_waits"],
+            queued=sum(scheduler_stats["queued"].values()),
+        )
+    )
     if dialogs_count is not None and archived_dialogs_count is not None:
         lines.extend(
             (
@@ -4,14 +4,16 @@ __all__ = [
 ]
 
 import html
-from asyncio import sleep
+import itertools
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Literal, overload
+from functools import partial
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, Literal, overload
 
 from pyrogram import Client, ContinuePropagation
 from pyrogram.enums import ChatMemberStatus, ChatType
 from pyrogram.errors import (
-    FloodWait,
+    RPCError,
     UserAdminInvalid,
     UserAlreadyParticipant,
     UserNotMutualContact,
@@ -19,14 +21,24 @@ from pyrogram.errors import (
     UserPrivacyRestricted,
 )
 from pyrogram.raw import base, functions, types
-from pyrogram.types import ChatPermissions, Message
+from pyrogram.types import ChatPermissions, Message, User
 from pyrogram.utils import get_channel_id, zero_datetime
 
 from ..constants import Icons
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
 from ..storage import Storage
-from ..utils import Translation, gettext, parse_timespec, resolve_users
+from ..utils import (
+    BulkProgress,
+    BulkResult,
+    PeerCache,
+    Translation,
+    gettext,
+    is_my_message,
+    parse_timespec,
+    resolve_users,
+    run_bulk,
+)
 
 _REACT2BAN_TEXT = gettext(
     "<b>⚠⚠⚠ IT'S NOT A JOKE ⚠⚠⚠</b>\n"
@@ -42,6 +54,88 @@ async def _check_can_ban_members(client: Client, chat_id: int) -> bool:
     return self.privileges is not None and self.privileges.can_restrict_members
 
 
+async def _get_users(peers: PeerCache, user_ids: Iterable[int]) -> list[User]:
+    """Gets the users skipping the ones that can't be resolved, e.g. deleted from a user group."""
+    user_ids = list(user_ids)
+    try:
+        return await peers.get_users(user_ids)
+    except (RPCError, KeyError):
+        pass
+    # A single bad ID fails the whole request, so request the users one by one
+    users: list[User] = []
+    for user_id in user_ids:
+        try:
+            users.extend(await peers.get_users((user_id,)))
+        except (RPCError, KeyError):
+            continue
+    return users
+
+
+async def _get_user_links(peers: PeerCache, user_ids: Iterable[int]) -> dict[int, str]:
+    """Returns links to the users. Users that can't be resolved are missing, their IDs are shown
+    instead."""
+    links: dict[int, str] = {}
+    for user in await _get_users(peers, user_ids):
+        info = f"<a href='tg://user?id={user.id}'>{html.escape(user.first_name)}</a>"
+        if user.username is not None:
+            info += f" (@{user.username})"
+        links[user.id] = info
+    return links
+
+
+async def _edit_bulk_progress(
+    message: Message,
+    total: int,
+    tr: Translation,
+    progress: BulkProgress,
+) -> None:
+    _ = tr.gettext
+    await message.edit_text(
+        _("{icon} <i>Processed {done}/{total} users, {failed} failed...</i>").format(
+            icon=Icons.WATCH,
+            done=progress.done,
+            total=total,
+            failed=progress.failed,
+        )
+    )
+
+
+async def _run_bulk_on_users(
+    message: Message,
+    user_ids: Iterable[int],
+    action: Callable[[int], Awaitable[Any]],
+    tr: Translation,
+) -> BulkResult[int]:
+    """Runs `action` for each user concurrently, reporting progress by editing the message."""
+    user_ids = list(user_ids)
+    on_progress = None
+    if is_my_message(message):
+        on_progress = partial(_edit_bulk_progress, message, len(user_ids), tr)
+    return await run_bulk(user_ids, action, on_progress=on_progress)
+
+
+def _format_bulk_failures(
+    result: BulkResult[int],
+    links: dict[int, str],
+    tr: Translation,
+) -> str:
+    """Returns a list of users the action failed for, with the reasons."""
+    if not result.failed:
+        return ""
+    _ = tr.gettext
+    __ = tr.ngettext
+    text = __(
+        "{icon} <b>Failed</b> for {n} user:",
+        "{icon} <b>Failed</b> for {n} users:",
+        len(result.failed),
+    ).format(icon=Icons.WARNING, n=len(result.failed))
+    for user_id, e in result.failed.items():
+        link = links.get(user_id, f"<code>{user_id}</code>")
+        reason = e.ID if isinstance(e, RPCError) else type(e).__name__
+        text += f"\n• {link}: <code>{reason}</code>"
+    return text + "\n"
+
+
 def _parse_restrict_perms(perms: str) -> ChatPermissions:
     """Parses a string of permissions into a ChatPermissions object.
 
@@ -161,6 +255,7 @@ async def restrict_user(
     message: Message,
     command: CommandObject,
     storage: Storage,
+    peers: PeerCache,
     tr: Translation,
 ) -> str:
     """Restricts or bans a user in a chat.
@@ -176,13 +271,15 @@ async def restrict_user(
     "polls", "links", "invite", "pin", "info".
 
     `reason` is an optional argument that will be shown in the ban message.
+
+    Users of a user group are restricted concurrently, users that failed are listed with the error.
     """
     _ = tr.gettext
     user_arg, time, perms_str, reason = command.args
     if user_arg == "reply":
         user_ids = {message.reply_to_message.from_user.id}
     else:
-        user_ids = await resolve_users(client, storage, user_arg)
+        user_ids = await resolve_users(client, storage, user_arg, peers=peers)
     now = message.edit_date or message.date or datetime.now()
     if is_forever := (time in ("0", "forever", None)):
         t = zero_datetime()
@@ -193,24 +290,26 @@ async def restrict_user(
         perms = _parse_restrict_perms(perms_str)
     else:
         perms = None
-    users: list[str] = []
-    for user_id in user_ids:
-        user = await client.get_chat(user_id)
-        info = f"<a href='tg://user?id={user.id}'>{html.escape(user.first_name)}</a>"
-        if user.username is not None:
-            info += f" (@{user.username})"
-        users.append(info)
+    links = await _get_user_links(peers, user_ids)
+
+    async def restrict(user_id: int) -> None:
         if not ban:
             await client.restrict_chat_member(message.chat.id, user_id, perms, t)
         else:
             await client.ban_chat_member(message.chat.id, user_id, t)
-    chat = await client.get_chat(message.chat.id)
-    text = _get_restrict_info(perms, chat.permissions, tr=tr, is_forever=is_forever).format(
-        icon=Icons.PERSON_BLOCK,
-        icon_perms=Icons.LOCK,
-        users=", ".join(users),
-        t=t.astimezone(),
-    )
+
+    result = await _run_bulk_on_users(message, user_ids, restrict, tr)
+    text = ""
+    if result.succeeded:
+        # Not cached, the chat permissions may be changed at any time
+        chat = await client.get_chat(message.chat.id)
+        text += _get_restrict_info(perms, chat.permissions, tr=tr, is_forever=is_forever).format(
+            icon=Icons.PERSON_BLOCK,
+            icon_perms=Icons.LOCK,
+            users=", ".join(links.get(u, f"<code>{u}</code>") for u in result.succeeded),
+            t=t.astimezone(),
+        )
+    text += _format_bulk_failures(result, links, tr)
     if reason:
         text += "\n" + _("<b>Reason:</b> {reason}").format(reason=html.escape(reason))
     return text
@@ -222,33 +321,38 @@ async def chat_unban(
     message: Message,
     command: CommandObject,
     storage: Storage,
+    peers: PeerCache,
     tr: Translation,
 ) -> str:
     """Unbans a user in a chat.
 
     First argument must be a user ID to be banned or literal "reply" to ban the replied user.
+
+    Users of a user group are unbanned concurrently, users that failed are listed with the error.
     """
     _ = tr.gettext
     user_arg = command.args[0]
     if user_arg == "reply":
         user_ids = {message.reply_to_message.from_user.id}
     else:
-        user_ids = await resolve_users(client, storage, user_arg)
-    links: list[str] = []
-    for user_id in user_ids:
-        user = await client.get_chat(user_id)
-        info = f"<a href='tg://user?id={user.id}'>{html.escape(user.first_name)}</a>"
-        if user.username is not None:
-            info += f" (@{user.username})"
-        links.append(info)
-        await client.unban_chat_member(message.chat.id, user_id)
-    return (
-        _("{icon} {user_links} <b>unbanned</b> in this chat").format(
-            icon=Icons.PERSON_TICK,
-            user_links=", ".join(links),
-        )
-        + "\n"
+        user_ids = await resolve_users(client, storage, user_arg, peers=peers)
+    links = await _get_user_links(peers, user_ids)
+    result = await _run_bulk_on_users(
+        message,
+        user_ids,
+        partial(client.unban_chat_member, message.chat.id),
+        tr,
     )
+    text = ""
+    if result.succeeded:
+        text += (
+            _("{icon} {user_links} <b>unbanned</b> in this chat").format(
+                icon=Icons.PERSON_TICK,
+                user_links=", ".join(links.get(u, f"<code>{u}</code>") for u in result.succeeded),
+            )
+            + "\n"
+        )
+    return text + _format_bulk_failures(result, links, tr)
 
 
 @commands.add("promote", usage="<admin_title...>", reply_required=True)
@@ -256,6 +360,7 @@ async def promote(
     client: Client,
     message: Message,
     command: CommandObject,
+    peers: PeerCache,
     tr: Translation,
 ) -> str:
     """Promotes a user to an admin without any rights but with title."""
@@ -264,8 +369,8 @@ async def promote(
     title = command.args[0]
     await client.invoke(
         functions.channels.EditAdmin(
-            channel=await client.resolve_peer(message.chat.id),
-            user_id=await client.resolve_peer(message.reply_to_message.from_user.id),
+            channel=await peers.resolve_peer(message.chat.id),
+            user_id=await peers.resolve_peer(message.reply_to_message.from_user.id),
             admin_rights=types.chat_admin_rights.ChatAdminRights(
                 change_info=False,
                 delete_messages=False,
@@ -326,11 +431,8 @@ async def react2ban_raw_reaction_handler(
                 continue  # ignore, target peer is an admin or client lost the rights to ban anyone
         t += f"\n• <a href='tg://user?id={user_id}'>{name}</a> (#<code>{user_id}</code>)"
     t = "{header}\n\n{footer}".format(header=_(_REACT2BAN_TEXT), footer=t)
-    try:
-        await client.edit_message_text(chat_id, message_id, t)
-    except FloodWait as e:
-        await sleep(e.value + 1)
-        await client.edit_message_text(chat_id, message_id, t)
+    # FloodWait is waited out by the request scheduler
+    await client.edit_message_text(chat_id, message_id, t)
 
 
 @commands.add("react2ban", handle_edits=False)
@@ -449,52 +551,214 @@ async def s_pin(
     await message.delete()
 
 
+class _MemberSweep:
+    """Pages members of a chat for `chatcleardel`, keeping track of the offset to resume from.
+
+    Kicked members shift the following ones. The offset of each page is lowered by the number of
+    members kicked since the previous page and the number of Deleted Accounts being kicked, as
+    they may be removed while the page is requested. Members may be returned twice then, they're
+    skipped.
+    """
+
+    def __init__(self, client: Client, chat_id: int, peer: base.InputPeer, offset: int = 0) -> None:
+        self._client = client
+        self._chat_id = chat_id
+        self._peer = peer
+        # Offset after the last page plus the number of members kicked before it was requested
+        self._end = offset
+        self._kicked = 0
+        # Deleted Accounts being kicked
+        self._pending = 0
+        # Pages with unfinished members: page number -> [offset, members kicked before it, number
+        # of unfinished members]
+        self._pages: dict[int, list[int]] = {}
+        self._seen: set[int] = set()
+
+    def _offset_since(self, offset: int, kicked: int) -> int:
+        """Lowest possible offset of a member which offset was `offset` when `kicked` members were
+        kicked."""
+        return max(0, offset - (self._kicked - kicked) - self._pending)
+
+    @property
+    def checkpoint(self) -> int:
+        """Offset to resume from, members before it are all done."""
+        return min(
+            (self._offset_since(offset, kicked) for offset, kicked, __ in self._pages.values()),
+            default=self._offset_since(self._end, 0),
+        )
+
+    def deleted_done(self, kicked: bool) -> None:
+        """Marks a Deleted Account as kicked or staying in the chat, e.g. when it's an admin."""
+        self._pending -= 1
+        if kicked:
+            self._kicked += 1
+
+    def member_done(self, page: int) -> None:
+        self._pages[page][2] -= 1
+        if self._pages[page][2] == 0:
+            del self._pages[page]
+
+    async def _fetch_page(self, offset: int) -> list[tuple[int, bool]]:
+        if isinstance(self._peer, types.InputPeerChat):
+            if self._end > 0:
+                return []  # basic groups are returned at once
+            return [
+                (member.user.id, bool(member.user.is_deleted))
+                async for member in self._client.get_chat_members(self._chat_id)
+            ]
+        r: types.channels.ChannelParticipants = await self._client.invoke(
+            functions.channels.GetParticipants(
+                channel=self._peer,
+                filter=types.ChannelParticipantsSearch(q=""),
+                offset=offset,
+                limit=200,
+                hash=0,
+            )
+        )
+        users = {user.id: user for user in r.users}
+        return [
+            (p.user_id, bool(users[p.user_id].deleted))
+            for p in r.participants
+            if getattr(p, "user_id", None) in users
+        ]
+
+    async def members(self) -> AsyncIterable[tuple[int, int, bool]]:
+        """Yields page numbers, IDs of members and whether their accounts are deleted."""
+        for page_number in itertools.count():
+            kicked = self._kicked
+            offset = self._offset_since(self._end, 0)
+            page = await self._fetch_page(offset)
+            if not page:
+                return
+            self._end = offset + len(page) + kicked
+            new = [(user_id, deleted) for user_id, deleted in page if user_id not in self._seen]
+            if not new:
+                continue
+            self._pages[page_number] = [offset, kicked, len(new)]
+            for user_id, deleted in new:
+                self._seen.add(user_id)
+                if deleted:
+                    self._pending += 1
+                yield page_number, user_id, deleted
+
+
+async def _report_sweep_progress(
+    message: Message,
+    sweep: _MemberSweep,
+    storage: Storage,
+    checkpoint_name: str | None,
+    stats: Counter[str],
+    tr: Translation,
+    progress: BulkProgress,
+) -> None:
+    _ = tr.gettext
+    if checkpoint_name is not None:
+        await storage.save_checkpoint(checkpoint_name, sweep.checkpoint)
+    if is_my_message(message):
+        await message.edit_text(
+            _(
+                "{icon} <i>Checked {total} members, found {deleted} Deleted Accounts, kicked"
+                " {kicked}...</i>"
+            ).format(
+                icon=Icons.WATCH,
+                total=progress.done,
+                deleted=stats["deleted"],
+                kicked=stats["kicked"],
+            )
+        )
+
+
 @commands.add(
     "chatcleardel",
+    usage="['dry'|'resume']",
     waiting_message=gettext("<i>Clearing Deleted Accounts...</i>"),
     timeout=1800,
 )
 async def kick_deleted_accounts(
     client: Client,
     message: Message,
+    command: CommandObject,
+    storage: Storage,
     tr: Translation,
 ) -> str:
-    """Kicks Deleted Accounts from the chat."""
+    """Kicks Deleted Accounts from the chat.
+
+    Members are checked page by page while the Deleted Accounts found are kicked concurrently.
+
+    If 'dry' is passed, Deleted Accounts are only counted. If 'resume' is passed, the check
+    continues from where the previous one stopped, e.g. when it timed out or the userbot was
+    restarted.
+    """
     _ = tr.gettext
     __ = tr.ngettext
     chat_id = message.chat.id
     if chat_id > 0:
         return _("{icon} Not a group chat").format(icon=Icons.STOP)
-    if not await _check_can_ban_members(client, chat_id):
+    dry_run = command.args[0] == "dry"
+    if not dry_run and not await _check_can_ban_members(client, chat_id):
         return _("{icon} Cannot ban users in the chat").format(icon=Icons.STOP)
-    kicked = 0
-    failed = 0
-    total = 0
-    async for member in client.get_chat_members(chat_id):
-        total += 1
-        if not member.user.is_deleted:
-            continue
-        try:
-            await client.ban_chat_member(
-                chat_id,
-                member.user.id,
-                datetime.now() + timedelta(minutes=1),
-            )
-        except UserAdminInvalid:
-            # Target user is an admin or client lost the rights to ban anyone
-            failed += 1
-            continue
-        else:
-            kicked += 1
-    kicked_text = _("<b>Kicked</b> Deleted Accounts: <i>{n}/{total_deleted}</i>").format(
-        n=kicked,
-        total_deleted=kicked + failed,
+    peer = await client.resolve_peer(chat_id)
+    checkpoint_name = None
+    if not dry_run and not isinstance(peer, types.InputPeerChat):
+        # Members of basic groups are returned at once, there's nothing to resume
+        checkpoint_name = f"chatcleardel:{chat_id}"
+    offset = 0
+    if command.args[0] == "resume" and checkpoint_name is not None:
+        offset = await storage.get_checkpoint(checkpoint_name) or 0
+    sweep = _MemberSweep(client, chat_id, peer, offset)
+    stats: Counter[str] = Counter()
+
+    async def check(member: tuple[int, int, bool]) -> None:
+        page, user_id, deleted = member
+        if deleted:
+            stats["deleted"] += 1
+            # A member isn't done when the check is cancelled, so it's checked again on resume
+            try:
+                if not dry_run:
+                    await client.ban_chat_member(
+                        chat_id, user_id, datetime.now() + timedelta(minutes=1)
+                    )
+            except Exception:
+                sweep.deleted_done(False)
+                sweep.member_done(page)
+                raise
+            if not dry_run:
+                stats["kicked"] += 1
+            sweep.deleted_done(not dry_run)
+        sweep.member_done(page)
+
+    on_progress = partial(
+        _report_sweep_progress,
+        message,
+        sweep,
+        storage,
+        checkpoint_name,
+        stats,
+        tr,
     )
+    try:
+        result = await run_bulk(sweep.members(), check, on_progress=on_progress)
+    except BaseException:
+        # Timed out or failed to get members, let it be resumed
+        if checkpoint_name is not None:
+            await storage.save_checkpoint(checkpoint_name, sweep.checkpoint)
+        raise
+    if checkpoint_name is not None:
+        await storage.delete_checkpoint(checkpoint_name)
+    total = len(result.succeeded) + len(result.failed)
     total_checked_text = __(
         "<i>({n} member checked)</i>",
         "<i>({n} members checked)</i>",
         total,
     ).format(n=total)
+    if dry_run:
+        found_text = _("<b>Found</b> Deleted Accounts: <i>{n}</i>").format(n=stats["deleted"])
+        return f"{Icons.PERSON_BLOCK} {found_text} {total_checked_text}"
+    # Deleted Accounts not kicked are admins, or the client lost the rights to ban anyone
+    kicked_text = _("<b>Kicked</b> Deleted Accounts: <i>{n}/{total_deleted}</i>").format(
+        n=stats["kicked"],
+        total_deleted=stats["deleted"],
+    )
     return f"{Icons.PERSON_BLOCK} {kicked_text} {total_checked_text}"
 
 
@@ -504,6 +768,7 @@ async def invite_to_chat(
     message: Message,
     command: CommandObject,
     storage: Storage,
+    peers: PeerCache,
     tr: Translation,
 ) -> None:
     """Invites users to the current chat.
@@ -512,7 +777,7 @@ async def invite_to_chat(
     """
     _ = tr.gettext
     value = command.args[0]
-    users = await resolve_users(client, storage, value)
+    users = await resolve_users(client, storage, value, peers=peers)
     if message.chat.type == ChatType.GROUP:
         for user in users:
             try:
@@ -534,7 +799,7 @@ async def invite_to_chat(
         if message.chat.type == ChatType.GROUP:
             full_chat: types.messages.ChatFull = await client.invoke(
                 functions.messages.GetFullChat(
-                    chat_id=(await client.resolve_peer(message.chat.id)).chat_id,
+                    chat_id=(await peers.resolve_peer(message.chat.id)).chat_id,
                 )
             )
             members = set(p.user_id for p in full_chat.full_chat.participants.participants)
@@ -544,12 +809,13 @@ async def invite_to_chat(
                 else:
                     added.add(user)
         else:
+            channel = await peers.resolve_peer(message.chat.id)
             for user in users:
                 try:
                     participant: types.channels.ChannelParticipant = await client.invoke(
                         functions.channels.GetParticipant(
-                            channel=await client.resolve_peer(message.chat.id),
-                            participant=await client.resolve_peer(user),
+                            channel=channel,
+                            participant=await peers.resolve_peer(user),
                         )
                     )
                 except UserNotParticipant:
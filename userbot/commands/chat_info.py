@@ -14,7 +14,7 @@ from pyrogram.types import Message
 from ..constants import Icons
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
-from ..utils import Translation
+from ..utils import PeerCache, Translation
 
 commands = CommandsModule("Chat info")
 
@@ -49,10 +49,10 @@ async def _set_random_chat_photo(chat_id: int, client: Client) -> Message:
         raise RuntimeError("Retries exceeded")
 
 
-async def _set_random_chat_title(chat_id: int, client: Client) -> Message:
+async def _set_random_chat_title(chat_id: int, client: Client, peers: PeerCache) -> Message:
     """Sets a random chat title."""
     retries = 50
-    chat = await client.get_chat(chat_id)
+    chat = await peers.get_chat(chat_id)
     title_prefix = chat.title.split(" — ")[0]
     while retries >= 0:
         message = await _get_random_message(chat_id, MessagesFilter.EMPTY, client)
@@ -61,6 +61,7 @@ async def _set_random_chat_title(chat_id: int, client: Client) -> Message:
                 continue
             stripped_text = message.text[: 128 - len(title_prefix) - 3]
             await client.set_chat_title(chat_id, f"{title_prefix} — {stripped_text}")
+            peers.invalidate(chat_id)
         except BadRequest as e:
             _log.warning(
                 "An error occurred while setting the chat title in %d",
@@ -81,6 +82,7 @@ async def random_chat_info(
     client: Client,
     message: Message,
     command: CommandObject,
+    peers: PeerCache,
     tr: Translation,
 ) -> str:
     """Sets random chat photo and/or title.
@@ -92,12 +94,13 @@ async def random_chat_info(
     what = command.args[0]
     if what == "photo" or what is None:
         msg = await _set_random_chat_photo(message.chat.id, client)
+        peers.invalidate(message.chat.id)
         text += _(
             "{icon} <b>New chat avatar was set!</b> <a href='{msg_link}'>Source</a>\n"
         ).format(icon=Icons.PICTURE, msg_link=msg.link)
         await sleep(0.1)
     if what == "title" or what is None:
-        msg = await _set_random_chat_title(message.chat.id, client)
+        msg = await _set_random_chat_title(message.chat.id, client, peers)
         text += _("{icon} <b>New chat title was set!</b> <a href='{msg_link}'>Source</a>").format(
             icon=Icons.PENCIL, msg_link=msg.link
         )
@@ -4,7 +4,6 @@ __all__ = [
 
 from io import BytesIO
 
-from PIL import Image
 from pyrogram import Client
 from pyrogram.types import Message
 
@@ -12,7 +11,9 @@ from ..constants import Icons
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
 from ..storage import Storage
-from ..utils import Translation, resolve_users
+from ..utils import PeerCache, Translation, lazy_import, resolve_users
+
+Image = lazy_import("PIL.Image")
 
 commands = CommandsModule("Colors")
 
@@ -58,6 +59,7 @@ async def user_color(
     message: Message,
     command: CommandObject,
     storage: Storage,
+    peers: PeerCache,
     reply: Message,
     tr: Translation,
 ) -> None:
@@ -65,7 +67,7 @@ async def user_color(
     _ = tr.gettext
     user = command.args[0]
     if user is not None:
-        user_ids = await resolve_users(client, storage, user)
+        user_ids = await resolve_users(client, storage, user, peers=peers)
         if len(user_ids) == 0:
             return _("{icon} No users were specified").format(icon=Icons.STOP)
         if len(user_ids) > 1:
@@ -8,7 +8,6 @@ from os import path
 from tempfile import NamedTemporaryFile
 from typing import BinaryIO
 
-from PIL import Image
 from pyrogram import Client, ContinuePropagation
 from pyrogram.errors import ReactionInvalid
 from pyrogram.raw import base, types
@@ -19,9 +18,11 @@ from ..constants import Icons
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
 from ..storage import Storage
-from ..utils import Translation, call_subprocess, gettext, react
+from ..utils import PeerCache, Translation, call_subprocess, gettext, lazy_import, react
 from ..utils.premium import transcribe_message
 
+Image = lazy_import("PIL.Image")
+
 commands = CommandsModule("Content converters")
 
 
@@ -147,13 +148,14 @@ async def speech_to_text(
     message: Message,
     reply: Message,
     storage: Storage,
+    peers: PeerCache,
     tr: Translation,
 ) -> str | None:
     """Transcribes speech in voice and video messages to text."""
     _ = tr.gettext
     if reply.video_note is None and reply.voice is None:
         return _("{icon} No voice or video note found").format(icon=Icons.STOP)
-    result = await transcribe_message(client, reply)
+    result = await transcribe_message(client, reply, peers=peers)
     if result is None:
         return _(
             "{icon} <i>Transcription failed, maybe the message has no recognizable voice?</i>"
@@ -172,6 +174,7 @@ async def transcribed_audio_raw_handler(
     update: base.Update,
     *___: dict[int, types.User | types.Chat | types.Channel],
     storage: Storage,
+    peers: PeerCache,
 ) -> None:
     if not isinstance(update, types.UpdateTranscribedAudio) or update.pending:
         raise ContinuePropagation()
@@ -210,7 +213,7 @@ async def transcribed_audio_raw_handler(
                 reply_to_message_id=-msg_id,
             )
         try:
-            await react(client, chat_id, -msg_id, None)
+            await react(client, chat_id, -msg_id, None, peers=peers)
         except ReactionInvalid:
             pass
     else:
@@ -2,43 +2,52 @@ __all__ = [
     "commands",
 ]
 
-import d20
-from d20 import SimpleStringifier
+import functools
 
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
+from ..utils import lazy_import
+
+# d20 builds its parser on import, which takes a noticeable time, so load it on the first roll
+d20 = lazy_import("d20")
 
 commands = CommandsModule("Dice")
 
 
-class _HTMLDiceStringifier(SimpleStringifier):
-    def __init__(self):
-        super().__init__()
-        self._in_dropped = False
+@functools.cache
+def _html_dice_stringifier_class() -> type:
+    """Creates the stringifier class. It's done on demand as its base class is in d20."""
 
-    def stringify(self, the_roll):
-        self._in_dropped = False
-        return super().stringify(the_roll)
+    class _HTMLDiceStringifier(d20.SimpleStringifier):
+        def __init__(self):
+            super().__init__()
+            self._in_dropped = False
 
-    def _stringify(self, node):
-        if not node.kept and not self._in_dropped:
-            self._in_dropped = True
-            inside = super()._stringify(node)
+        def stringify(self, the_roll):
             self._in_dropped = False
-            return f"<s>{inside}</s>"
-        return super()._stringify(node)
+            return super().stringify(the_roll)
+
+        def _stringify(self, node):
+            if not node.kept and not self._in_dropped:
+                self._in_dropped = True
+                inside = super()._stringify(node)
+                self._in_dropped = False
+                return f"<s>{inside}</s>"
+            return super()._stringify(node)
+
+        def _str_expression(self, node):
+            return f"{self._stringify(node.roll)} = <code>{int(node.total)}</code>"
 
-    def _str_expression(self, node):
-        return f"{self._stringify(node.roll)} = <code>{int(node.total)}</code>"
+        def _str_die(self, node):
+            the_rolls = []
+            for val in node.values:
+                inside = self._stringify(val)
+                if val.number == 1 or val.number == node.size:
+                    inside = f"<b>{inside}</b>"
+                the_rolls.append(inside)
+            return ", ".join(the_rolls)
 
-    def _str_die(self, node):
-        the_rolls = []
-        for val in node.values:
-            inside = self._stringify(val)
-            if val.number == 1 or val.number == node.size:
-                inside = f"<b>{inside}</b>"
-            the_rolls.append(inside)
-        return ", ".join(the_rolls)
+    return _HTMLDiceStringifier
 
 
 @commands.add("roll", "dice", usage="<dice_spec...>")
@@ -47,4 +56,4 @@ async def dice(command: CommandObject) -> str:
 
     More: https://github.com/avrae/d20#dice-syntax.
     """
-    return f"🎲 {d20.roll(command.args[0], stringifier=_HTMLDiceStringifier())}"
+    return f"🎲 {d20.roll(command.args[0], stringifier=_html_dice_stringifier_class()())}"
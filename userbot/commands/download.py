@@ -4,8 +4,6 @@ __all__ = [
 
 from pathlib import Path
 
-import aiofiles
-import magic
 from pyrogram import Client
 from pyrogram.enums import MessageMediaType
 from pyrogram.types import Message
@@ -13,7 +11,10 @@ from pyrogram.types import Message
 from ..constants import Icons
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
-from ..utils import Translation, gettext
+from ..utils import Translation, gettext, lazy_import
+
+aiofiles = lazy_import("aiofiles")
+magic = lazy_import("magic")
 
 _CHUNK_SIZE = 1048576 * 4  # 4 MiB
 
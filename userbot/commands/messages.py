@@ -15,7 +15,7 @@ from pyrogram.types import Message
 from ..constants import Icons
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
-from ..utils import Translation, gettext
+from ..utils import PeerCache, Translation, gettext
 
 commands = CommandsModule("Messages")
 
@@ -74,6 +74,7 @@ async def user_first_message(
     client: Client,
     message: Message,
     reply: Message | None,
+    peers: PeerCache,
     tr: Translation,
 ) -> str | None:
     """Looks for the user's very first message in the chat."""
@@ -81,8 +82,8 @@ async def user_first_message(
     msg = reply if reply is not None else message
     if (user := msg.from_user) is None:
         return _("{icon} Cannot search for first message from channel").format(icon=Icons.WARNING)
-    chat_peer = await client.resolve_peer(message.chat.id)
-    user_peer = await client.resolve_peer(user.id)
+    chat_peer = await peers.resolve_peer(message.chat.id)
+    user_peer = await peers.resolve_peer(user.id)
     first_msg_raw = None
     while True:
         # It's rather slow, but it works properly
@@ -101,7 +102,6 @@ async def user_first_message(
                 from_id=user_peer,
                 hash=0,
             ),
-            sleep_threshold=60,
         )
         prev_max_id = first_msg_raw.id if first_msg_raw else 0
         for m in messages.messages:
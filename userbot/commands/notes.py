@@ -89,8 +89,7 @@ async def saved_notes(storage: Storage, tr: Translation) -> str:
     """Shows all saved notes."""
     _ = tr.gettext
     t = ""
-    async for key in storage.saved_notes():
-        __, type_ = await storage.get_note(key)
+    async for key, type_ in storage.list_notes():
         t += f"• <code>{key}</code> ({type_})\n"
     return _("{icon} <b>Saved notes:</b>\n{t}").format(icon=Icons.BOOKMARK, t=t)
 
@@ -13,7 +13,7 @@ from pyrogram.types import Message
 from ..constants import Icons
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
-from ..utils import Translation
+from ..utils import PeerCache, Translation
 
 commands = CommandsModule("Reactions")
 _log = logging.getLogger(__name__)
@@ -37,11 +37,12 @@ async def get_reactions(
     client: Client,
     message: Message,
     reply: Message,
+    peers: PeerCache,
     tr: Translation,
 ) -> str:
     """Gets message reactions with users who reacted to it."""
     _ = tr.gettext
-    chat_peer = await client.resolve_peer(message.chat.id)
+    chat_peer = await peers.resolve_peer(message.chat.id)
     t = ""
     try:
         messages: types.messages.MessageReactionsList = await client.invoke(
@@ -91,6 +92,7 @@ async def get_reactions(
 @commands.add("rr", reply_required=True)
 async def put_random_reaction(client: Client, message: Message, reply: Message) -> None:
     """Reacts to a message with a random available emoji."""
+    # Not cached, available reactions may be changed at any time
     chat = await client.get_chat(message.chat.id)
     await reply.react(random.choice(chat.available_reactions))
     await message.delete()
@@ -9,11 +9,11 @@ from pyrogram import Client
 from pyrogram.raw import functions, types
 from pyrogram.types import Message
 
-from ..constants import LONGCAT, PACK_ALIASES
+from ..constants import LONGCAT, PACK_ALIASES, Icons
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
 from ..storage import Storage
-from ..utils import StickerInfo, gettext
+from ..utils import PeerCache, StickerInfo, Translation, gettext
 
 commands = CommandsModule("Stickers")
 
@@ -43,17 +43,22 @@ async def random_sticker(
     message: Message,
     command: CommandObject,
     storage: Storage,
-) -> None:
+    peers: PeerCache,
+    tr: Translation,
+) -> str | None:
     """Sends random sticker from specified pack or one matching specified emoji."""
+    _ = tr.gettext
     arg = command.args[0]
     if not arg.isalnum():
         # assume it's an emoji
-        cache = await storage.get_sticker_cache()
-        if len(cache) == 0:
+        stickers = await storage.get_cached_stickers(arg)
+        if stickers is None:
             # Background job may be already running, wait for it to finish
-            cache = await storage.wait_sticker_cache()
-        # \uFE0F is a variation selector, it's not needed for matching
-        sticker: StickerInfo = random.choice(cache[arg.rstrip(" \n\uFE0F")])
+            await storage.wait_sticker_cache()
+            stickers = await storage.get_cached_stickers(arg)
+        if not stickers:
+            return _("{icon} No stickers found").format(icon=Icons.STOP)
+        sticker: StickerInfo = random.choice(stickers)
         input_sticker = types.InputDocument(
             id=sticker["id"],
             access_hash=sticker["access_hash"],
@@ -78,7 +83,7 @@ async def random_sticker(
         )
     await client.invoke(
         functions.messages.SendMedia(
-            peer=await client.resolve_peer(message.chat.id),
+            peer=await peers.resolve_peer(message.chat.id),
             media=types.InputMediaDocument(id=input_sticker),
             message="",
             random_id=random.randint(0, 2**63),
@@ -19,7 +19,7 @@ from ..constants import Icons
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
 from ..storage import Storage
-from ..utils import Translation, resolve_users
+from ..utils import PeerCache, Translation, resolve_users
 
 commands = CommandsModule("Tools")
 
@@ -158,6 +158,7 @@ async def ping_user_group(
     message: Message,
     command: CommandObject,
     storage: Storage,
+    peers: PeerCache,
     tr: Translation,
 ) -> None:
     """Pings a user group with optional text."""
@@ -165,13 +166,13 @@ async def ping_user_group(
     user_group = command.args["user_group"]
     text = command.args["text"]
     res = ""
-    users = list(await resolve_users(client, storage, user_group))  # Pyrogram doesn't like sets
+    users = await resolve_users(client, storage, user_group, peers=peers)
     if len(users) == 0:
         return _("{icon} No users in <code>{user_group}</code>").format(
             icon=Icons.WARNING,
             user_group=user_group,
         )
-    for user in await client.get_users(users):
+    for user in await peers.get_users(users):
         if user.username is not None:
             res += f"@{user.username}"
         else:
@@ -13,7 +13,7 @@ from ..constants import Icons
 from ..meta.modules import CommandsModule
 from ..middlewares import CommandObject
 from ..storage import Storage
-from ..utils import Translation, resolve_users
+from ..utils import PeerCache, Translation, resolve_users
 
 commands = CommandsModule("User groups")
 
@@ -27,6 +27,7 @@ async def _resolve_users(
     client: Client,
     ids: list[str],
     storage: Storage,
+    peers: PeerCache,
     tr: Translation,
 ) -> _ResolveResult:
     if len(ids) == 0:
@@ -36,7 +37,13 @@ async def _resolve_users(
     errors: list[str] = []
     for chat_id in ids:
         try:
-            user_ids = await resolve_users(client, storage, chat_id, resolve_ids=True)
+            user_ids = await resolve_users(
+                client,
+                storage,
+                chat_id,
+                resolve_ids=True,
+                peers=peers,
+            )
         except PeerIdInvalid:
             errors.append(_("{chat_id}: Cannot resolve peer").format(chat_id=chat_id))
             continue
@@ -61,6 +68,7 @@ async def group_add(
     command: CommandObject,
     reply: Message | None,
     storage: Storage,
+    peers: PeerCache,
     tr: Translation,
 ) -> str:
     """Adds a user to the user group for later use with user resolving.
@@ -74,7 +82,7 @@ async def group_add(
     if len(users) == 0:
         user_ids = [reply.from_user.id]
     else:
-        user_ids, errors = await _resolve_users(client, users, storage, tr)
+        user_ids, errors = await _resolve_users(client, users, storage, peers, tr)
     await storage.add_users_to_group(user_ids, group_name)
     t = __(
         "{icon} Added {count} user to user group {group_name}",
@@ -102,6 +110,7 @@ async def group_del(
     command: CommandObject,
     reply: Message | None,
     storage: Storage,
+    peers: PeerCache,
     tr: Translation,
 ) -> str:
     """Removes a user from the user group."""
@@ -112,7 +121,7 @@ async def group_del(
     if len(users) == 0:
         user_ids = [reply.from_user.id]
     else:
-        user_ids, errors = await _resolve_users(client, users, storage, tr)
+        user_ids, errors = await _resolve_users(client, users, storage, peers, tr)
     await storage.remove_users_from_group(user_ids, group_name)
     t = __(
         "{icon} Removed {count} user from user group {group_name}",
@@ -135,6 +144,7 @@ async def group_list(
     client: Client,
     command: CommandObject,
     storage: Storage,
+    peers: PeerCache,
     tr: Translation,
 ) -> str:
     """Lists the users in the user group.
@@ -148,7 +158,7 @@ async def group_list(
     users: list[int] = [x async for x in storage.list_users_in_group(group_name)]
     t = _("{icon} Users in user group {key}:").format(icon=Icons.GROUP_CHAT, key=group_name)
     if resolve:
-        for user in await client.get_users(users):
+        for user in await peers.get_users(users):
             username = f"@{user.username}" if user.username is not None else None
             t += f"\n• {user.mention(username, style=ParseMode.HTML)} (<code>{user.id}</code>)"
     else:
@@ -137,8 +137,18 @@ class TelegramConfig:
 class StorageConfig:
     session_name: str
     data_location: Path
+    backend: str = "redis"
+    compaction_interval: int = 60 * 60
+    extra_session_names: tuple[str, ...] = ()
 
     def __post_init__(self) -> None:
+        sessions = (self.session_name, *self.extra_session_names)
+        if len(set(sessions)) != len(sessions):
+            raise ValueError("Session names must be unique")
+        if self.backend not in ("redis", "sqlite"):
+            raise ValueError(f"Unknown storage backend: {self.backend!r}")
+        if self.compaction_interval <= 0:
+            raise ValueError("`compaction_interval` must be positive")
         resolved_data_location = self.data_location.resolve()
         # non-existent data location is ok, it will be created later
         if resolved_data_location.exists() and not resolved_data_location.is_dir():
@@ -153,6 +163,17 @@ class StorageConfig:
         return cls(
             session_name=_get_env_value("SESSION"),
             data_location=Path(_get_env_value("DATA_LOCATION", default="/data")),
+            backend=_get_env_value("STORAGE_BACKEND", default=cls.backend).lower(),
+            compaction_interval=_get_env_value(
+                "STORAGE_COMPACTION_INTERVAL",
+                int,
+                default=cls.compaction_interval,
+            ),
+            extra_session_names=tuple(
+                name.strip()
+                for name in _get_env_value("EXTRA_SESSIONS", default="").split(",")
+                if name.strip()
+            ),
         )
 
 
@@ -162,6 +183,7 @@ class RedisConfig:
     port: int = 6379
     db: int = 0
     password: SecretValue[str] | None = None
+    client_cache_size: int = 0
 
     @classmethod
     def from_env(cls) -> RedisConfig:
@@ -172,6 +194,11 @@ class RedisConfig:
             port=_get_env_value("REDIS_PORT", int, default=cls.port),
             db=_get_env_value("REDIS_DB", int, default=cls.db),
             password=None if password is None else SecretValue(password),
+            client_cache_size=_get_env_value(
+                "REDIS_CLIENT_CACHE_SIZE",
+                int,
+                default=cls.client_cache_size,
+            ),
         )
 
 
@@ -182,10 +209,23 @@ class AppConfig:
     media_notes_chat: int | str
     tracebacks_chat: int | str | None
     allow_unsafe_commands: bool
+    lazy_commands: bool
+    command_stats_flush_interval: int
+    peer_cache_ttl: int
+    persist_peer_cache: bool
+    api_method_rate: float
+    api_chat_rate: float
+    max_flood_wait: int
 
     def __post_init__(self) -> None:
         if len(self.command_prefix) != 1:
             raise ValueError("`command_prefix` must be a single character")
+        if self.command_stats_flush_interval <= 0:
+            raise ValueError("`command_stats_flush_interval` must be positive")
+        if self.peer_cache_ttl <= 0:
+            raise ValueError("`peer_cache_ttl` must be positive")
+        if self.api_method_rate <= 0 or self.api_chat_rate <= 0:
+            raise ValueError("`api_method_rate` and `api_chat_rate` must be positive")
 
     @classmethod
     def from_env(cls) -> AppConfig:
@@ -196,6 +236,17 @@ class AppConfig:
             media_notes_chat=_get_env_value("MEDIA_NOTES_CHAT", default="self"),
             tracebacks_chat=_get_env_value("TRACEBACK_CHAT", default=None),
             allow_unsafe_commands=_get_env_value("ALLOW_UNSAFE_COMMANDS", bool, default=True),
+            lazy_commands=_get_env_value("LAZY_COMMANDS", bool, default=False),
+            command_stats_flush_interval=_get_env_value(
+                "COMMAND_STATS_FLUSH_INTERVAL",
+                int,
+                default=30,
+            ),
+            peer_cache_ttl=_get_env_value("PEER_CACHE_TTL", int, default=600),
+            persist_peer_cache=_get_env_value("PERSIST_PEER_CACHE", bool, default=False),
+            api_method_rate=_get_env_value("API_METHOD_RATE", float, default=30),
+            api_chat_rate=_get_env_value("API_CHAT_RATE", float, default=20),
+            max_flood_wait=_get_env_value("MAX_FLOOD_WAIT", int, default=120),
         )
 
 
@@ -21,7 +21,7 @@ from .constants import (
 )
 from .meta.modules import HooksModule
 from .storage import Storage
-from .utils import StickerFilter, Translation, react
+from .utils import PeerCache, StickerFilter, Translation, react
 from .utils.premium import transcribe_message
 
 hooks = HooksModule()
@@ -66,18 +66,25 @@ async def on_voice_or_video(
     client: Client,
     message: Message,
     storage: Storage,
+    peers: PeerCache,
     tr: Translation,
 ) -> None:
     _ = tr.gettext
-    result = await transcribe_message(client, message)
+    result = await transcribe_message(client, message, peers=peers)
     if result is None:
         return
     if isinstance(result, int):
         try:
-            await react(client, message.chat.id, message.id, Icons.SPEECH_TO_TEXT.document_id)
+            await react(
+                client,
+                message.chat.id,
+                message.id,
+                Icons.SPEECH_TO_TEXT.document_id,
+                peers=peers,
+            )
         except ReactionInvalid:
             try:
-                await react(client, message.chat.id, message.id, "✍")
+                await react(client, message.chat.id, message.id, "✍", peers=peers)
             except ReactionInvalid:
                 await client.send_chat_action(message.chat.id, ChatAction.TYPING)
         # Using negative value to show that message is not from me
@@ -1,11 +1,24 @@
+from __future__ import annotations
+
 __all__ = [
+    "ArgT",
+    "ArgsMatcher",
+    "ParsedArgsT",
+    "create_args_parser",
     "create_args_parser_grammar",
 ]
 
-from typing import NamedTuple
+import logging
+from typing import TYPE_CHECKING, Literal, NamedTuple, TypeAlias
 
+from ..utils.misc import lazy_import
 from .usage_parser import Argument, LiteralArgumentVariant, Usage, VariableArgumentVariant
 
+if TYPE_CHECKING:
+    from lark import Lark
+
+lark = lazy_import("lark")
+
 
 class _Rule(NamedTuple):
     name: str
@@ -15,6 +28,13 @@ class _Rule(NamedTuple):
         return f"{self.name}: {self.definition}"
 
 
+ArgT: TypeAlias = str | tuple[str, ...]
+ParsedArgsT: TypeAlias = tuple[dict[str, ArgT | None], tuple[ArgT | None, ...]]
+
+_log = logging.getLogger(__name__)
+
+_LARK_OPTIONS = {"maybe_placeholders": False}
+
 _SINGLE_ARG_RULE = _Rule(name="SINGLE_ARG", definition="/[^ ]+/")
 _REST_ARG_RULE = _Rule(name="REST_ARG", definition="/.+$/s")
 
@@ -72,3 +92,140 @@ def create_args_parser_grammar(usage: Usage) -> str:
     full_start_rule = _Rule(name="?start", definition=" | ".join(start_rules))
     rules[full_start_rule.name] = full_start_rule
     return "\n".join(map(str, rules.values()))
+
+
+def _is_lalr_compatible(usage: Usage) -> bool:
+    """Checks whether LALR parser will produce the same trees as Earley one for the usage.
+
+    Contextual lexer used by LALR parser cannot backtrack, so it must never choose between
+    a literal and a variable at the same position (e.g. `'all'` and `[^ ]+` both match "all").
+    Different usage variants may also have the same prefix, which is ambiguous for LALR.
+    """
+    if len(usage.variants) != 1:
+        return False
+    for arg in usage.variants[0].args:
+        literals = [isinstance(v, LiteralArgumentVariant) for v in arg.variants]
+        if any(literals) and not all(literals):
+            return False
+    return True
+
+
+def create_args_parser(usage: Usage) -> Lark:
+    """Creates the arguments parser for the usage, using LALR parser wherever possible."""
+    grammar = create_args_parser_grammar(usage)
+    if _is_lalr_compatible(usage):
+        try:
+            return lark.Lark(grammar, parser="lalr", **_LARK_OPTIONS)
+        except lark.GrammarError:
+            _log.debug("Grammar is not LALR(1), falling back to Earley:\n%s", grammar)
+    return lark.Lark(grammar, **_LARK_OPTIONS)
+
+
+class _ArgPlan(NamedTuple):
+    kind: Literal["single", "rest", "repeat"]
+    required: bool
+    # literal value -> (key, value) to put into the parsed arguments
+    literals: dict[str, tuple[str, str]]
+    # key for the variable value, `None` if the argument has no variables
+    key: str | None
+    # variable names that get the same value as the `key` (aliases)
+    names: tuple[str, ...]
+
+    @classmethod
+    def from_argument(cls, arg: Argument, *, arg_n: int) -> "_ArgPlan":
+        literals: dict[str, tuple[str, str]] = {}
+        names: list[str] = []
+        kind = "repeat" if arg.repeat else "single"
+        for i, arg_variant in enumerate(arg.variants):
+            if isinstance(arg_variant, LiteralArgumentVariant):
+                literals.setdefault(
+                    str(arg_variant.value), (f"_literal0_{arg_n}_{i}", arg_variant.value)
+                )
+            else:
+                names.append(str(arg_variant.name))
+                if arg_variant.kind == "rest":
+                    kind = "rest"
+        if not names:
+            key = None
+        elif len(arg.variants) == 1:
+            # Named after the variable itself, see `_parse_argument`
+            key = names[0]
+        else:
+            key = f"_arg0_{arg_n}"
+        return cls(kind=kind, required=arg.required, literals=literals, key=key, names=tuple(names))
+
+
+class ArgsMatcher:
+    """Matches command arguments against a single-variant usage without Lark.
+
+    The result is the same as the one of parsing with Lark and then building arguments from the
+    parse tree, but it's much faster. Multi-variant usages are ambiguous and must be parsed by
+    Lark, see `supports()`.
+    """
+
+    __slots__ = ("_plans",)
+
+    def __init__(self, usage: Usage) -> None:
+        if not self.supports(usage):
+            raise ValueError(f"Usage is not supported by {self.__class__.__name__}: {usage!r}")
+        self._plans = tuple(
+            _ArgPlan.from_argument(arg, arg_n=j) for j, arg in enumerate(usage.variants[0].args)
+        )
+
+    @staticmethod
+    def supports(usage: Usage) -> bool:
+        """Checks whether the usage can be matched without Lark."""
+        if len(usage.variants) != 1:
+            return False
+        for arg in usage.variants[0].args:
+            for arg_variant in arg.variants:
+                if isinstance(arg_variant, LiteralArgumentVariant) and " " in arg_variant.value:
+                    return False
+        return True
+
+    def match(self, args: str) -> ParsedArgsT | None:
+        """Matches the arguments string, returns `None` if it doesn't match the usage."""
+        args_dict: dict[str, ArgT | None] = {}
+        args_list: list[ArgT | None] = []
+        pos, end = 0, len(args)
+        for plan in self._plans:
+            if pos == end:
+                if plan.required:
+                    return None
+                break  # the rest of arguments are optional
+            if args_list:
+                pos += 1  # skip the space separating arguments
+            if plan.kind == "single":
+                if (stop := args.find(" ", pos)) == -1:
+                    stop = end
+                value = args[pos:stop]
+                pos = stop
+            else:
+                value = args[pos:]
+                pos = end
+            if not value:
+                return None
+            if plan.kind == "repeat":
+                value = tuple(value.split(" "))
+                if "" in value:
+                    return None
+            elif (literal := plan.literals.get(value)) is not None:
+                key, value = literal
+                args_dict[key] = value
+                args_list.append(value)
+                continue
+            if plan.key is None:
+                return None  # only literals are allowed here
+            args_dict[plan.key] = value
+            for name in plan.names:
+                args_dict[name] = value
+            args_list.append(value)
+        if pos != end:
+            return None
+        for i, plan in enumerate(self._plans):
+            default = () if plan.kind == "repeat" else None
+            for name in plan.names:
+                args_dict.setdefault(name, default)
+            if i >= len(args_list):
+                args_list.append(default)
+        return args_dict, tuple(args_list)
@@ -4,9 +4,12 @@ __all__ = [
     "AsyncJobManager",
 ]
 
-from asyncio import Task, create_task
+import logging
+from asyncio import Task, create_task, sleep
 from types import TracebackType
-from typing import Any, Coroutine, Self
+from typing import Any, Awaitable, Callable, Coroutine, NoReturn, Self
+
+_log = logging.getLogger(__name__)
 
 
 class AsyncJobManager:
@@ -18,6 +21,32 @@ class AsyncJobManager:
         self._jobs.append(job)
         return job
 
+    def add_periodic_job(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        interval: float,
+        *,
+        name: str | None = None,
+    ) -> Task:
+        """Calls `func` every `interval` seconds, the first call is made after the first interval.
+
+        Exceptions raised by `func` are logged and don't stop the job.
+        """
+        if interval <= 0:
+            raise ValueError("`interval` must be positive")
+        if name is None:
+            name = getattr(func, "__qualname__", repr(func))
+
+        async def job() -> NoReturn:
+            while True:
+                await sleep(interval)
+                try:
+                    await func()
+                except Exception:
+                    _log.exception("Periodic job %r failed", name)
+
+        return self.add_job(job())
+
     def cancel_all(self) -> None:
         for job in self._jobs:
             job.cancel()
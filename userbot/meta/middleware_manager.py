@@ -2,13 +2,21 @@ __all__ = [
     "Handler",
     "Middleware",
     "MiddlewareManager",
+    "MiddlewareTiming",
+    "provides",
 ]
 
 import functools
+import logging
+import time
 from abc import abstractmethod
-from typing import Any, Protocol, TypeVar
+from dataclasses import dataclass
+from typing import Any, Callable, Protocol, TypeVar
 
 _ReturnT = TypeVar("_ReturnT")
+_MiddlewareT = TypeVar("_MiddlewareT", bound=Callable[..., Any])
+
+_log = logging.getLogger(__name__)
 
 
 class Handler(Protocol[_ReturnT]):
@@ -27,18 +35,95 @@ class Middleware(Protocol[_ReturnT]):
         pass
 
 
+def provides(*keys: str) -> Callable[[_MiddlewareT], _MiddlewareT]:
+    """Marks the middleware as the one that puts the given keys into the data.
+
+    It's used to check that handlers will get all the required arguments when registering them.
+    Classes can set the `provided_keys` attribute instead.
+    """
+
+    def decorator(middleware: _MiddlewareT) -> _MiddlewareT:
+        middleware.provided_keys = frozenset(keys)
+        return middleware
+
+    return decorator
+
+
+@dataclass()
+class MiddlewareTiming:
+    """Time spent in a middleware itself, excluding the time spent in the rest of the chain."""
+
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def average(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+
+def _middleware_name(middleware: Middleware[Any]) -> str:
+    return getattr(middleware, "__qualname__", None) or type(middleware).__qualname__
+
+
 class MiddlewareManager(Middleware[_ReturnT]):
     # noinspection PyProtocol
     # https://youtrack.jetbrains.com/issue/PY-49246
     def __init__(self):
         self._middlewares: list[Middleware[_ReturnT]] = []
+        self._timings: dict[str, MiddlewareTiming] = {}
 
     def register(self, middleware: Middleware[_ReturnT]) -> None:
         self._middlewares.append(middleware)
 
+    def _timed(
+        self,
+        middleware: Middleware[_ReturnT],
+        handler: Handler[_ReturnT],
+    ) -> Handler[_ReturnT]:
+        """Wraps the middleware to measure the time spent in it."""
+        name = _middleware_name(middleware)
+        timing = self._timings.setdefault(name, MiddlewareTiming())
+
+        async def timed_middleware(data: dict[str, Any]) -> _ReturnT:
+            inner = 0.0
+
+            async def timed_handler(d: dict[str, Any]) -> _ReturnT:
+                nonlocal inner
+                inner_start = time.perf_counter()
+                try:
+                    return await handler(d)
+                finally:
+                    inner += time.perf_counter() - inner_start
+
+            start = time.perf_counter()
+            try:
+                return await middleware(timed_handler, data)
+            finally:
+                elapsed = time.perf_counter() - start - inner
+                timing.add(elapsed)
+                _log.debug("Middleware %s took %.3f ms", name, elapsed * 1000)
+
+        return timed_middleware
+
     def chain(self, handler: Handler[_ReturnT]) -> Handler[_ReturnT]:
+        """Builds the middleware chain for the handler.
+
+        The chain is built once and can be called for any number of updates. Middlewares
+        registered after building the chain are not included in it. If debug logging is enabled,
+        the time spent in each middleware is measured, see `timings`.
+        """
+        timed = _log.isEnabledFor(logging.DEBUG)
         for middleware in reversed(self._middlewares):
-            handler = functools.partial(middleware, handler)
+            if timed:
+                handler = self._timed(middleware, handler)
+            else:
+                handler = functools.partial(middleware, handler)
         return handler
 
     async def __call__(
@@ -48,6 +133,22 @@ class MiddlewareManager(Middleware[_ReturnT]):
     ) -> _ReturnT:
         return await self.chain(handler)(data)
 
+    @property
+    def timings(self) -> dict[str, MiddlewareTiming]:
+        """Time spent in each middleware of the chains built with debug logging enabled."""
+        return self._timings
+
+    @property
+    def provided_keys(self) -> frozenset[str] | None:
+        """Keys all the registered middlewares put into the data. `None` if any of them doesn't
+        declare them (see `provides`)."""
+        res: set[str] = set()
+        for middleware in self._middlewares:
+            if (keys := getattr(middleware, "provided_keys", None)) is None:
+                return None
+            res.update(keys)
+        return frozenset(res)
+
     @property
     def has_handlers(self) -> bool:
         return len(self._middlewares) > 0
@@ -1,6 +1,7 @@
 __all__ = [
     "BaseHandler",
     "BaseModule",
+    "HandlerFiltersModule",
     "HandlerT",
 ]
 
@@ -8,7 +9,7 @@ import asyncio
 import inspect
 import logging
 from abc import ABC, abstractmethod
-from typing import Any, Awaitable, Callable, Generic, NamedTuple, TypeVar
+from typing import Any, Awaitable, Callable, ClassVar, Generic, NamedTuple, TypeVar
 
 from pyrogram import Client
 from pyrogram.enums import ParseMode
@@ -17,6 +18,7 @@ from pyrogram.filters import Filter
 from pyrogram.handlers.handler import Handler
 from pyrogram.types import Message
 
+from userbot.meta.middleware_manager import Handler as MiddlewareHandler
 from userbot.meta.middleware_manager import Middleware, MiddlewareManager
 
 from ...constants import Icons
@@ -32,7 +34,34 @@ class _NewMessage(NamedTuple):
     edited: bool
 
 
+class _BindingPlan(NamedTuple):
+    names: tuple[str, ...]
+    required: frozenset[str]
+    var_keyword: bool
+
+    @classmethod
+    def from_callable(cls, func: Callable[..., Any]) -> "_BindingPlan":
+        """Creates a plan of how to bind the middleware data to the callable arguments."""
+        names: list[str] = []
+        required: set[str] = set()
+        var_keyword = False
+        for name, param in inspect.signature(func).parameters.items():
+            match param.kind:
+                case inspect.Parameter.VAR_KEYWORD:
+                    var_keyword = True
+                case inspect.Parameter.VAR_POSITIONAL:
+                    continue
+                case _:
+                    names.append(name)
+                    if param.default is inspect.Parameter.empty:
+                        required.add(name)
+        return cls(names=tuple(names), required=frozenset(required), var_keyword=var_keyword)
+
+
 class BaseHandler(ABC):
+    # Keys that are put into the middleware data by the handler itself
+    _PROVIDED_KEYS: ClassVar[frozenset[str]] = frozenset(("client", "message", "handler_obj"))
+
     def __init__(
         self,
         *,
@@ -46,7 +75,7 @@ class BaseHandler(ABC):
         self._waiting_message = waiting_message
         self._timeout = timeout
 
-        self._signature = inspect.signature(self.handler)
+        self._binding_plan = _BindingPlan.from_callable(self.handler)
 
     @property
     def handler(self) -> HandlerT:
@@ -64,6 +93,16 @@ class BaseHandler(ABC):
     def timeout(self) -> int | None:
         return self._timeout
 
+    def check_provided(self, provided_keys: frozenset[str]) -> None:
+        """Checks all the required handler arguments will be provided, raises an error
+        otherwise."""
+        missing = self._binding_plan.required - self._PROVIDED_KEYS - provided_keys
+        if missing:
+            raise TypeError(
+                f"{self!r} requires arguments that no middleware provides:"
+                f" {', '.join(sorted(missing))}"
+            )
+
     @staticmethod
     async def _edit_or_reply_html_text(message: Message, text: str, **kwargs: Any) -> _NewMessage:
         """Edits a message if it's outgoing, otherwise reply to it."""
@@ -79,15 +118,11 @@ class BaseHandler(ABC):
 
     async def _invoke_handler(self, data: dict[str, Any]) -> str | None:
         """Filters data and calls the handler."""
-        suitable_kwargs = {}
-        # TODO (2022-11-01): check all params are passed, otherwise raise an error
-        for name, param in self._signature.parameters.items():
-            if param.kind == inspect.Parameter.VAR_KEYWORD:
-                suitable_kwargs = data  # pass all kwargs
-                break
-            if name in data:
-                suitable_kwargs[name] = data[name]
-        return await self.handler(**suitable_kwargs)
+        if self._binding_plan.var_keyword:
+            return await self.handler(**data)  # pass all kwargs
+        return await self.handler(
+            **{name: data[name] for name in self._binding_plan.names if name in data}
+        )
 
     async def _send_waiting_message(self, data: dict[str, Any]) -> None:
         """Edits a message after some time to show that the bot is working on the message."""
@@ -171,7 +206,7 @@ class BaseHandler(ABC):
         client: Client,
         message: Message,
         *,
-        middleware: MiddlewareManager[str | None],
+        chain: MiddlewareHandler[str | None],
     ) -> None:
         data = {
             "client": client,
@@ -179,7 +214,7 @@ class BaseHandler(ABC):
             "handler_obj": self,
         }
         try:
-            result = await middleware(self._invoke_with_timeout, data)
+            result = await chain(data)
         except Exception as e:
             result = await self._exception_handler(e, data)
         if not result:  # empty string or None
@@ -190,7 +225,7 @@ class BaseHandler(ABC):
 _HT = TypeVar("_HT", bound=BaseHandler)
 
 
-class BaseModule(Generic[_HT]):
+class BaseModule(ABC, Generic[_HT]):
     """Base class for modules."""
 
     def __init__(self):
@@ -212,19 +247,45 @@ class BaseModule(Generic[_HT]):
     def add_middleware(self, middleware: Middleware[str | None]) -> None:
         self._middleware.register(middleware)
 
+    def _create_callback(self, handler: _HT) -> Callable[[Client, Message], Awaitable[None]]:
+        """Creates a Pyrogram callback for the given handler with the middleware chain built
+        in advance."""
+        if (provided_keys := self._middleware.provided_keys) is not None:
+            handler.check_provided(provided_keys)
+        else:
+            _log.debug("Cannot check arguments for %r: some middlewares are not annotated", handler)
+        chain = self._middleware.chain(handler._invoke_with_timeout)
+        return async_partial(handler.__call__, chain=chain)
+
+    @abstractmethod
+    def register(self, *clients: Client) -> None:
+        """Registers the module with the given clients.
+
+        Middleware chains are built here, so middlewares must be added before calling this. All
+        the clients share the same handlers, so the module must be registered once.
+        """
+        pass
+
+
+class HandlerFiltersModule(BaseModule[_HT]):
+    """Base class for modules registering Pyrogram handlers with their own filters for each
+    handler."""
+
     @abstractmethod
     def _create_handlers_filters(self, handler: _HT) -> tuple[list[type[Handler]], Filter]:
         """Creates Pyrogram handlers and filters for the given handler."""
         pass
 
-    def register(self, client: Client) -> None:
-        """Registers the module with the given client."""
+    def register(self, *clients: Client) -> None:
+        """Registers the module with the given clients.
+
+        Middleware chains are built here, so middlewares must be added before calling this. All
+        the clients share the same handlers, so the module must be registered once.
+        """
         for handler in self._handlers:
             handlers, filters = self._create_handlers_filters(handler)
+            callback = self._create_callback(handler)
             for handler_cls in handlers:
-                client.add_handler(
-                    handler_cls(
-                        async_partial(handler.__call__, middleware=self._middleware),
-                        filters,
-                    ),
-                )
+                pyrogram_handler = handler_cls(callback, filters)
+                for client in clients:
+                    client.add_handler(pyrogram_handler)
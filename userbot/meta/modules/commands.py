@@ -6,41 +6,51 @@ __all__ = [
     "CommandsModule",
 ]
 
-import functools
 import html
 import inspect
 import logging
-import operator
 import re
 from io import BytesIO
 from pathlib import Path
 from traceback import FrameSummary, extract_tb
 from types import TracebackType
-from typing import TYPE_CHECKING, Any, Callable, Iterable, TypeAlias, overload
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    NamedTuple,
+    TypeAlias,
+    overload,
+)
 
 from httpx import AsyncClient, HTTPError
-from lark import Lark
-from pyrogram import Client, filters
+from pyrogram import Client, ContinuePropagation, filters
 from pyrogram.enums import ChatType, ParseMode
 from pyrogram.errors import MessageNotModified
-from pyrogram.filters import Filter
 from pyrogram.handlers import EditedMessageHandler, MessageHandler
 from pyrogram.handlers.handler import Handler
 from pyrogram.types import Message
 
 from ...constants import Icons
-from ...utils import Translation
-from ..args_parser import create_args_parser_grammar
+from ...utils import Translation, async_partial
+from ..args_parser import ArgsMatcher, create_args_parser
+from ..usage_parser import Usage
 from ..usage_parser import parser as usage_parser
 from .base import BaseHandler, BaseModule, HandlerT
 
 if TYPE_CHECKING:
+    from lark import Lark
+
     from ...middlewares import CommandObject
 
 _DEFAULT_TIMEOUT = 30
 
 _log = logging.getLogger(__name__)
 
+_COMMAND_WORD_RE = re.compile(r"\S+")
+
 CommandT: TypeAlias = str | re.Pattern[str]
 
 
@@ -125,11 +135,11 @@ class CommandsHandler(BaseHandler):
         self.commands = commands
         self.prefix = prefix
         self.usage = usage
-        self.usage_tree = usage_parser.parse(usage)
-        self.args_parser = Lark(
-            create_args_parser_grammar(self.usage_tree),
-            maybe_placeholders=False,
-        )
+        # Usage is parsed on demand, see `compile_args_parser()`
+        self._usage_tree: Usage | None = None
+        self._args_matcher: ArgsMatcher | None = None
+        self._args_parser: Lark | None = None
+        self._args_compiled = False
         self.reply_required = reply_required
         self.summary = summary
         self.description = description
@@ -161,6 +171,36 @@ class CommandsHandler(BaseHandler):
             f">"
         )
 
+    @property
+    def usage_tree(self) -> Usage:
+        if self._usage_tree is None:
+            self._usage_tree = usage_parser.parse(self.usage)
+        return self._usage_tree
+
+    @property
+    def args_matcher(self) -> ArgsMatcher | None:
+        """Matcher for the arguments. `None` if the usage is not supported by it, `args_parser`
+        must be used then."""
+        if not self._args_compiled:
+            self.compile_args_parser()
+        return self._args_matcher
+
+    @property
+    def args_parser(self) -> Lark:
+        """Lark parser for the arguments. Not needed if `args_matcher` is set."""
+        if self._args_parser is None:
+            self._args_parser = create_args_parser(self.usage_tree)
+        return self._args_parser
+
+    def compile_args_parser(self) -> None:
+        """Parses the usage and prepares arguments parsing: creates `ArgsMatcher` if the usage is
+        supported by it, otherwise compiles Lark parser."""
+        if ArgsMatcher.supports(self.usage_tree):
+            self._args_matcher = ArgsMatcher(self.usage_tree)
+        else:
+            self._args_parser = create_args_parser(self.usage_tree)
+        self._args_compiled = True
+
     def format_usage(self, *, full: bool = False) -> str:
         """Formats the usage of the command."""
         commands: list[str] = []
@@ -294,6 +334,91 @@ class CommandsHandler(BaseHandler):
         return self._sort_key < other._sort_key
 
 
+class _PatternGroup(NamedTuple):
+    regex: re.Pattern[str]
+    handlers: dict[str, CommandsHandler]
+
+
+def _compile_pattern_groups(
+    prefix: str,
+    patterns: list[tuple[re.Pattern[str], CommandsHandler]],
+) -> list[_PatternGroup]:
+    """Compiles regex commands sharing the same prefix and flags into a single alternation.
+
+    Falls back to one regex per command if the patterns cannot be joined, e.g. when they define
+    the same group names.
+    """
+    res: list[_PatternGroup] = []
+    by_flags: dict[int, list[tuple[re.Pattern[str], CommandsHandler]]] = {}
+    for pattern, handler in patterns:
+        by_flags.setdefault(pattern.flags, []).append((pattern, handler))
+    for flags, group in by_flags.items():
+        handlers = {f"_cmd{i}": handler for i, (_, handler) in enumerate(group)}
+        alternation = "|".join(
+            f"(?P<_cmd{i}>{pattern.pattern})" for i, (pattern, _) in enumerate(group)
+        )
+        try:
+            regex = re.compile(f"[{re.escape(prefix)}](?:{alternation})", flags=flags)
+        except re.error:
+            for pattern, handler in group:
+                regex = re.compile(f"[{re.escape(prefix)}](?P<_cmd0>{pattern.pattern})", flags)
+                res.append(_PatternGroup(regex, {"_cmd0": handler}))
+        else:
+            res.append(_PatternGroup(regex, handlers))
+    return res
+
+
+class _CommandDispatcher:
+    """Resolves the command handler for a message in a single pass over the message text.
+
+    Plain commands are looked up in a hash map by their prefix and command word, regex commands
+    are checked with one compiled alternation per prefix (and flags). Plain commands have
+    priority over regex ones.
+    """
+
+    def __init__(self, handlers: Iterable[CommandsHandler]) -> None:
+        self._commands: dict[str, dict[str, CommandsHandler]] = {}
+        patterns: dict[str, list[tuple[re.Pattern[str], CommandsHandler]]] = {}
+        for handler in handlers:
+            for cmd in handler.commands:
+                if isinstance(cmd, re.Pattern):
+                    patterns.setdefault(handler.prefix, []).append((cmd, handler))
+                elif isinstance(cmd, str):
+                    self._commands.setdefault(handler.prefix, {})[cmd.lower()] = handler
+                else:
+                    raise AssertionError(f"Unexpected command type: {type(cmd)}")
+        self._patterns: list[_PatternGroup] = [
+            group
+            for prefix, prefix_patterns in patterns.items()
+            for group in _compile_pattern_groups(prefix, prefix_patterns)
+        ]
+
+    def resolve(self, text: str, username: str | None = None) -> CommandsHandler | None:
+        """Returns the handler for the command in the text or `None` if there's no command."""
+        for prefix, commands in self._commands.items():
+            if not text.startswith(prefix):
+                continue
+            m = _COMMAND_WORD_RE.match(text, len(prefix))
+            if m is None:
+                continue
+            word = m[0].lower()
+            if (handler := commands.get(word)) is not None:
+                return handler
+            command, at, mention = word.partition("@")
+            if at and username and mention == username.lower():
+                if (handler := commands.get(command)) is not None:
+                    return handler
+        for group in self._patterns:
+            if (m := group.regex.match(text)) is not None:
+                return group.handlers[m.lastgroup]
+        return None
+
+    def __len__(self) -> int:
+        return sum(map(len, self._commands.values())) + sum(
+            len(group.handlers) for group in self._patterns
+        )
+
+
 class CommandsModule(BaseModule[CommandsHandler]):
     def __init__(
         self,
@@ -301,11 +426,14 @@ class CommandsModule(BaseModule[CommandsHandler]):
         *,
         default_prefix: str | None = None,
         ensure_middlewares_registered: bool = False,
+        lazy: bool = False,
     ):
         super().__init__()
         self._category = category
         self._default_prefix = default_prefix
         self._ensure_middlewares_registered = ensure_middlewares_registered
+        # Lazy mode defers parsing usages until the first invocation of each command
+        self._lazy = lazy
 
     @overload
     def add(
@@ -460,9 +588,11 @@ class CommandsModule(BaseModule[CommandsHandler]):
         commands = set()
         for handler in self._handlers:
             for cmd in handler.commands:
-                if cmd in commands:
+                # Commands are case-insensitive, see `_CommandDispatcher`
+                key = cmd.lower() if isinstance(cmd, str) else cmd
+                if key in commands:
                     raise ValueError(f"Duplicate command: {cmd}")
-                commands.add(cmd)
+                commands.add(key)
 
     def _set_prefix(self) -> None:
         """Sets the prefix for all handlers if not set."""
@@ -472,29 +602,34 @@ class CommandsModule(BaseModule[CommandsHandler]):
             if handler.prefix is None:
                 handler.prefix = self._default_prefix
 
-    def _create_handlers_filters(
+    def _compile_args_parsers(self) -> None:
+        """Parses usages and compiles arguments parsers for all handlers. Does nothing in lazy
+        mode."""
+        if self._lazy:
+            return
+        for handler in self._handlers:
+            handler.compile_args_parser()
+
+    async def _dispatch(
         self,
-        handler: CommandsHandler,
-    ) -> tuple[list[type[Handler]], Filter]:
-        f: list[Filter] = []
-        for cmd in handler.commands:
-            if isinstance(cmd, re.Pattern):
-                command_re = re.compile(
-                    f"^[{re.escape(handler.prefix)}]{cmd.pattern}",
-                    flags=cmd.flags,
-                )
-                f.append(filters.regex(command_re))
-            elif isinstance(cmd, str):
-                f.append(filters.command(cmd, prefixes=handler.prefix))
-            else:
-                raise AssertionError(f"Unexpected command type: {type(cmd)}")
-        h: list[type[Handler]] = [MessageHandler]
-        if handler.handle_edits:
-            h.append(EditedMessageHandler)
-        return h, functools.reduce(operator.or_, f) & filters.me & ~filters.scheduled
-
-    def register(self, client: Client) -> None:
-        """Registers the module with the client."""
+        client: Client,
+        message: Message,
+        *,
+        dispatcher: _CommandDispatcher,
+        callbacks: dict[CommandsHandler, Callable[[Client, Message], Awaitable[None]]],
+    ) -> None:
+        """Calls the command handler resolved for the message, if any."""
+        text = message.text or message.caption
+        if not text:
+            raise ContinuePropagation
+        handler = dispatcher.resolve(text, client.me.username if client.me else None)
+        if handler is None:
+            raise ContinuePropagation  # not a command, let other handlers process the message
+        await callbacks[handler](client, message)
+
+    def register(self, *clients: Client) -> None:
+        """Registers the module with the clients. All the clients share the same handlers and
+        argument parsers, so the module must be registered once."""
         self.add(
             self._help_handler,
             "help",
@@ -510,4 +645,24 @@ class CommandsModule(BaseModule[CommandsHandler]):
                 self.add_middleware(translate_middleware)
         self._set_prefix()
         self._check_duplicates()
-        super().register(client)
+        self._compile_args_parsers()
+        flt = filters.me & ~filters.scheduled
+        callbacks = {handler: self._create_callback(handler) for handler in self._handlers}
+        dispatcher = _CommandDispatcher(self._handlers)
+        pyrogram_handlers: list[Handler] = [
+            MessageHandler(
+                async_partial(self._dispatch, dispatcher=dispatcher, callbacks=callbacks),
+                flt,
+            ),
+        ]
+        edits_dispatcher = _CommandDispatcher(h for h in self._handlers if h.handle_edits)
+        if len(edits_dispatcher) > 0:
+            pyrogram_handlers.append(
+                EditedMessageHandler(
+                    async_partial(self._dispatch, dispatcher=edits_dispatcher, callbacks=callbacks),
+                    flt,
+                ),
+            )
+        for client in clients:
+            for pyrogram_handler in pyrogram_handlers:
+                client.add_handler(pyrogram_handler)
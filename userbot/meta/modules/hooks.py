@@ -2,7 +2,10 @@ __all__ = [
     "HooksModule",
 ]
 
-from typing import Any, Callable, overload
+import inspect
+from collections import Counter
+from enum import IntEnum
+from typing import Any, Callable, Mapping, NamedTuple, overload
 
 from pyrogram import Client
 from pyrogram import filters as pyrogram_filters
@@ -13,16 +16,77 @@ from pyrogram.types import Message
 from ...storage import Storage
 from ...utils import Translation
 from . import CommandsModule
-from .base import BaseHandler, BaseModule, HandlerT
+from .base import BaseHandler, HandlerFiltersModule, HandlerT
+
+
+class _FilterCost(IntEnum):
+    """Filters of cheaper classes are checked first."""
+
+    SYNC = 0
+    ASYNC = 1
 
 
 class _HookEnabledFilter(pyrogram_filters.Filter):
-    def __init__(self, hook_name: str, storage: Storage) -> None:
+    def __init__(self, hook_name: str, storage: Storage | Mapping[Client, Storage]) -> None:
         self.storage = storage
         self.hook_name = hook_name
 
     async def __call__(self, client: Client, message: Message) -> bool:
-        return await self.storage.is_hook_enabled(self.hook_name, message.chat.id)
+        storage = self.storage[client] if isinstance(self.storage, Mapping) else self.storage
+        return await storage.is_hook_enabled(self.hook_name, message.chat.id)
+
+
+class _FilterStage(NamedTuple):
+    name: str
+    filter: pyrogram_filters.Filter
+
+
+def _filter_cost(filter_: pyrogram_filters.Filter) -> _FilterCost:
+    if isinstance(filter_, (pyrogram_filters.AndFilter, pyrogram_filters.OrFilter)):
+        return max(_filter_cost(filter_.base), _filter_cost(filter_.other))
+    if isinstance(filter_, pyrogram_filters.InvertFilter):
+        return _filter_cost(filter_.base)
+    if inspect.iscoroutinefunction(filter_.__call__):
+        return _FilterCost.ASYNC
+    return _FilterCost.SYNC
+
+
+async def _check_filter(filter_: pyrogram_filters.Filter, client: Client, update: Message) -> bool:
+    """Same as calling the filter, but synchronous filters are called right away, also inside
+    combined ones. Pyrogram runs them in a thread, which costs more than most of them."""
+    if isinstance(filter_, pyrogram_filters.AndFilter):
+        return await _check_filter(filter_.base, client, update) and await _check_filter(
+            filter_.other, client, update
+        )
+    if isinstance(filter_, pyrogram_filters.OrFilter):
+        return await _check_filter(filter_.base, client, update) or await _check_filter(
+            filter_.other, client, update
+        )
+    if isinstance(filter_, pyrogram_filters.InvertFilter):
+        return not await _check_filter(filter_.base, client, update)
+    if inspect.iscoroutinefunction(filter_.__call__):
+        return bool(await filter_(client, update))
+    return bool(filter_(client, update))
+
+
+class _StagedFilter(pyrogram_filters.Filter):
+    """Evaluates filters stage by stage, stopping at the first one that rejects the update.
+
+    Stages are checked from the cheapest to the most expensive one (see `_FilterCost`), so
+    synchronous checks are done before the ones awaiting something. Stages of the same cost are
+    checked in the given order. Rejections are counted per stage.
+    """
+
+    def __init__(self, stages: list[_FilterStage], rejections: Counter[str]) -> None:
+        self.stages = sorted(stages, key=lambda stage: _filter_cost(stage.filter))
+        self.rejections = rejections
+
+    async def __call__(self, client: Client, update: Message) -> bool:
+        for stage in self.stages:
+            if not await _check_filter(stage.filter, client, update):
+                self.rejections[stage.name] += 1
+                return False
+        return True
 
 
 async def _list_enabled_hooks(message: Message, storage: Storage, tr: Translation) -> str:
@@ -51,12 +115,19 @@ class HooksHandler(BaseHandler):
         )
         self.name = name
         self.filters = filters
+        self._rejections: Counter[str] = Counter()
 
     def __repr__(self) -> str:
         name = self.name
         handle_edits = self.handle_edits
         return f"<{self.__class__.__name__} {name=} {handle_edits=}>"
 
+    @property
+    def rejections(self) -> Counter[str]:
+        """How many times each filter stage rejected a message: `incoming`, `filters` (the hook's
+        own filters) or `enabled` (the hook is not enabled in the chat)."""
+        return self._rejections
+
     async def add_handler(self, message: Message, storage: Storage) -> None:
         await storage.enable_hook(self.name, message.chat.id)
         await message.delete()
@@ -69,12 +140,17 @@ class HooksHandler(BaseHandler):
         return
 
 
-class HooksModule(BaseModule):
+class HooksModule(HandlerFiltersModule):
     def __init__(
         self,
         commands: CommandsModule | None = None,
-        storage: Storage | None = None,
+        storage: Storage | Mapping[Client, Storage] | None = None,
     ) -> None:
+        """Module of hooks enabled per chat.
+
+        `storage` is where enabled hooks are kept. When the module is registered with several
+        clients, it's a mapping of each client to its own storage.
+        """
         super().__init__()
         self.commands = commands
         self.storage = storage
@@ -163,14 +239,20 @@ class HooksModule(BaseModule):
         h: list[type[Handler]] = [MessageHandler]
         if handler.handle_edits:
             h.append(EditedMessageHandler)
-        return (
-            h,
-            pyrogram_filters.incoming
-            & _HookEnabledFilter(handler.name, self.storage)
-            & handler.filters,
-        )
+        stages = [
+            _FilterStage("incoming", pyrogram_filters.incoming),
+            _FilterStage("filters", handler.filters),
+            _FilterStage("enabled", _HookEnabledFilter(handler.name, self.storage)),
+        ]
+        return h, _StagedFilter(stages, handler.rejections)
+
+    def rejections(self) -> dict[str, Counter[str]]:
+        """Rejections of the hooks which rejected anything, see `HooksHandler.rejections`."""
+        return {
+            handler.name: handler.rejections for handler in self._handlers if handler.rejections
+        }
 
-    def register(self, client: Client) -> None:
+    def register(self, *clients: Client) -> None:
         if self.commands is None:
             raise RuntimeError("Please set commands attribute before registering hooks module")
         if self.storage is None:
@@ -203,7 +285,7 @@ class HooksModule(BaseModule):
                 category="Hooks",
                 hidden=True,
             )
-        super().register(client)
+        super().register(*clients)
         self.commands.add_submodule(commands)
 
     async def _list_hooks(self, tr: Translation) -> str:
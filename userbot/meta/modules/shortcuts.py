@@ -2,20 +2,28 @@ __all__ = [
     "ShortcutsModule",
 ]
 
+import asyncio
+import logging
 import re
-from typing import Any, Callable, overload
+from typing import Any, Callable, Iterable, NamedTuple, overload
 
-from pyrogram import ContinuePropagation, filters
+from pyrogram import Client, filters
 from pyrogram.handlers import EditedMessageHandler, MessageHandler
 from pyrogram.handlers.handler import Handler
 from pyrogram.types import Message
 
-from .base import BaseHandler, BaseModule, HandlerT
+from .base import BaseHandler, HandlerFiltersModule, HandlerT
 
 _DEFAULT_TIMEOUT = 5
+# Flags that can be applied to a part of a pattern, see "(?aiLmsux-imsx:...)" in `re` docs
+_SCOPED_FLAGS = {re.IGNORECASE: "i", re.MULTILINE: "m", re.DOTALL: "s", re.VERBOSE: "x"}
+
+_log = logging.getLogger(__name__)
 
 
 class ShortcutsHandler(BaseHandler):
+    _PROVIDED_KEYS = BaseHandler._PROVIDED_KEYS | {"match"}
+
     def __init__(
         self,
         *,
@@ -39,27 +47,155 @@ class ShortcutsHandler(BaseHandler):
         timeout = self.timeout
         return f"<{self.__class__.__name__} {pattern=} {handle_edits=} {timeout=}>"
 
-    async def _invoke_handler(self, data: dict[str, Any]) -> str | None:
+    async def expand(self, match: re.Match[str], data: dict[str, Any]) -> str | None:
+        """Calls the handler for the match. Returns the text to replace the match with or `None`
+        to leave the match as is."""
+        try:
+            return await asyncio.wait_for(
+                self._invoke_handler({**data, "match": match}),
+                timeout=self.timeout,
+            )
+        except Exception:
+            _log.exception(
+                "Shortcut %r failed to expand %r",
+                self,
+                match[0],
+                extra={"data": data},
+            )
+            return None
+
+
+class _Scanner(NamedTuple):
+    regex: re.Pattern[str]
+    handlers: dict[str, ShortcutsHandler]
+
+
+def _wrap_pattern(name: str, pattern: re.Pattern[str]) -> str | None:
+    """Wraps the pattern to a named group keeping its flags. Returns `None` if the flags cannot
+    be applied to a part of a pattern."""
+    flags = ""
+    for flag, letter in _SCOPED_FLAGS.items():
+        if pattern.flags & flag:
+            flags += letter
+    if pattern.flags & ~(re.UNICODE | sum(_SCOPED_FLAGS)):
+        return None
+    if flags:
+        return f"(?P<{name}>(?{flags}:{pattern.pattern}))"
+    return f"(?P<{name}>{pattern.pattern})"
+
+
+def _compile_scanners(handlers: Iterable[ShortcutsHandler]) -> list[_Scanner]:
+    """Compiles all the shortcut patterns into a single alternation.
+
+    Patterns that cannot be joined with others (e.g. when they define the same group names) get
+    their own scanner.
+    """
+    joined: dict[str, ShortcutsHandler] = {}
+    parts: list[str] = []
+    res: list[_Scanner] = []
+    for handler in handlers:
+        name = f"_s{len(joined)}"
+        part = _wrap_pattern(name, handler.pattern)
+        if part is not None:
+            try:
+                re.compile("|".join((*parts, part)))
+            except re.error:
+                pass
+            else:
+                joined[name] = handler
+                parts.append(part)
+                continue
+        regex = re.compile(f"(?P<_s0>{handler.pattern.pattern})", handler.pattern.flags)
+        res.append(_Scanner(regex, {"_s0": handler}))
+    if parts:
+        res.insert(0, _Scanner(re.compile("|".join(parts)), joined))
+    return res
+
+
+class _ShortcutsEngine(BaseHandler):
+    """Expands all the shortcuts in a message in a single pass and edits the message once."""
+
+    def __init__(self, handlers: Iterable[ShortcutsHandler], *, handle_edits: bool) -> None:
+        super().__init__(
+            handler=self._expand_all,
+            handle_edits=handle_edits,
+            waiting_message=None,
+            timeout=None,
+        )
+        self._handlers = list(handlers)
+        self._scanners = _compile_scanners(self._handlers)
+
+    def __repr__(self) -> str:
+        handlers = self._handlers
+        return f"<{self.__class__.__name__} {handlers=}>"
+
+    def __len__(self) -> int:
+        return len(self._handlers)
+
+    def check_provided(self, provided_keys: frozenset[str]) -> None:
+        for handler in self._handlers:
+            handler.check_provided(provided_keys)
+
+    async def _send_waiting_message(self, data: dict[str, Any]) -> None:
+        # The text of the message is the shortcuts themselves, it would be lost if none of them
+        # expands after the message is replaced with the waiting one
+        return
+
+    def search(self, text: str) -> bool:
+        """Checks whether there's any shortcut in the text."""
+        return any(scanner.regex.search(text) is not None for scanner in self._scanners)
+
+    def _find_all(self, text: str) -> list[tuple[re.Match[str], ShortcutsHandler]]:
+        """Finds all non-overlapping shortcuts in the text, leftmost first."""
+        found: list[tuple[int, int, re.Match[str], ShortcutsHandler]] = []
+        for i, scanner in enumerate(self._scanners):
+            for m in scanner.regex.finditer(text):
+                found.append((m.start(), i, m, scanner.handlers[m.lastgroup]))
+        if len(self._scanners) > 1:
+            found.sort(key=lambda item: item[:2])
+        res: list[tuple[re.Match[str], ShortcutsHandler]] = []
+        end = 0
+        for start, __, m, handler in found:
+            if start < end:
+                continue  # overlaps with the previous shortcut
+            # Match with the original pattern, so the handler gets the groups it expects
+            res.append((handler.pattern.match(text, start), handler))
+            end = max(m.end(), start + 1)
+        return res
+
+    async def _expand_all(self, **data: Any) -> str | None:
         message: Message = data["message"]
         raw_text = message.text or message.caption
         if raw_text is None:
-            return
+            return None
         text = raw_text.html
-        while match := self.pattern.search(text):
-            data["match"] = match
-            if (result := await super()._invoke_handler(data)) is not None:
-                text = f"{text[:match.start()]}{result}{text[match.end():]}"
-        return text
+        found = self._find_all(text)
+        if not found:
+            return None
+        results = await asyncio.gather(*(handler.expand(m, data) for m, handler in found))
+        parts: list[str] = []
+        end = 0
+        for (m, __), result in zip(found, results):
+            parts.append(text[end : m.start()])
+            parts.append(m[0] if result is None else result)
+            end = m.end()
+        parts.append(text[end:])
+        new_text = "".join(parts)
+        if new_text == text:
+            return None
+        return new_text
+
 
-    async def _timed_out_handler(self, data: dict[str, Any]) -> str | None:
-        raise
+class _ShortcutsFilter(filters.Filter):
+    def __init__(self, engine: _ShortcutsEngine) -> None:
+        self.engine = engine
 
-    async def _result_handler(self, result: str, data: dict[str, Any]) -> None:
-        await super()._result_handler(result, data)
-        raise ContinuePropagation  # allow other shortcut handlers to run
+    async def __call__(self, client: Client, message: Message) -> bool:
+        text = message.text or message.caption
+        return text is not None and self.engine.search(text)
 
 
-class ShortcutsModule(BaseModule):
+class ShortcutsModule(HandlerFiltersModule):
     @overload
     def add(
         self,
@@ -146,9 +282,27 @@ class ShortcutsModule(BaseModule):
 
     def _create_handlers_filters(
         self,
-        handler: ShortcutsHandler,
+        handler: _ShortcutsEngine,
     ) -> tuple[list[type[Handler]], filters.Filter]:
-        h: list[type[Handler]] = [MessageHandler]
-        if handler.handle_edits:
-            h.append(EditedMessageHandler)
-        return h, filters.outgoing & ~filters.scheduled & filters.regex(handler.pattern)
+        h: list[type[Handler]] = [EditedMessageHandler if handler.handle_edits else MessageHandler]
+        return h, filters.outgoing & ~filters.scheduled & _ShortcutsFilter(handler)
+
+    def register(self, *clients: Client) -> None:
+        """Registers the module with the given clients.
+
+        All the shortcuts are handled by one engine, so a message is scanned and edited once
+        no matter how many shortcuts it contains.
+        """
+        engines = (
+            _ShortcutsEngine(self._handlers, handle_edits=False),
+            _ShortcutsEngine((h for h in self._handlers if h.handle_edits), handle_edits=True),
+        )
+        for engine in engines:
+            if len(engine) == 0:
+                continue
+            handlers, filters_ = self._create_handlers_filters(engine)
+            callback = self._create_callback(engine)
+            for handler_cls in handlers:
+                pyrogram_handler = handler_cls(callback, filters_)
+                for client in clients:
+                    client.add_handler(pyrogram_handler)
@@ -11,9 +11,14 @@ __all__ = [
 ]
 
 from dataclasses import dataclass
-from typing import Literal, TypeAlias
+from typing import TYPE_CHECKING, Literal, TypeAlias
 
-from lark import Lark, ParseTree
+from ..utils.misc import lazy_import
+
+if TYPE_CHECKING:
+    from lark import Lark, ParseTree
+
+lark = lazy_import("lark")
 
 _GRAMMAR = r"""
 // The Lark grammar for the usage string of evgfilim1/userbot.
@@ -159,12 +164,17 @@ def _parse_usage_tree(tree: ParseTree) -> Usage:
 
 
 class UsageParser:
-    __slots__ = ("_parser",)
+    __slots__ = ("_grammar", "_start", "_parser")
 
     def __init__(self, grammar: str, *, start: str = "usage") -> None:
-        self._parser = Lark(grammar, start=start)
+        self._grammar = grammar
+        self._start = start
+        self._parser: Lark | None = None
 
     def parse_to_raw(self, usage: str) -> ParseTree:
+        if self._parser is None:
+            # Built on demand, so Lark is not loaded until some usage is parsed
+            self._parser = lark.Lark(self._grammar, start=self._start)
         return self._parser.parse(usage)
 
     def parse(self, usage: str) -> Usage:
@@ -11,29 +11,31 @@ __all__ = [
 
 import html
 import re
-from asyncio import create_task
 from dataclasses import dataclass
-from typing import Any, Iterable, Iterator, NamedTuple
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, NamedTuple
 
-from lark import Lark, UnexpectedInput
+from pyrogram import Client
 from pyrogram.types import Message
 
 from .constants import Icons
-from .meta.middleware_manager import Handler, Middleware
+from .meta.args_parser import ArgT, ParsedArgsT
+from .meta.middleware_manager import Handler, Middleware, provides
 from .meta.modules.commands import CommandsHandler, CommandT
 from .meta.usage_parser import Usage, VariableArgumentVariant
 from .storage import Storage
-from .utils import Translation
+from .utils import CommandStatsBuffer, Translation, lazy_import
 
-_ArgT = str | tuple[str, ...]
-_ParsedArgsT = tuple[dict[str, _ArgT | None], tuple[_ArgT | None]]
+if TYPE_CHECKING:
+    from lark import Lark
+
+lark = lazy_import("lark")
 
 
 def _parse_arguments(
     parser: Lark,
     args: str,
     usage_tree: Usage,
-) -> _ParsedArgsT:
+) -> ParsedArgsT:
     args_tree = parser.parse(args)
     args_dict: dict[str, tuple[str] | str | None] = {}
     args_list: list[str] = []
@@ -85,16 +87,16 @@ def _parse_arguments(
 
 
 class Arguments:
-    def __init__(self, raw_args: str, parsed_args: _ParsedArgsT) -> None:
+    def __init__(self, raw_args: str, parsed_args: ParsedArgsT) -> None:
         self._raw_args = raw_args
         self._args_dict, self._args_list = parsed_args
 
-    def __getitem__(self, item: str | int | slice) -> _ArgT | None:
+    def __getitem__(self, item: str | int | slice) -> ArgT | None:
         if not isinstance(item, str):
             return self._args_list[item]
         return self._args_dict[item]
 
-    def __iter__(self) -> Iterator[_ArgT]:
+    def __iter__(self) -> Iterator[ArgT]:
         return iter(self._args_list)
 
     @property
@@ -149,6 +151,8 @@ def _get_command_info(
 
 
 class ParseCommandMiddleware(Middleware[str | None]):
+    provided_keys = frozenset(("command", "reply"))
+
     # noinspection PyProtocol
     # https://youtrack.jetbrains.com/issue/PY-49246
     def __init__(self, default_prefix: str) -> None:
@@ -167,13 +171,18 @@ class ParseCommandMiddleware(Middleware[str | None]):
         if handler_obj.reply_required and reply is None:
             _ = data["tr"].gettext
             return self._get_error_message(_("Reply is required."), info, data)
-        try:
-            parsed_args = _parse_arguments(
-                handler_obj.args_parser,
-                info.args,
-                handler_obj.usage_tree,
-            )
-        except UnexpectedInput:
+        if handler_obj.args_matcher is not None:
+            parsed_args = handler_obj.args_matcher.match(info.args)
+        else:
+            try:
+                parsed_args = _parse_arguments(
+                    handler_obj.args_parser,
+                    info.args,
+                    handler_obj.usage_tree,
+                )
+            except lark.UnexpectedInput:
+                parsed_args = None
+        if parsed_args is None:
             _ = data["tr"].gettext
             return self._get_error_message(_("Invalid syntax."), info, data)
         data["command"] = CommandObject(
@@ -206,12 +215,28 @@ class ParseCommandMiddleware(Middleware[str | None]):
 
 
 class KwargsMiddleware(Middleware[str | None]):
-    """Updates middleware data with the given kwargs."""
+    """Updates middleware data with the given kwargs.
+
+    Kwargs specific to a client, like its storage when several accounts are run in one process,
+    are set with `set_client_kwargs()` and override the common ones.
+    """
 
     # noinspection PyProtocol
     # https://youtrack.jetbrains.com/issue/PY-49246
     def __init__(self, kwargs: dict[str | Any]):
         self.kwargs = kwargs
+        self._client_kwargs: dict[Client, dict[str, Any]] = {}
+
+    def set_client_kwargs(self, client: Client, kwargs: dict[str, Any]) -> None:
+        self._client_kwargs[client] = kwargs
+
+    @property
+    def provided_keys(self) -> frozenset[str]:
+        keys = frozenset(self.kwargs)
+        if self._client_kwargs:
+            # Only the keys provided for every client are guaranteed to be present
+            keys |= frozenset.intersection(*map(frozenset, self._client_kwargs.values()))
+        return keys
 
     async def __call__(
         self,
@@ -219,9 +244,12 @@ class KwargsMiddleware(Middleware[str | None]):
         data: dict[str | Any],
     ) -> str | None:
         data.update(self.kwargs)
+        if (client_kwargs := self._client_kwargs.get(data["client"])) is not None:
+            data.update(client_kwargs)
         return await handler(data)
 
 
+@provides("lang", "tr")
 async def translate_middleware(
     handler: Handler[str | None],
     data: dict[str | Any],
@@ -238,12 +266,14 @@ async def translate_middleware(
     return await handler(data)
 
 
+@provides()
 async def update_command_stats_middleware(
     handler: Handler[str | None],
     data: dict[str | Any],
 ) -> str | None:
     """Updates the command stats."""
     command: CommandObject = data["command"]
-    storage: Storage = data["storage"]
-    create_task(storage.command_used(command.command))  # I don't care about the result
+    command_stats: CommandStatsBuffer = data["command_stats"]
+    message: Message = data["message"]
+    command_stats.command_used(command.command, message.chat.id)
     return await handler(data)
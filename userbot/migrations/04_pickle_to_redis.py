@@ -32,6 +32,9 @@ async def _main(old_storage_raw: dict[str, Any], new_storage: RedisStorage) -> N
 
 def main():
     config = StorageConfig.from_env()
+    if config.backend != "redis":
+        _log.info("Redis storage is not used, skipping migration")
+        return
     pickle_path = config.data_location / f"{config.session_name}.pkl"
     try:
         with open(pickle_path, "rb") as f:
@@ -6,15 +6,28 @@ __all__ = []
 import asyncio
 import logging
 
-from userbot.config import RedisConfig
+from redis.asyncio import Redis
+
+from userbot.config import RedisConfig, StorageConfig
 from userbot.storage import RedisStorage
 
 _log = logging.getLogger(__name__)
 
 
-async def _main(storage: RedisStorage) -> None:
+async def _saved_notes(redis: Redis) -> list[str]:
+    # Notes index doesn't exist yet at this point (see 07_notes_index.py)
+    prefix = "userbot:messages:"
+    async with redis:
+        return [
+            key.removeprefix(prefix)
+            async for key in redis.scan_iter(match=f"{prefix}*", _type="hash")
+        ]
+
+
+async def _main(storage: RedisStorage, redis: Redis) -> None:
+    notes = await _saved_notes(redis)
     async with storage:
-        async for note in storage.saved_notes():
+        for note in notes:
             content, type_ = await storage.get_note(note)
             if type_ == "message":
                 _log.debug("Migrating note %r", note)
@@ -27,6 +40,9 @@ async def _main(storage: RedisStorage) -> None:
 
 
 def main():
+    if StorageConfig.from_env().backend != "redis":
+        _log.info("Redis storage is not used, skipping migration")
+        return
     redis_config = RedisConfig.from_env()
     password = redis_config.password.value if redis_config.password else None
     storage = RedisStorage(
@@ -35,8 +51,15 @@ def main():
         redis_config.db,
         password,
     )
+    redis = Redis(
+        host=redis_config.host,
+        port=redis_config.port,
+        db=redis_config.db,
+        password=password,
+        decode_responses=True,
+    )
 
-    asyncio.run(_main(storage))
+    asyncio.run(_main(storage, redis))
 
 
 if __name__ == "__main__":
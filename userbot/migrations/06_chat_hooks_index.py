@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Build the per-chat index of enabled hooks from the per-hook sets."""
+
+__all__ = []
+
+import logging
+
+from redis.asyncio import Redis
+
+from userbot.migrations._redis import run_redis_migration
+
+_log = logging.getLogger(__name__)
+
+
+async def _main(redis: Redis) -> None:
+    async with redis:
+        async for key in redis.scan_iter(match="userbot:hooks:*", _type="set"):
+            name = key.rsplit(":", 1)[-1]
+            chat_ids = await redis.smembers(key)
+            _log.debug("Indexing hook %r for %d chats", name, len(chat_ids))
+            async with redis.pipeline(transaction=True) as pipe:
+                for chat_id in chat_ids:
+                    pipe.sadd(f"userbot:chat_hooks:{chat_id}", name)
+                await pipe.execute()
+
+
+def main():
+    run_redis_migration(_main, _log)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
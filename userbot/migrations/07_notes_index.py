@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Build the index of saved notes keys."""
+
+__all__ = []
+
+import logging
+
+from redis.asyncio import Redis
+
+from userbot.migrations._redis import run_redis_migration
+
+_log = logging.getLogger(__name__)
+
+_PREFIX = "userbot:messages:"
+
+
+async def _main(redis: Redis) -> None:
+    async with redis:
+        keys = [
+            key.removeprefix(_PREFIX)
+            async for key in redis.scan_iter(match=f"{_PREFIX}*", _type="hash")
+        ]
+        _log.debug("Indexing %d notes", len(keys))
+        if keys:
+            await redis.sadd("userbot:notes", *keys)
+
+
+def main():
+    run_redis_migration(_main, _log)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
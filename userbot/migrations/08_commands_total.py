@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Count the total number of commands used from the per-command counters."""
+
+__all__ = []
+
+import logging
+
+from redis.asyncio import Redis
+
+from userbot.migrations._redis import run_redis_migration
+
+_log = logging.getLogger(__name__)
+
+
+async def _main(redis: Redis) -> None:
+    async with redis:
+        total = 0
+        async for _, count in redis.zscan_iter("userbot:commands", score_cast_func=int):
+            total += count
+        _log.debug("%d commands used in total", total)
+        # Don't overwrite the counter if the bot has already counted something
+        await redis.set("userbot:commands:total", total, nx=True)
+
+
+def main():
+    run_redis_migration(_main, _log)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""Make react2ban sets expire. Superseded by 10_expiring_entries.py, which sets the expiration of
+the sets while converting them to sorted sets, so there's nothing to do."""
+
+__all__ = []
+
+import logging
+
+_log = logging.getLogger(__name__)
+
+
+def main():
+    # Kept, so the storage version is still incremented one migration at a time
+    _log.info("Nothing to do, react2ban sets are converted by the next migration")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Convert react2ban sets to sorted sets with expiration time of each entry and make
+transcriptions expire."""
+
+__all__ = []
+
+import logging
+import time
+from datetime import timedelta
+
+from redis.asyncio import Redis
+
+from userbot.migrations._redis import run_redis_migration
+
+_log = logging.getLogger(__name__)
+
+_REACT2BAN_TTL = timedelta(days=30)
+_TRANSCRIPTION_TTL = timedelta(days=1)
+
+
+async def _main(redis: Redis) -> None:
+    async with redis:
+        now = time.time()
+        async for key in redis.scan_iter(match="userbot:react2ban:*", _type="set"):
+            # Sets made expiring by older versions keep their expiration
+            ttl = await redis.ttl(key)
+            if ttl < 0:
+                ttl = int(_REACT2BAN_TTL.total_seconds())
+            members = await redis.smembers(key)
+            _log.debug("Converting %r with %d entries", key, len(members))
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                if members:
+                    pipe.zadd(key, {member: now + ttl for member in members})
+                    pipe.expire(key, ttl)
+                await pipe.execute()
+        async for key in redis.scan_iter(match="userbot:transcriptions:*", _type="string"):
+            # Don't touch the keys which already expire
+            if await redis.ttl(key) == -1:
+                _log.debug("Setting expiry for %r", key)
+                await redis.expire(key, _TRANSCRIPTION_TTL)
+
+
+def main():
+    run_redis_migration(_main, _log)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -44,7 +44,8 @@ def main():
         _log.debug("Storage version is %02d", storage_version)
 
     for name in sorted(os.listdir("userbot/migrations")):
-        if name.endswith(".py") and name != "__main__.py":
+        # Other modules, e.g. `__main__.py` or helpers, are not prefixed with a number
+        if name.endswith(".py") and name[:2].isdigit():
             if storage_version >= int(name[:2]):
                 _log.info(f"Skipping {name}")
                 continue
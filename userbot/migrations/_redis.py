@@ -0,0 +1,32 @@
+"""Helpers for migrations of Redis storage."""
+
+__all__ = [
+    "run_redis_migration",
+]
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from redis.asyncio import Redis
+
+from userbot.config import RedisConfig, StorageConfig
+
+
+def run_redis_migration(migrate: Callable[[Redis], Awaitable[None]], log: logging.Logger) -> None:
+    """Runs the migration with a client connected to Redis from the config, skips it if another
+    storage is used."""
+    if StorageConfig.from_env().backend != "redis":
+        log.info("Redis storage is not used, skipping migration")
+        return
+    redis_config = RedisConfig.from_env()
+    password = redis_config.password.value if redis_config.password else None
+    redis = Redis(
+        host=redis_config.host,
+        port=redis_config.port,
+        db=redis_config.db,
+        password=password,
+        decode_responses=True,
+    )
+
+    asyncio.run(migrate(redis))
@@ -1,11 +1,19 @@
 __all__ = [
     "RedisStorage",
+    "SQLiteStorage",
     "Storage",
 ]
 
+import asyncio
 import json
 import logging
+import sqlite3
+import time
 from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
 from types import TracebackType
 from typing import (
     Any,
@@ -13,21 +21,45 @@ from typing import (
     Awaitable,
     Callable,
     Iterable,
+    Mapping,
     NoReturn,
     Self,
     TypeAlias,
     TypeVar,
 )
 
-from redis.asyncio import Redis
-from redis.asyncio.client import PubSub
+from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio.client import Pipeline, PubSub
+from redis.exceptions import ResponseError
 
-from .utils import StickerInfo
+from .utils import CommandUsage, StickerInfo, UserInfo, normalize_emoji
 
 _T = TypeVar("_T", bound="Storage")
+_R = TypeVar("_R")
 _StickerCache: TypeAlias = dict[str, list[StickerInfo]]
 _StickerCacheProvider: TypeAlias = Callable[[], Awaitable[_StickerCache]]
 
+# Per-day command stats older than this are removed
+_COMMAND_STATS_TTL = timedelta(days=90)
+# Max number of emojis which stickers are kept in memory
+_STICKER_CACHE_LRU_SIZE = 128
+# Field of the sticker cache hash which is always set, not an emoji
+_STICKER_CACHE_MARKER = ""
+# Kinds of sets of IDs that are kept in memory and their Redis types, sorted sets are used for
+# entries expiring separately, scores are expiration timestamps.
+# See `RedisStorage._sync_local_cache`.
+_CACHED_SETS = {"hooks": "set", "react2ban": "zset"}
+# Keyspace events of the cached sets are collected for this many seconds before reloading them
+_CACHE_EVENTS_DELAY = 0.05
+# Keyspace events the storage listens to. K: keyspace events, g: generic commands (DEL, ...),
+# s: set commands, h: hash commands, z: sorted set commands, x: expired keys, $: string commands
+_KEYSPACE_EVENTS = "Kgshzx$"
+# Event classes included in "A"
+_ALL_KEYSPACE_EVENTS = "g$lshzxetd"
+# Kinds of keys which values are cached by `_ClientCache` when it's enabled
+_CLIENT_CACHED_KEYS = ("chat_hooks", "messages", "groups", "transcriptions")
+_MISSING: Any = object()
+
 _log = logging.getLogger(__name__)
 
 
@@ -74,8 +106,18 @@ class Storage(ABC):
         pass
 
     @abstractmethod
-    async def add_react2ban(self, chat_id: int, message_id: int) -> None:
-        _log.debug("react2ban is enabled in chat %d on message %d", chat_id, message_id)
+    async def add_react2ban(
+        self,
+        chat_id: int,
+        message_id: int,
+        ttl: int = 30 * 24 * 60 * 60,
+    ) -> None:
+        _log.debug(
+            "react2ban is enabled in chat %d on message %d for %d seconds",
+            chat_id,
+            message_id,
+            ttl,
+        )
 
     @abstractmethod
     async def remove_react2ban(self, chat_id: int, message_id: int) -> None:
@@ -86,7 +128,16 @@ class Storage(ABC):
         pass
 
     @abstractmethod
-    async def wait_sticker_cache(self) -> _StickerCache:
+    async def has_sticker_cache(self) -> bool:
+        pass
+
+    @abstractmethod
+    async def get_cached_stickers(self, emoji: str) -> list[StickerInfo] | None:
+        """Returns stickers matching the emoji, `None` if the sticker cache is empty."""
+        pass
+
+    @abstractmethod
+    async def wait_sticker_cache(self) -> None:
         pass
 
     @abstractmethod
@@ -113,6 +164,11 @@ class Storage(ABC):
     async def saved_notes(self) -> AsyncIterable[str]:
         yield
 
+    @abstractmethod
+    async def list_notes(self) -> AsyncIterable[tuple[str, str]]:
+        """Yields keys of all saved notes with their types."""
+        yield
+
     @abstractmethod
     async def delete_note(self, key: str) -> None:
         _log.debug("%r note deleted", key)
@@ -134,8 +190,27 @@ class Storage(ABC):
         pass
 
     @abstractmethod
-    async def command_used(self, command: str) -> None:
-        _log.debug("%r command used", command)
+    async def list_daily_command_usage(
+        self,
+        since: date,
+        until: date,
+    ) -> AsyncIterable[tuple[date, int]]:
+        """Yields the number of commands used on each day in the range, inclusive."""
+        yield
+
+    @abstractmethod
+    async def list_chat_command_usage(
+        self,
+        since: date,
+        until: date,
+        limit: int | None = None,
+    ) -> AsyncIterable[tuple[int, int]]:
+        """Yields chats where commands were used the most in the range, inclusive."""
+        yield
+
+    @abstractmethod
+    async def commands_used(self, counts: Mapping[CommandUsage, int]) -> None:
+        _log.debug("Command usages updated: %r", dict(counts))
 
     @abstractmethod
     async def add_users_to_group(self, user_ids: Iterable[int], group_name: str) -> None:
@@ -154,7 +229,12 @@ class Storage(ABC):
         _log.debug("Users %r removed from group %r", set(user_ids), group_name)
 
     @abstractmethod
-    async def save_transcription(self, transcription_id: int, message_id: int) -> None:
+    async def save_transcription(
+        self,
+        transcription_id: int,
+        message_id: int,
+        ttl: int = 24 * 60 * 60,
+    ) -> None:
         pass
 
     @abstractmethod
@@ -165,82 +245,493 @@ class Storage(ABC):
     async def delete_transcription(self, transcription_id: int) -> None:
         pass
 
+    @abstractmethod
+    async def get_cached_users(self, user_ids: Iterable[int]) -> dict[int, UserInfo]:
+        """Returns the cached info of the users found by their IDs."""
+        pass
+
+    @abstractmethod
+    async def put_cached_users(self, users: Iterable[UserInfo], ttl: int) -> None:
+        pass
+
+    @abstractmethod
+    async def get_checkpoint(self, name: str) -> int | None:
+        """Returns the progress saved by a long-running job to resume it later."""
+        pass
+
+    @abstractmethod
+    async def save_checkpoint(self, name: str, value: int, ttl: int = 24 * 60 * 60) -> None:
+        _log.debug("Checkpoint %r saved: %d", name, value)
+
+    @abstractmethod
+    async def delete_checkpoint(self, name: str) -> None:
+        _log.debug("Checkpoint %r deleted", name)
+
+    @abstractmethod
+    async def compact(self) -> int:
+        """Removes expired entries which are not removed automatically, returns their number."""
+        pass
+
+
+class _ClientCache:
+    """Bounded LRU store of values read from Redis with hit and miss counters."""
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._values: OrderedDict[str, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Incremented on every invalidation, so a value read before it is not stored after it
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: str) -> Any:
+        """Returns the cached value or `_MISSING`."""
+        value = self._values.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._values.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any, version: int) -> None:
+        if version != self.version:
+            return
+        self._values[key] = value
+        if len(self._values) > self._max_size:
+            self._values.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        self.version += 1
+        self._values.pop(key, None)
+
+    def clear(self) -> None:
+        self.version += 1
+        self._values.clear()
+
 
 class RedisStorage(Storage):
-    def __init__(self, host: str, port: int, db: int, password: str | None = None) -> None:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int,
+        password: str | None = None,
+        *,
+        client_cache_size: int = 0,
+        namespace: str = "userbot",
+        connection_pool: ConnectionPool | None = None,
+    ) -> None:
+        """Redis storage.
+
+        If `client_cache_size` is positive, up to this many notes, groups, transcriptions and lists
+        of hooks enabled in chats are cached locally. The cache is kept correct even if the data is
+        changed by another process by using Redis server-assisted client side caching.
+
+        All the keys are prefixed with `namespace`, so several storages can share a database.
+        If `connection_pool` is given, it's used instead of creating a new one and it's not closed
+        with the storage, see `namespaced()`.
+        """
         self._host = host
         self._port = port
         self._db = db
         self._password = password
+        self._namespace = namespace
+        self._client_cache_size = client_cache_size
         self._pool: Redis[str] = Redis(
             host=host,
             port=port,
             db=db,
             password=password,
             decode_responses=True,
+            connection_pool=connection_pool,
         )
         self._pubsub = self._pool.pubsub(ignore_subscribe_messages=True)
+        # set kind -> key suffix -> IDs, `None` if the cache is not in sync with Redis, e.g.
+        # "hooks" -> hook name -> chat IDs, "react2ban" -> chat ID -> message ID -> expiration time
+        self._sets_cache: dict[str, dict[str, set[int] | dict[int, float]]] | None = None
+        # chat ID -> language, filled on demand, `None` if the cache is not in sync with Redis
+        self._languages_cache: dict[int, str | None] | None = None
+        # Incremented on every change, so a value read before the change is not cached after it
+        self._languages_version = 0
+        self._cache_pubsub = self._pool.pubsub(ignore_subscribe_messages=True)
+        self._cache_task: asyncio.Task[NoReturn] | None = None
+        self._client_cache = _ClientCache(client_cache_size) if client_cache_size > 0 else None
+        # Client cache is used only while invalidation messages are received
+        self._client_cache_synced = False
+        self._client_cache_task: asyncio.Task[NoReturn] | None = None
+        # Whether changes made by others can be followed with keyspace events
+        self._keyspace_events = False
+        # normalized emoji -> stickers, `None` if the cache is not in sync with Redis
+        self._stickers_lru: OrderedDict[str, list[StickerInfo]] | None = None
         super().__init__()
 
     async def connect(self) -> None:
         if not await self._pool.ping():
             raise RuntimeError("Redis server is not available")
-        await self._pool.config_set("notify-keyspace-events", "Kx$")
+        self._keyspace_events = await self._enable_keyspace_events()
+        if self._keyspace_events:
+            await self._sync_local_cache(self._cache_pubsub)
+            self._cache_task = asyncio.create_task(
+                self._local_cache_listener(self._cache_pubsub),
+            )
+        if self._client_cache is not None:
+            self._client_cache_task = asyncio.create_task(self._client_cache_listener())
         await super().connect()
 
     async def close(self) -> None:
+        self._stickers_lru = None
+        # Listeners must be stopped before the connections they use are closed
+        for task in (self._cache_task, self._client_cache_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._cache_task = None
+        self._client_cache_task = None
+        if self._client_cache is not None:
+            _log.debug("Client cache stats: %r", self.client_cache_stats())
+        self._sets_cache = None
+        self._languages_cache = None
+        await self._cache_pubsub.reset()
         await self._pubsub.reset()
         await self._pool.close()
         await super().close()
 
-    @staticmethod
-    def _key(*parts: Any) -> str:
-        return "userbot:" + ":".join(map(str, parts))
+    async def _enable_keyspace_events(self) -> bool:
+        """Enables the keyspace events needed to keep local caches in sync, keeping the ones other
+        clients of the server may need. Returns whether the events are surely enabled."""
+        try:
+            config = await self._pool.config_get("notify-keyspace-events")
+            current = config.get("notify-keyspace-events", "")
+            enabled = set(current)
+            if "A" in enabled:
+                enabled.update(_ALL_KEYSPACE_EVENTS)
+            if missing := "".join(flag for flag in _KEYSPACE_EVENTS if flag not in enabled):
+                await self._pool.config_set("notify-keyspace-events", current + missing)
+        except ResponseError:
+            # CONFIG is often disabled by managed Redis providers
+            _log.warning(
+                "Cannot check or enable keyspace events, make sure notify-keyspace-events"
+                " includes %r on the server. Sets cache is disabled, the sticker cache is polled",
+                _KEYSPACE_EVENTS,
+                exc_info=True,
+            )
+            return False
+        return True
+
+    def _key(self, *parts: Any) -> str:
+        return ":".join((self._namespace, *map(str, parts)))
+
+    def namespaced(self, namespace: str) -> "RedisStorage":
+        """Returns a storage keeping its data under another namespace, but using the connection
+        pool of this one. The pool is closed with this storage, so it must be closed last."""
+        return RedisStorage(
+            self._host,
+            self._port,
+            self._db,
+            self._password,
+            client_cache_size=self._client_cache_size,
+            namespace=namespace,
+            connection_pool=self._pool.connection_pool,
+        )
+
+    def client_cache_stats(self) -> dict[str, int] | None:
+        """Returns hits, misses and size of the client cache, `None` if it's disabled."""
+        if self._client_cache is None:
+            return None
+        return {
+            "hits": self._client_cache.hits,
+            "misses": self._client_cache.misses,
+            "size": len(self._client_cache),
+        }
+
+    async def _client_cache_listener(self) -> NoReturn:
+        """Invalidates the client cache when cached keys are changed by anyone.
+
+        Invalidation messages are received with RESP2 `CLIENT TRACKING` in broadcasting mode: the
+        connection subscribes to `__redis__:invalidate` and redirects its own invalidations there,
+        so no keys need to be tracked per connection.
+        """
+        prefixes = [arg for kind in _CLIENT_CACHED_KEYS for arg in ("PREFIX", self._key(kind, ""))]
+        while True:
+            connection = None
+            try:
+                connection = await self._pool.connection_pool.get_connection("_")
+                await connection.send_command("CLIENT", "ID")
+                client_id = await connection.read_response()
+                await connection.send_command(
+                    "CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefixes
+                )
+                await connection.read_response()
+                await connection.send_command("SUBSCRIBE", "__redis__:invalidate")
+                await connection.read_response()
+                self._client_cache_synced = True
+                _log.debug("Client cache enabled")
+                while True:
+                    _, _, keys = await connection.read_response()
+                    if keys is None:
+                        # The database is flushed
+                        self._client_cache.clear()
+                        continue
+                    for key in keys:
+                        self._client_cache.invalidate(key)
+            except Exception:
+                _log.warning("Client cache is out of sync, reconnecting...", exc_info=True)
+            finally:
+                # Values may be changed while there's no connection
+                self._client_cache_synced = False
+                self._client_cache.clear()
+                if connection is not None:
+                    # The connection is in subscribed state, don't return it to the pool
+                    await connection.disconnect()
+            await asyncio.sleep(1)
+
+    async def _cached(self, key: str, load: Callable[[], Awaitable[_R]]) -> _R:
+        """Returns the value for the key from the client cache or loads it."""
+        cache = self._client_cache
+        if cache is None or not self._client_cache_synced:
+            return await load()
+        if (value := cache.get(key)) is not _MISSING:
+            return value
+        version = cache.version
+        value = await load()
+        if self._client_cache_synced:
+            cache.put(key, value, version)
+        return value
+
+    def _invalidate(self, *keys: str) -> None:
+        """Removes the keys from the client cache after they're changed by this instance.
+
+        Invalidation messages are received asynchronously, so without this the old value may be
+        read right after the change.
+        """
+        if self._client_cache is not None:
+            for key in keys:
+                self._client_cache.invalidate(key)
+
+    async def _load_members(self, key: str) -> tuple[str, ...]:
+        return tuple(await self._pool.smembers(key))
+
+    async def _load_set(self, kind: str, name: str) -> set[int] | dict[int, float]:
+        """Loads set members, members of sorted sets are loaded with their scores."""
+        key = self._key(kind, name)
+        if _CACHED_SETS[kind] == "zset":
+            members = await self._pool.zrange(key, 0, -1, withscores=True)
+            return {int(member): score for member, score in members}
+        return set(map(int, await self._pool.smembers(key)))
+
+    async def _load_sets(
+        self,
+        sets: Iterable[tuple[str, str]],
+    ) -> list[set[int] | dict[int, float]]:
+        """Loads members of the sets of (kind, name) in one round trip."""
+        async with self._pool.pipeline(transaction=False) as pipe:
+            for kind, name in sets:
+                if _CACHED_SETS[kind] == "zset":
+                    pipe.zrange(self._key(kind, name), 0, -1, withscores=True)
+                else:
+                    pipe.smembers(self._key(kind, name))
+            results = await pipe.execute()
+        return [
+            (
+                {int(member): score for member, score in result}
+                if isinstance(result, list)
+                else set(map(int, result))
+            )
+            for result in results
+        ]
+
+    async def _sync_local_cache(self, pubsub: PubSub) -> None:
+        """Loads all sets of `_CACHED_SETS` kinds to the local cache and subscribes to their
+        changes and changes of chat languages."""
+        patterns = [self._key(kind, "*") for kind in (*_CACHED_SETS, "language")]
+        # Subscribe before loading, so no change is missed in between
+        await pubsub.psubscribe(*(f"__keyspace@{self._db}__:{pattern}" for pattern in patterns))
+        self._languages_cache = {}
+        cache: dict[str, dict[str, set[int] | dict[int, float]]] = {}
+        for (kind, type_), pattern in zip(_CACHED_SETS.items(), patterns):
+            sets = cache[kind] = {}
+            async for key in self._pool.scan_iter(match=pattern, _type=type_):
+                name = key.rsplit(":", 1)[-1]
+                sets[name] = await self._load_set(kind, name)
+        self._sets_cache = cache
+        _log.debug("Sets cache loaded: %r", {kind: len(sets) for kind, sets in cache.items()})
+
+    async def _local_cache_listener(self, pubsub: PubSub) -> NoReturn:
+        """Keeps the local cache in sync with Redis using keyspace events."""
+        while True:
+            try:
+                if self._sets_cache is None:
+                    await pubsub.reset()
+                    await self._sync_local_cache(pubsub)
+                while True:
+                    # Bulk changes send an event per member, each changed set is reloaded once
+                    changed: set[tuple[str, str]] = set()
+                    message = await pubsub.get_message(timeout=None)
+                    deadline = time.monotonic() + _CACHE_EVENTS_DELAY
+                    while message is not None:
+                        kind, name = message["channel"].rsplit(":", 2)[-2:]
+                        if kind == "language":
+                            self._languages_version += 1
+                            self._languages_cache.pop(int(name), None)
+                        else:
+                            changed.add((kind, name))
+                        if (timeout := deadline - time.monotonic()) <= 0:
+                            break
+                        message = await pubsub.get_message(timeout=timeout)
+                    for (kind, name), members in zip(changed, await self._load_sets(changed)):
+                        if members:
+                            self._sets_cache[kind][name] = members
+                        else:
+                            # Deleted or expired
+                            self._sets_cache[kind].pop(name, None)
+            except Exception:
+                # Any error leaves the cache out of sync, e.g. a key of unexpected type or a
+                # failed reload, so it's not trusted anymore
+                _log.warning("Sets cache is out of sync, reloading it...", exc_info=True)
+            # Fall back to Redis queries until synced again
+            self._sets_cache = None
+            self._languages_cache = None
+            await asyncio.sleep(1)
 
     async def enable_hook(self, name: str, chat_id: int) -> None:
-        await self._pool.sadd(self._key("hooks", name), chat_id)
+        # Hook -> chats set and its reverse index, chat -> hooks set, are updated atomically
+        async with self._pool.pipeline(transaction=True) as pipe:
+            pipe.sadd(self._key("hooks", name), chat_id)
+            pipe.sadd(self._key("chat_hooks", chat_id), name)
+            await pipe.execute()
+        self._invalidate(self._key("chat_hooks", chat_id))
+        if self._sets_cache is not None:
+            self._sets_cache["hooks"].setdefault(name, set()).add(chat_id)
         await super().enable_hook(name, chat_id)
 
     async def disable_hook(self, name: str, chat_id: int) -> None:
-        await self._pool.srem(self._key("hooks", name), chat_id)
+        async with self._pool.pipeline(transaction=True) as pipe:
+            pipe.srem(self._key("hooks", name), chat_id)
+            pipe.srem(self._key("chat_hooks", chat_id), name)
+            await pipe.execute()
+        self._invalidate(self._key("chat_hooks", chat_id))
+        if self._sets_cache is not None:
+            self._sets_cache["hooks"].get(name, set()).discard(chat_id)
         await super().disable_hook(name, chat_id)
 
     async def is_hook_enabled(self, name: str, chat_id: int) -> bool:
+        if self._sets_cache is not None:
+            return chat_id in self._sets_cache["hooks"].get(name, ())
         return await self._pool.sismember(self._key("hooks", name), chat_id)
 
     async def list_enabled_hooks(self, chat_id: int) -> AsyncIterable[str]:
-        async for hook in self._pool.scan_iter(match=self._key("hooks", "*"), _type="set"):
-            hook_name = hook.rsplit(":", 1)[-1]
-            if await self.is_hook_enabled(hook_name, chat_id):
-                yield hook_name
+        key = self._key("chat_hooks", chat_id)
+        for hook_name in await self._cached(key, lambda: self._load_members(key)):
+            yield hook_name
 
     async def is_react2ban_enabled(self, chat_id: int, message_id: int) -> bool:
-        return await self._pool.sismember(self._key("react2ban", chat_id), message_id)
-
-    async def add_react2ban(self, chat_id: int, message_id: int) -> None:
-        await self._pool.sadd(self._key("react2ban", chat_id), message_id)
-        await super().add_react2ban(chat_id, message_id)
+        # Called on every reaction in every chat, so most of the calls are answered from memory
+        if self._sets_cache is not None:
+            expires_at = self._sets_cache["react2ban"].get(str(chat_id), {}).get(message_id)
+        else:
+            expires_at = await self._pool.zscore(self._key("react2ban", chat_id), message_id)
+        return expires_at is not None and expires_at > time.time()
+
+    async def add_react2ban(
+        self,
+        chat_id: int,
+        message_id: int,
+        ttl: int = 30 * 24 * 60 * 60,
+    ) -> None:
+        key = self._key("react2ban", chat_id)
+        expires_at = time.time() + ttl
+
+        async def add(pipe: Pipeline) -> None:
+            # The set itself expires when its last entry does, expired entries of the set which
+            # is still in use are removed by `compact()`
+            current_ttl = await pipe.ttl(key)
+            pipe.multi()
+            pipe.zadd(key, {message_id: expires_at})
+            if current_ttl < ttl:
+                pipe.expire(key, ttl)
+
+        await self._pool.transaction(add, key)
+        if self._sets_cache is not None:
+            self._sets_cache["react2ban"].setdefault(str(chat_id), {})[message_id] = expires_at
+        await super().add_react2ban(chat_id, message_id, ttl)
 
     async def remove_react2ban(self, chat_id: int, message_id: int) -> None:
-        await self._pool.srem(self._key("react2ban", chat_id), message_id)
+        await self._pool.zrem(self._key("react2ban", chat_id), message_id)
+        if self._sets_cache is not None:
+            self._sets_cache["react2ban"].get(str(chat_id), {}).pop(message_id, None)
         await super().remove_react2ban(chat_id, message_id)
 
     async def get_sticker_cache(self) -> _StickerCache:
-        cache = await self._pool.get(self._key("stickers"))
-        if cache is None:
-            return {}
-        return json.loads(cache)
-
-    async def wait_sticker_cache(self) -> _StickerCache:
+        cache = await self._pool.hgetall(self._key("stickers", "by_emoji"))
+        return {
+            emoji: json.loads(stickers)
+            for emoji, stickers in cache.items()
+            if emoji != _STICKER_CACHE_MARKER
+        }
+
+    async def has_sticker_cache(self) -> bool:
+        return bool(await self._pool.exists(self._key("stickers", "by_emoji")))
+
+    async def get_cached_stickers(self, emoji: str) -> list[StickerInfo] | None:
+        emoji = normalize_emoji(emoji)
+        # The LRU is replaced on invalidation, so a stale result is never put to the new one
+        lru = self._stickers_lru
+        if lru is not None and (stickers := lru.get(emoji)) is not None:
+            lru.move_to_end(emoji)
+            return stickers
+        key = self._key("stickers", "by_emoji")
+        async with self._pool.pipeline(transaction=False) as pipe:
+            pipe.exists(key)
+            pipe.hget(key, emoji)
+            exists, stickers_raw = await pipe.execute()
+        if not exists:
+            return None
+        stickers = json.loads(stickers_raw) if stickers_raw is not None else []
+        if lru is not None and lru is self._stickers_lru:
+            lru[emoji] = stickers
+            if len(lru) > _STICKER_CACHE_LRU_SIZE:
+                lru.popitem(last=False)
+        return stickers
+
+    async def wait_sticker_cache(self) -> None:
         pubsub: PubSub
+        key = self._key("stickers", "by_emoji")
         async with self._pool.pubsub(ignore_subscribe_messages=True) as pubsub:
-            await pubsub.subscribe(f"__keyspace@{self._db}__:{self._key('stickers')}")
-            async for message in pubsub.listen():
-                if message["data"] == "set":
-                    return await self.get_sticker_cache()
+            await pubsub.subscribe(f"__keyspace@{self._db}__:{key}")
+            while not await self.has_sticker_cache():
+                # Checked every second too, keyspace events may be disabled on the server
+                await pubsub.get_message(timeout=1)
 
     async def put_sticker_cache(self, data: _StickerCache, ttl: int = 3600) -> None:
-        await self._pool.set(self._key("stickers"), json.dumps(data, ensure_ascii=False), ex=ttl)
+        by_emoji: dict[str, list[StickerInfo]] = {}
+        for emoji, stickers in data.items():
+            by_emoji.setdefault(normalize_emoji(emoji), []).extend(stickers)
+        key = self._key("stickers", "by_emoji")
+        async with self._pool.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(
+                key,
+                mapping={
+                    # The hash exists and expires even if there are no stickers
+                    _STICKER_CACHE_MARKER: "[]",
+                    **{
+                        emoji: json.dumps(stickers, ensure_ascii=False)
+                        for emoji, stickers in by_emoji.items()
+                    },
+                },
+            )
+            pipe.expire(key, ttl)
+            await pipe.execute()
+        if self._stickers_lru is not None:
+            self._stickers_lru = OrderedDict()
         await super().put_sticker_cache(data, ttl)
 
     async def sticker_cache_job(
@@ -249,40 +740,88 @@ class RedisStorage(Storage):
         ttl: int = 3600,
     ) -> NoReturn:
         await super().sticker_cache_job(provider, ttl)
-        key = self._key("stickers")
+        key = self._key("stickers", "by_emoji")
+        if not self._keyspace_events:
+            while True:
+                # -2 if there's no cache, -1 if it doesn't expire
+                if (expires_in := await self._pool.ttl(key)) == -2:
+                    _log.debug("Sticker cache expired, updating...")
+                    await self.put_sticker_cache(await provider(), ttl)
+                    continue
+                await asyncio.sleep(expires_in if expires_in > 0 else ttl)
         await self._pubsub.subscribe(f"__keyspace@{self._db}__:{key}")
-        async for message in self._pubsub.listen():
-            if message["data"] != "expired":
-                continue
-            _log.debug("Sticker cache expired, updating...")
-            await self.put_sticker_cache(await provider(), ttl)
-
-    async def get_note(self, key: str) -> tuple[str, str] | None:
+        # Stickers may be kept in memory only while their changes are listened to
+        self._stickers_lru = OrderedDict()
+        try:
+            async for message in self._pubsub.listen():
+                self._stickers_lru = OrderedDict()
+                if message["data"] != "expired":
+                    continue
+                _log.debug("Sticker cache expired, updating...")
+                await self.put_sticker_cache(await provider(), ttl)
+        finally:
+            self._stickers_lru = None
+
+    async def _load_note(self, key: str) -> tuple[str, str] | None:
         data = await self._pool.hgetall(self._key("messages", key))
         if not data:
             return None
         return data["content"], data["type"]
 
+    async def get_note(self, key: str) -> tuple[str, str] | None:
+        return await self._cached(self._key("messages", key), lambda: self._load_note(key))
+
     async def save_note(self, key: str, content: str, message_type: str) -> None:
-        await self._pool.hset(
-            self._key("messages", key),
-            mapping={"content": content, "type": message_type},
-        )
+        # Note keys are indexed in a separate set to list them without scanning the keyspace
+        async with self._pool.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                self._key("messages", key),
+                mapping={"content": content, "type": message_type},
+            )
+            pipe.sadd(self._key("notes"), key)
+            await pipe.execute()
+        self._invalidate(self._key("messages", key))
         await super().save_note(key, content, message_type)
 
     async def saved_notes(self) -> AsyncIterable[str]:
-        async for key in self._pool.scan_iter(match=self._key("messages", "*"), _type="hash"):
-            yield key.rsplit(":", 1)[-1]
+        for key in await self._pool.smembers(self._key("notes")):
+            yield key
+
+    async def list_notes(self) -> AsyncIterable[tuple[str, str]]:
+        keys = sorted(await self._pool.smembers(self._key("notes")))
+        if not keys:
+            return
+        async with self._pool.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hget(self._key("messages", key), "type")
+            types = await pipe.execute()
+        for key, type_ in zip(keys, types):
+            if type_ is not None:
+                yield key, type_
 
     async def delete_note(self, key: str) -> None:
-        await self._pool.delete(self._key("messages", key))
+        async with self._pool.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key("messages", key))
+            pipe.srem(self._key("notes"), key)
+            await pipe.execute()
+        self._invalidate(self._key("messages", key))
         await super().delete_note(key)
 
     async def get_chat_language(self, chat_id: int) -> str | None:
-        return await self._pool.get(self._key("language", chat_id))
+        # Called for every command, hook and shortcut, so most of the calls are answered from memory
+        if self._languages_cache is not None and chat_id in self._languages_cache:
+            return self._languages_cache[chat_id]
+        version = self._languages_version
+        language = await self._pool.get(self._key("language", chat_id))
+        if self._languages_cache is not None and version == self._languages_version:
+            self._languages_cache[chat_id] = language
+        return language
 
     async def set_chat_language(self, chat_id: int, language: str) -> None:
         await self._pool.set(self._key("language", chat_id), language)
+        self._languages_version += 1
+        if self._languages_cache is not None:
+            self._languages_cache[chat_id] = language
         await super().set_chat_language(chat_id, language)
 
     async def list_command_usage(self, limit: int | None = None) -> AsyncIterable[tuple[str, int]]:
@@ -300,21 +839,78 @@ class RedisStorage(Storage):
             yield item[0], item[1]
 
     async def get_total_command_usage(self) -> int:
-        total = 0
-        async for _, count in self._pool.zscan_iter(self._key("commands"), score_cast_func=int):
-            total += count
-        return total
+        return int(await self._pool.get(self._key("commands", "total")) or 0)
 
-    async def command_used(self, command: str) -> None:
-        await self._pool.zincrby(self._key("commands"), 1, command)
-        await super().command_used(command)
+    async def list_daily_command_usage(
+        self,
+        since: date,
+        until: date,
+    ) -> AsyncIterable[tuple[date, int]]:
+        days = [since + timedelta(days=i) for i in range((until - since).days + 1)]
+        if not days:
+            return
+        counts = await self._pool.mget(
+            [self._key("commands", "day", day.isoformat()) for day in days],
+        )
+        for day, count in zip(days, counts):
+            yield day, int(count or 0)
+
+    async def list_chat_command_usage(
+        self,
+        since: date,
+        until: date,
+        limit: int | None = None,
+    ) -> AsyncIterable[tuple[int, int]]:
+        keys = [
+            self._key("commands", "day", (since + timedelta(days=i)).isoformat(), "chats")
+            for i in range((until - since).days + 1)
+        ]
+        if not keys:
+            return
+        top = await self._pool.zunion(keys, withscores=True)
+        top.sort(key=lambda item: item[1], reverse=True)
+        for chat_id, count in top[:limit]:
+            yield int(chat_id), int(count)
+
+    async def commands_used(self, counts: Mapping[CommandUsage, int]) -> None:
+        by_command: Counter[str] = Counter()
+        by_day: Counter[date] = Counter()
+        by_chat: Counter[tuple[date, int]] = Counter()
+        for usage, count in counts.items():
+            by_command[usage.command] += count
+            by_day[usage.day] += count
+            by_chat[usage.day, usage.chat_id] += count
+        # Total and breakdowns are updated atomically, so they're always consistent with each other
+        async with self._pool.pipeline(transaction=True) as pipe:
+            for command, count in by_command.items():
+                pipe.zincrby(self._key("commands"), count, command)
+            pipe.incrby(self._key("commands", "total"), by_command.total())
+            for day, count in by_day.items():
+                key = self._key("commands", "day", day.isoformat())
+                pipe.incrby(key, count)
+                pipe.expire(key, _COMMAND_STATS_TTL)
+            for (day, chat_id), count in by_chat.items():
+                key = self._key("commands", "day", day.isoformat(), "chats")
+                pipe.zincrby(key, count, chat_id)
+            for day in by_day:
+                pipe.expire(
+                    self._key("commands", "day", day.isoformat(), "chats"), _COMMAND_STATS_TTL
+                )
+            await pipe.execute()
+        await super().commands_used(counts)
 
     async def add_users_to_group(self, user_ids: Iterable[int], group_name: str) -> None:
         await self._pool.sadd(self._key("groups", group_name), *user_ids)
+        self._invalidate(self._key("groups", group_name))
         await super().add_users_to_group(user_ids, group_name)
 
     async def list_users_in_group(self, group_name: str) -> AsyncIterable[int]:
-        async for user_id in self._pool.sscan_iter(self._key("groups", group_name)):
+        if self._client_cache is None:
+            async for user_id in self._pool.sscan_iter(self._key("groups", group_name)):
+                yield int(user_id)
+            return
+        key = self._key("groups", group_name)
+        for user_id in await self._cached(key, lambda: self._load_members(key)):
             yield int(user_id)
 
     async def list_groups(self) -> AsyncIterable[str]:
@@ -323,18 +919,495 @@ class RedisStorage(Storage):
 
     async def remove_users_from_group(self, user_ids: Iterable[int], group_name: str) -> None:
         await self._pool.srem(self._key("groups", group_name), *user_ids)
+        self._invalidate(self._key("groups", group_name))
         await super().remove_users_from_group(user_ids, group_name)
 
-    async def save_transcription(self, transcription_id: int, message_id: int) -> None:
-        await self._pool.set(self._key("transcriptions", transcription_id), message_id)
-        await super().save_transcription(transcription_id, message_id)
+    async def save_transcription(
+        self,
+        transcription_id: int,
+        message_id: int,
+        ttl: int = 24 * 60 * 60,
+    ) -> None:
+        await self._pool.set(self._key("transcriptions", transcription_id), message_id, ex=ttl)
+        self._invalidate(self._key("transcriptions", transcription_id))
+        await super().save_transcription(transcription_id, message_id, ttl)
 
     async def get_transcription(self, transcription_id: int) -> int | None:
-        res = await self._pool.get(self._key("transcriptions", transcription_id))
+        key = self._key("transcriptions", transcription_id)
+        res = await self._cached(key, lambda: self._pool.get(key))
         if res is not None:
             return int(res)
         return None
 
     async def delete_transcription(self, transcription_id: int) -> None:
         await self._pool.delete(self._key("transcriptions", transcription_id))
+        self._invalidate(self._key("transcriptions", transcription_id))
         await super().delete_transcription(transcription_id)
+
+    async def get_cached_users(self, user_ids: Iterable[int]) -> dict[int, UserInfo]:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        values = await self._pool.mget([self._key("users", user_id) for user_id in user_ids])
+        return {
+            user_id: json.loads(value)
+            for user_id, value in zip(user_ids, values)
+            if value is not None
+        }
+
+    async def put_cached_users(self, users: Iterable[UserInfo], ttl: int) -> None:
+        async with self._pool.pipeline(transaction=False) as pipe:
+            for user in users:
+                pipe.set(
+                    self._key("users", user["id"]), json.dumps(user, ensure_ascii=False), ex=ttl
+                )
+            await pipe.execute()
+
+    async def get_checkpoint(self, name: str) -> int | None:
+        value = await self._pool.get(self._key("checkpoints", name))
+        return int(value) if value is not None else None
+
+    async def save_checkpoint(self, name: str, value: int, ttl: int = 24 * 60 * 60) -> None:
+        await self._pool.set(self._key("checkpoints", name), value, ex=ttl)
+        await super().save_checkpoint(name, value, ttl)
+
+    async def delete_checkpoint(self, name: str) -> None:
+        await self._pool.delete(self._key("checkpoints", name))
+        await super().delete_checkpoint(name)
+
+    async def compact(self) -> int:
+        # Other keys expire by themselves, only sorted sets may have expired entries
+        keys = [
+            key
+            async for key in self._pool.scan_iter(match=self._key("react2ban", "*"), _type="zset")
+        ]
+        if not keys:
+            return 0
+        now = time.time()
+        async with self._pool.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.zremrangebyscore(key, "-inf", now)
+            return sum(await pipe.execute())
+
+
+class SQLiteStorage(Storage):
+    """Storage keeping everything in an SQLite database in WAL mode.
+
+    Queries are run one at a time in a dedicated thread. There's no way to get notified about
+    changes made by other processes, so the database must be used by a single process only.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS hooks (
+            name TEXT NOT NULL,
+            chat_id INTEGER NOT NULL,
+            PRIMARY KEY (name, chat_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS hooks_chat_id ON hooks (chat_id);
+        CREATE TABLE IF NOT EXISTS react2ban (
+            chat_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (chat_id, message_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS stickers (
+            emoji TEXT PRIMARY KEY,
+            stickers TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS notes (
+            key TEXT PRIMARY KEY,
+            content TEXT NOT NULL,
+            type TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS languages (
+            chat_id INTEGER PRIMARY KEY,
+            language TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS command_usage (
+            command TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS daily_command_usage (
+            day TEXT NOT NULL,
+            chat_id INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, chat_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS groups (
+            name TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            PRIMARY KEY (name, user_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS transcriptions (
+            transcription_id INTEGER PRIMARY KEY,
+            message_id INTEGER NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        -- Cached info of users, see `userbot.utils.PeerCache`
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            info TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        -- Progress of long-running jobs, see `Storage.save_checkpoint`
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        -- Single values, like the total number of commands used
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value
+        );
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._executor: ThreadPoolExecutor | None = None
+        self._db: sqlite3.Connection | None = None
+        # Notified when the sticker cache is updated
+        self._stickers_updated = asyncio.Condition()
+        super().__init__()
+
+    def _connect(self) -> None:
+        self._db = sqlite3.connect(self._path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Safe in WAL mode, the database can't be corrupted, only the last transactions can be lost
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self._SCHEMA)
+
+    async def _run(self, func: Callable[..., _R], *args: Any) -> _R:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _fetchall(self, sql: str, *params: Any) -> list[tuple[Any, ...]]:
+        return await self._run(lambda: self._db.execute(sql, params).fetchall())
+
+    async def _fetchone(self, sql: str, *params: Any) -> tuple[Any, ...] | None:
+        return await self._run(lambda: self._db.execute(sql, params).fetchone())
+
+    async def _execute(self, *statements: tuple[str, Iterable[Any]]) -> None:
+        """Executes the statements in a single transaction."""
+
+        def execute() -> None:
+            with self._db:
+                for sql, params in statements:
+                    self._db.execute(sql, tuple(params))
+
+        await self._run(execute)
+
+    async def _executemany(self, sql: str, params: Iterable[Iterable[Any]]) -> None:
+        def executemany() -> None:
+            with self._db:
+                self._db.executemany(sql, params)
+
+        await self._run(executemany)
+
+    async def connect(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SQLiteStorage")
+        await self._run(self._connect)
+        await super().connect()
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._run(self._db.close)
+            self._db = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        await super().close()
+
+    async def enable_hook(self, name: str, chat_id: int) -> None:
+        await self._execute(("INSERT OR IGNORE INTO hooks VALUES (?, ?)", (name, chat_id)))
+        await super().enable_hook(name, chat_id)
+
+    async def disable_hook(self, name: str, chat_id: int) -> None:
+        await self._execute(("DELETE FROM hooks WHERE name = ? AND chat_id = ?", (name, chat_id)))
+        await super().disable_hook(name, chat_id)
+
+    async def is_hook_enabled(self, name: str, chat_id: int) -> bool:
+        sql = "SELECT 1 FROM hooks WHERE name = ? AND chat_id = ?"
+        return await self._fetchone(sql, name, chat_id) is not None
+
+    async def list_enabled_hooks(self, chat_id: int) -> AsyncIterable[str]:
+        for (name,) in await self._fetchall("SELECT name FROM hooks WHERE chat_id = ?", chat_id):
+            yield name
+
+    async def is_react2ban_enabled(self, chat_id: int, message_id: int) -> bool:
+        sql = "SELECT 1 FROM react2ban WHERE chat_id = ? AND message_id = ? AND expires_at > ?"
+        return await self._fetchone(sql, chat_id, message_id, time.time()) is not None
+
+    async def add_react2ban(
+        self,
+        chat_id: int,
+        message_id: int,
+        ttl: int = 30 * 24 * 60 * 60,
+    ) -> None:
+        sql = "INSERT OR REPLACE INTO react2ban VALUES (?, ?, ?)"
+        await self._execute((sql, (chat_id, message_id, time.time() + ttl)))
+        await super().add_react2ban(chat_id, message_id, ttl)
+
+    async def remove_react2ban(self, chat_id: int, message_id: int) -> None:
+        sql = "DELETE FROM react2ban WHERE chat_id = ? AND message_id = ?"
+        await self._execute((sql, (chat_id, message_id)))
+        await super().remove_react2ban(chat_id, message_id)
+
+    async def _sticker_cache_expires_at(self) -> float | None:
+        """Returns when the sticker cache expires, `None` if there's no cache or it's expired."""
+        row = await self._fetchone("SELECT value FROM meta WHERE key = 'stickers_expire_at'")
+        if row is None or row[0] <= time.time():
+            return None
+        return row[0]
+
+    async def get_sticker_cache(self) -> _StickerCache:
+        if await self._sticker_cache_expires_at() is None:
+            return {}
+        rows = await self._fetchall("SELECT emoji, stickers FROM stickers")
+        return {emoji: json.loads(stickers) for emoji, stickers in rows}
+
+    async def has_sticker_cache(self) -> bool:
+        return await self._sticker_cache_expires_at() is not None
+
+    async def get_cached_stickers(self, emoji: str) -> list[StickerInfo] | None:
+        if await self._sticker_cache_expires_at() is None:
+            return None
+        sql = "SELECT stickers FROM stickers WHERE emoji = ?"
+        row = await self._fetchone(sql, normalize_emoji(emoji))
+        return json.loads(row[0]) if row is not None else []
+
+    async def wait_sticker_cache(self) -> None:
+        # The lock is held while checking, so the notification can't be missed
+        async with self._stickers_updated:
+            while not await self.has_sticker_cache():
+                await self._stickers_updated.wait()
+
+    async def put_sticker_cache(self, data: _StickerCache, ttl: int = 3600) -> None:
+        by_emoji: dict[str, list[StickerInfo]] = {}
+        for emoji, stickers in data.items():
+            by_emoji.setdefault(normalize_emoji(emoji), []).extend(stickers)
+        expires_at = time.time() + ttl
+
+        def put() -> None:
+            with self._db:
+                self._db.execute("DELETE FROM stickers")
+                self._db.executemany(
+                    "INSERT INTO stickers VALUES (?, ?)",
+                    (
+                        (emoji, json.dumps(stickers, ensure_ascii=False))
+                        for emoji, stickers in by_emoji.items()
+                    ),
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('stickers_expire_at', ?)",
+                    (expires_at,),
+                )
+
+        await self._run(put)
+        async with self._stickers_updated:
+            self._stickers_updated.notify_all()
+        await super().put_sticker_cache(data, ttl)
+
+    async def sticker_cache_job(
+        self,
+        provider: _StickerCacheProvider,
+        ttl: int = 3600,
+    ) -> NoReturn:
+        await super().sticker_cache_job(provider, ttl)
+        # Update the cache every time it expires, like `RedisStorage` does
+        while True:
+            async with self._stickers_updated:
+                expires_at = await self._sticker_cache_expires_at()
+                timeout = None if expires_at is None else expires_at - time.time()
+                try:
+                    # Also wakes up when the cache is updated, then the expiry is checked again
+                    await asyncio.wait_for(self._stickers_updated.wait(), timeout)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+            _log.debug("Sticker cache expired, updating...")
+            await self.put_sticker_cache(await provider(), ttl)
+
+    async def get_note(self, key: str) -> tuple[str, str] | None:
+        return await self._fetchone("SELECT content, type FROM notes WHERE key = ?", key)
+
+    async def save_note(self, key: str, content: str, message_type: str) -> None:
+        sql = "INSERT OR REPLACE INTO notes VALUES (?, ?, ?)"
+        await self._execute((sql, (key, content, message_type)))
+        await super().save_note(key, content, message_type)
+
+    async def saved_notes(self) -> AsyncIterable[str]:
+        for (key,) in await self._fetchall("SELECT key FROM notes ORDER BY key"):
+            yield key
+
+    async def list_notes(self) -> AsyncIterable[tuple[str, str]]:
+        for key, type_ in await self._fetchall("SELECT key, type FROM notes ORDER BY key"):
+            yield key, type_
+
+    async def delete_note(self, key: str) -> None:
+        await self._execute(("DELETE FROM notes WHERE key = ?", (key,)))
+        await super().delete_note(key)
+
+    async def get_chat_language(self, chat_id: int) -> str | None:
+        row = await self._fetchone("SELECT language FROM languages WHERE chat_id = ?", chat_id)
+        return row[0] if row is not None else None
+
+    async def set_chat_language(self, chat_id: int, language: str) -> None:
+        sql = "INSERT OR REPLACE INTO languages VALUES (?, ?)"
+        await self._execute((sql, (chat_id, language)))
+        await super().set_chat_language(chat_id, language)
+
+    async def list_command_usage(self, limit: int | None = None) -> AsyncIterable[tuple[str, int]]:
+        sql = "SELECT command, count FROM command_usage ORDER BY count DESC, command DESC LIMIT ?"
+        for command, count in await self._fetchall(sql, -1 if limit is None else limit):
+            yield command, count
+
+    async def get_total_command_usage(self) -> int:
+        row = await self._fetchone("SELECT value FROM meta WHERE key = 'commands_total'")
+        return row[0] if row is not None else 0
+
+    async def list_daily_command_usage(
+        self,
+        since: date,
+        until: date,
+    ) -> AsyncIterable[tuple[date, int]]:
+        sql = (
+            "SELECT day, SUM(count) FROM daily_command_usage"
+            " WHERE day BETWEEN ? AND ? GROUP BY day"
+        )
+        counts = dict(await self._fetchall(sql, since.isoformat(), until.isoformat()))
+        for i in range((until - since).days + 1):
+            day = since + timedelta(days=i)
+            yield day, counts.get(day.isoformat(), 0)
+
+    async def list_chat_command_usage(
+        self,
+        since: date,
+        until: date,
+        limit: int | None = None,
+    ) -> AsyncIterable[tuple[int, int]]:
+        sql = (
+            "SELECT chat_id, SUM(count) AS total FROM daily_command_usage"
+            " WHERE day BETWEEN ? AND ? GROUP BY chat_id ORDER BY total DESC LIMIT ?"
+        )
+        params = (since.isoformat(), until.isoformat(), -1 if limit is None else limit)
+        for chat_id, count in await self._fetchall(sql, *params):
+            yield chat_id, count
+
+    async def commands_used(self, counts: Mapping[CommandUsage, int]) -> None:
+        by_command: Counter[str] = Counter()
+        by_chat: Counter[tuple[str, int]] = Counter()
+        for usage, count in counts.items():
+            by_command[usage.command] += count
+            by_chat[usage.day.isoformat(), usage.chat_id] += count
+        oldest_day = date.today() - _COMMAND_STATS_TTL
+
+        def update() -> None:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO command_usage VALUES (?, ?)"
+                    " ON CONFLICT (command) DO UPDATE SET count = count + excluded.count",
+                    by_command.items(),
+                )
+                self._db.execute(
+                    "INSERT INTO meta VALUES ('commands_total', ?)"
+                    " ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+                    (by_command.total(),),
+                )
+                self._db.executemany(
+                    "INSERT INTO daily_command_usage VALUES (?, ?, ?)"
+                    " ON CONFLICT (day, chat_id) DO UPDATE SET count = count + excluded.count",
+                    ((day, chat_id, count) for (day, chat_id), count in by_chat.items()),
+                )
+                self._db.execute(
+                    "DELETE FROM daily_command_usage WHERE day < ?",
+                    (oldest_day.isoformat(),),
+                )
+
+        await self._run(update)
+        await super().commands_used(counts)
+
+    async def add_users_to_group(self, user_ids: Iterable[int], group_name: str) -> None:
+        user_ids = list(user_ids)
+        sql = "INSERT OR IGNORE INTO groups VALUES (?, ?)"
+        await self._executemany(sql, ((group_name, user_id) for user_id in user_ids))
+        await super().add_users_to_group(user_ids, group_name)
+
+    async def list_users_in_group(self, group_name: str) -> AsyncIterable[int]:
+        sql = "SELECT user_id FROM groups WHERE name = ?"
+        for (user_id,) in await self._fetchall(sql, group_name):
+            yield user_id
+
+    async def list_groups(self) -> AsyncIterable[str]:
+        for (name,) in await self._fetchall("SELECT DISTINCT name FROM groups"):
+            yield name
+
+    async def remove_users_from_group(self, user_ids: Iterable[int], group_name: str) -> None:
+        user_ids = list(user_ids)
+        sql = "DELETE FROM groups WHERE name = ? AND user_id = ?"
+        await self._executemany(sql, ((group_name, user_id) for user_id in user_ids))
+        await super().remove_users_from_group(user_ids, group_name)
+
+    async def save_transcription(
+        self,
+        transcription_id: int,
+        message_id: int,
+        ttl: int = 24 * 60 * 60,
+    ) -> None:
+        sql = "INSERT OR REPLACE INTO transcriptions VALUES (?, ?, ?)"
+        await self._execute((sql, (transcription_id, message_id, time.time() + ttl)))
+        await super().save_transcription(transcription_id, message_id, ttl)
+
+    async def get_transcription(self, transcription_id: int) -> int | None:
+        sql = "SELECT message_id FROM transcriptions WHERE transcription_id = ? AND expires_at > ?"
+        row = await self._fetchone(sql, transcription_id, time.time())
+        return row[0] if row is not None else None
+
+    async def delete_transcription(self, transcription_id: int) -> None:
+        sql = "DELETE FROM transcriptions WHERE transcription_id = ?"
+        await self._execute((sql, (transcription_id,)))
+        await super().delete_transcription(transcription_id)
+
+    async def get_cached_users(self, user_ids: Iterable[int]) -> dict[int, UserInfo]:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        sql = (
+            f"SELECT user_id, info FROM users"
+            f" WHERE user_id IN ({', '.join('?' * len(user_ids))}) AND expires_at > ?"
+        )
+        rows = await self._fetchall(sql, *user_ids, time.time())
+        return {user_id: json.loads(info) for user_id, info in rows}
+
+    async def put_cached_users(self, users: Iterable[UserInfo], ttl: int) -> None:
+        expires_at = time.time() + ttl
+        await self._executemany(
+            "INSERT OR REPLACE INTO users VALUES (?, ?, ?)",
+            [(user["id"], json.dumps(user, ensure_ascii=False), expires_at) for user in users],
+        )
+
+    async def get_checkpoint(self, name: str) -> int | None:
+        sql = "SELECT value FROM checkpoints WHERE name = ? AND expires_at > ?"
+        row = await self._fetchone(sql, name, time.time())
+        return row[0] if row is not None else None
+
+    async def save_checkpoint(self, name: str, value: int, ttl: int = 24 * 60 * 60) -> None:
+        sql = "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)"
+        await self._execute((sql, (name, value, time.time() + ttl)))
+        await super().save_checkpoint(name, value, ttl)
+
+    async def delete_checkpoint(self, name: str) -> None:
+        await self._execute(("DELETE FROM checkpoints WHERE name = ?", (name,)))
+        await super().delete_checkpoint(name)
+
+    async def compact(self) -> int:
+        now = time.time()
+
+        def compact() -> int:
+            with self._db:
+                removed = 0
+                for table in ("react2ban", "transcriptions", "users", "checkpoints"):
+                    sql = f"DELETE FROM {table} WHERE expires_at <= ?"
+                    removed += self._db.execute(sql, (now,)).rowcount
+                return removed
+
+        return await self._run(compact)
@@ -1,8 +1,12 @@
 __all__ = [
     "AppLimits",
     "AppLimitsController",
+    "BulkProgress",
+    "BulkResult",
     "async_partial",
     "call_subprocess",
+    "CommandStatsBuffer",
+    "CommandUsage",
     "DialogCount",
     "edit_replied_or_reply",
     "fetch_stickers",
@@ -15,11 +19,18 @@ __all__ = [
     "gettext",
     "is_my_message",
     "json_value_to_python",
+    "lazy_import",
     "Limit",
     "ngettext",
+    "normalize_emoji",
     "parse_timespec",
+    "PeerCache",
     "react",
+    "request_priority",
+    "RequestPriority",
+    "RequestScheduler",
     "resolve_users",
+    "run_bulk",
     "SecretValue",
     "StatsController",
     "StickerFilter",
@@ -27,9 +38,12 @@ __all__ = [
     "SubprocessResult",
     "Translation",
     "Unset",
+    "UserInfo",
 ]
 
 from .app_config import AppLimits, AppLimitsController, Limit, get_app_limits
+from .bulk import BulkProgress, BulkResult, run_bulk
+from .command_stats import CommandStatsBuffer, CommandUsage
 from .dialogs import DialogCount, get_dialogs_count
 from .filters import StickerFilter
 from .messages import (
@@ -39,10 +53,12 @@ from .messages import (
     get_message_text,
     is_my_message,
 )
-from .misc import SecretValue, StatsController, Unset, async_partial
+from .misc import SecretValue, StatsController, Unset, async_partial, lazy_import
 from .os import SubprocessResult, call_subprocess
+from .peers import PeerCache, UserInfo
 from .reactions import react
-from .stickers import StickerInfo, fetch_stickers
+from .request_scheduler import RequestPriority, RequestScheduler, request_priority
+from .stickers import StickerInfo, fetch_stickers, normalize_emoji
 from .telegram_json import json_value_to_python
 from .time import format_timedelta, parse_timespec
 from .translations import Translation, gettext, ngettext
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+__all__ = [
+    "BulkProgress",
+    "BulkResult",
+    "run_bulk",
+]
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Generic, Iterable, TypeVar
+
+from .request_scheduler import RequestPriority, request_priority
+
+_T = TypeVar("_T")
+_log = logging.getLogger(__name__)
+
+
+@dataclass()
+class BulkProgress:
+    done: int = 0
+    failed: int = 0
+    # Unknown while the items are still being produced
+    total: int | None = None
+
+
+@dataclass()
+class BulkResult(Generic[_T]):
+    succeeded: list[_T] = field(default_factory=list)
+    failed: dict[_T, Exception] = field(default_factory=dict)
+
+
+async def _aiter(items: Iterable[_T] | AsyncIterable[_T]) -> AsyncIterable[_T]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def run_bulk(
+    items: Iterable[_T] | AsyncIterable[_T],
+    action: Callable[[_T], Awaitable[Any]],
+    *,
+    concurrency: int = 8,
+    on_progress: Callable[[BulkProgress], Awaitable[Any]] | None = None,
+    progress_interval: float = 5,
+) -> BulkResult[_T]:
+    """Calls `action` for every item, up to `concurrency` at once.
+
+    API requests made by `action` have bulk priority, so they don't slow down commands, and
+    FloodWaits are waited out by the request scheduler. Items are taken from `items` only when a
+    worker is free, so it may be a slow async iterable, e.g. paged members of a chat.
+
+    Errors are collected per item instead of stopping the whole run. `on_progress` is called every
+    `progress_interval` seconds if something has changed and once more when all the items are
+    done, its errors are logged and ignored.
+    """
+    if concurrency <= 0:
+        raise ValueError("`concurrency` must be positive")
+    result: BulkResult[_T] = BulkResult()
+    progress = BulkProgress()
+    queue: asyncio.Queue[_T] = asyncio.Queue(maxsize=concurrency)
+
+    async def produce() -> None:
+        produced = 0
+        async for item in _aiter(items):
+            await queue.put(item)
+            produced += 1
+        progress.total = produced
+
+    async def work() -> None:
+        while True:
+            item = await queue.get()
+            try:
+                await action(item)
+            except Exception as e:
+                result.failed[item] = e
+                progress.failed += 1
+            else:
+                result.succeeded.append(item)
+            finally:
+                progress.done += 1
+                queue.task_done()
+
+    async def notify() -> None:
+        try:
+            await on_progress(progress)
+        except Exception:
+            _log.warning("Failed to report bulk progress", exc_info=True)
+
+    async def report() -> None:
+        reported = None
+        while True:
+            await asyncio.sleep(progress_interval)
+            current = (progress.done, progress.failed, progress.total)
+            if current != reported:
+                reported = current
+                await notify()
+
+    reporter = asyncio.create_task(report()) if on_progress is not None else None
+    with request_priority(RequestPriority.BULK):
+        workers = [asyncio.create_task(work()) for _ in range(concurrency)]
+    try:
+        # The producer fails the whole run, e.g. when it can't get the next page of members
+        with request_priority(RequestPriority.BULK):
+            await produce()
+        await queue.join()
+    finally:
+        tasks = workers if reporter is None else [*workers, reporter]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    if on_progress is not None:
+        await notify()
+    return result
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+__all__ = [
+    "CommandStatsBuffer",
+    "CommandUsage",
+]
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import date, timedelta
+from types import TracebackType
+from typing import TYPE_CHECKING, AsyncIterable, NamedTuple, NoReturn, Self
+
+if TYPE_CHECKING:
+    from ..storage import Storage
+
+_log = logging.getLogger(__name__)
+
+
+class CommandUsage(NamedTuple):
+    """Usages of a command are counted per chat and per day."""
+
+    command: str
+    chat_id: int
+    day: date
+
+
+class CommandStatsBuffer:
+    """Counts command usages in memory and writes them to the storage in batches.
+
+    Counters are flushed every `flush_interval` seconds and when exiting the context manager, so
+    no more than `flush_interval` seconds of stats are lost if the process is killed. Stats read
+    through this class are the stored ones merged with the buffered ones, so they're always exact.
+    """
+
+    def __init__(self, storage: Storage, flush_interval: float = 30) -> None:
+        if flush_interval <= 0:
+            raise ValueError("`flush_interval` must be positive")
+        self._storage = storage
+        self._flush_interval = flush_interval
+        self._pending: Counter[CommandUsage] = Counter()
+        # Held while writing counters to the storage, so readers never count them twice or miss them
+        self._lock = asyncio.Lock()
+
+    @property
+    def flush_interval(self) -> float:
+        return self._flush_interval
+
+    def command_used(self, command: str, chat_id: int) -> None:
+        self._pending[CommandUsage(command, chat_id, date.today())] += 1
+
+    async def flush(self) -> None:
+        """Writes the buffered counters to the storage."""
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, Counter()
+            try:
+                await self._storage.commands_used(pending)
+            except Exception:
+                # Keep them to retry later, commands may have been used in the meantime
+                self._pending.update(pending)
+                raise
+
+    async def flush_job(self) -> NoReturn:
+        """Flushes the counters periodically."""
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                _log.warning("Failed to flush command stats, will retry later", exc_info=True)
+
+    async def list_command_usage(self, limit: int | None = None) -> AsyncIterable[tuple[str, int]]:
+        async with self._lock:
+            usage = Counter({cmd: count async for cmd, count in self._storage.list_command_usage()})
+            for item, count in self._pending.items():
+                usage[item.command] += count
+        for item in usage.most_common(limit):
+            yield item
+
+    async def list_daily_command_usage(self, days: int) -> AsyncIterable[tuple[date, int]]:
+        """Yields the number of commands used on each of the last `days` days, oldest first."""
+        until = date.today()
+        since = until - timedelta(days=days - 1)
+        async with self._lock:
+            usage = {
+                day: count
+                async for day, count in self._storage.list_daily_command_usage(since, until)
+            }
+            for item, count in self._pending.items():
+                if item.day in usage:
+                    usage[item.day] += count
+        for item in usage.items():
+            yield item
+
+    async def list_chat_command_usage(
+        self,
+        days: int,
+        limit: int | None = None,
+    ) -> AsyncIterable[tuple[int, int]]:
+        """Yields chats where commands were used the most in the last `days` days."""
+        until = date.today()
+        since = until - timedelta(days=days - 1)
+        async with self._lock:
+            usage = Counter(
+                {
+                    chat_id: count
+                    async for chat_id, count in self._storage.list_chat_command_usage(since, until)
+                }
+            )
+            for item, count in self._pending.items():
+                if since <= item.day <= until:
+                    usage[item.chat_id] += count
+        for item in usage.most_common(limit):
+            yield item
+
+    async def get_total_command_usage(self) -> int:
+        async with self._lock:
+            return await self._storage.get_total_command_usage() + sum(self._pending.values())
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            _log.exception(
+                "Failed to flush command stats, %d usages lost", sum(self._pending.values())
+            )
@@ -116,7 +116,6 @@ async def _list_all_dialogs(
                 hash=0,
                 exclude_pinned=True,
             ),
-            sleep_threshold=60,
         )
 
         dialogs: list[types.Dialog] = r.dialogs
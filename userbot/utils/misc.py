@@ -2,13 +2,17 @@ from __future__ import annotations
 
 __all__ = [
     "async_partial",
+    "lazy_import",
     "SecretValue",
     "StatsController",
     "Unset",
 ]
 
 import functools
+import importlib.util
+import sys
 import time
+from types import ModuleType
 from typing import Any, Awaitable, Callable, ClassVar, Generic, TypeVar
 
 _T = TypeVar("_T")
@@ -46,6 +50,25 @@ def async_partial(
     return wrapper
 
 
+def lazy_import(name: str) -> ModuleType:
+    """Imports a module lazily: it's executed on the first access to any of its attributes.
+
+    Useful for heavy dependencies needed only by a few commands. Extension modules are loaded
+    immediately, there's no way to defer it.
+    """
+    if (module := sys.modules.get(name)) is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
 class SecretValue(Generic[_CT]):
     """A value that hides itself in repr() and str().
 
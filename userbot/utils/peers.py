@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+__all__ = [
+    "PeerCache",
+    "UserInfo",
+]
+
+import logging
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Iterable, TypedDict
+
+from pyrogram import Client
+from pyrogram.raw.base import InputPeer
+from pyrogram.types import Chat, User
+
+if TYPE_CHECKING:
+    from ..storage import Storage
+
+_log = logging.getLogger(__name__)
+
+
+# It's a dict because I want to serialize it easily to JSON
+class UserInfo(TypedDict):
+    id: int
+    first_name: str | None
+    last_name: str | None
+    username: str | None
+    is_bot: bool | None
+    is_deleted: bool | None
+
+
+class _TTLCache:
+    """LRU cache which entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self._ttl = ttl
+        self._max_size = max_size
+        self._values: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Any | None:
+        entry = self._values.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._values[key]
+            self.misses += 1
+            return None
+        self._values.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Any, value: Any) -> None:
+        self._values[key] = (time.monotonic() + self._ttl, value)
+        self._values.move_to_end(key)
+        while len(self._values) > self._max_size:
+            self._values.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        self._values.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._values)}
+
+
+def _peer_key(peer_id: int | str) -> int | str:
+    """Makes the same key for all the forms of the same username."""
+    if isinstance(peer_id, str) and not peer_id.lstrip("-").isdecimal():
+        return peer_id.lower().removeprefix("@")
+    return int(peer_id)
+
+
+def _user_info(user: User) -> UserInfo:
+    return UserInfo(
+        id=user.id,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        username=user.username,
+        is_bot=user.is_bot,
+        is_deleted=user.is_deleted,
+    )
+
+
+class PeerCache:
+    """Caches peers, chats and users of the client for `ttl` seconds, so commands resolving the
+    same IDs again and again don't make API calls each time.
+
+    Up to `max_size` objects of each kind are kept in memory. If `storage` is given, users are
+    also saved there for `ttl` seconds, so they're not requested again after restart. Users read
+    from the storage have only the fields of `UserInfo` set.
+
+    Helpers taking an optional `peers` argument resolve peers through this cache if it's given
+    and through the client otherwise.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        storage: Storage | None = None,
+        *,
+        ttl: int = 600,
+        max_size: int = 1000,
+    ) -> None:
+        if ttl <= 0:
+            raise ValueError("`ttl` must be positive")
+        self._client = client
+        self._storage = storage
+        self._ttl = ttl
+        self._peers = _TTLCache(ttl, max_size)
+        self._chats = _TTLCache(ttl, max_size)
+        self._users = _TTLCache(ttl, max_size)
+        # Users missed in memory, but found in the storage
+        self._storage_hits = 0
+
+    @property
+    def client(self) -> Client:
+        return self._client
+
+    async def resolve_peer(self, peer_id: int | str) -> InputPeer:
+        """Same as `Client.resolve_peer`, but cached."""
+        key = _peer_key(peer_id)
+        if (peer := self._peers.get(key)) is None:
+            peer = await self._client.resolve_peer(peer_id)
+            self._peers.put(key, peer)
+        return peer
+
+    async def get_chat(self, chat_id: int | str) -> Chat:
+        """Same as `Client.get_chat`, but cached. Chats are not saved to the storage, as there's
+        too much info in them.
+
+        Fields changed by other admins, like `permissions` or `available_reactions`, may be
+        stale, so use `Client.get_chat` if they matter."""
+        key = _peer_key(chat_id)
+        if (chat := self._chats.get(key)) is None:
+            chat = await self._client.get_chat(chat_id)
+            self._chats.put(key, chat)
+            self._chats.put(chat.id, chat)
+        return chat
+
+    async def get_users(self, user_ids: Iterable[int]) -> list[User]:
+        """Same as `Client.get_users` with a list of IDs, but cached. Users not found in the
+        cache are requested at once."""
+        user_ids = list(user_ids)
+        users: dict[int, User] = {}
+        missing: list[int] = []
+        for user_id in user_ids:
+            if (user := self._users.get(user_id)) is not None:
+                users[user_id] = user
+            else:
+                missing.append(user_id)
+        if missing and self._storage is not None:
+            for user_id, info in (await self._storage.get_cached_users(missing)).items():
+                users[user_id] = User(client=self._client, **info)
+                self._users.put(user_id, users[user_id])
+                self._storage_hits += 1
+            missing = [user_id for user_id in missing if user_id not in users]
+        if missing:
+            _log.debug("Requesting %d users not found in the cache", len(missing))
+            fetched: list[User] = await self._client.get_users(missing)
+            for user in fetched:
+                users[user.id] = user
+                self._users.put(user.id, user)
+            if self._storage is not None:
+                await self._storage.put_cached_users(map(_user_info, fetched), self._ttl)
+        # Pyrogram omits the users that are not found, so do we
+        return [users[user_id] for user_id in user_ids if user_id in users]
+
+    async def get_user(self, user_id: int) -> User:
+        """Same as `get_users`, but for a single user."""
+        users = await self.get_users((user_id,))
+        if not users:
+            raise KeyError(f"User {user_id} is not found")
+        return users[0]
+
+    def invalidate(self, peer_id: int | str) -> None:
+        """Forgets everything about the peer, e.g. after changing the chat."""
+        key = _peer_key(peer_id)
+        for cache in (self._peers, self._chats, self._users):
+            cache.pop(key)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Hits, misses and the number of cached objects of each kind. Users found in the storage
+        are counted as `storage_hits` besides the misses."""
+        return {
+            "peers": self._peers.stats(),
+            "chats": self._chats.stats(),
+            "users": {**self._users.stats(), "storage_hits": self._storage_hits},
+        }
@@ -1,23 +1,39 @@
+from __future__ import annotations
+
 __all__ = [
     "transcribe_message",
 ]
 
+from typing import TYPE_CHECKING
+
 from pyrogram import Client
 from pyrogram.errors import BadRequest
 from pyrogram.raw import functions, types
 from pyrogram.types import Message
 
+if TYPE_CHECKING:
+    from .peers import PeerCache
+
 
-async def transcribe_message(client: Client, message: Message) -> str | int | None:
+async def transcribe_message(
+    client: Client,
+    message: Message,
+    *,
+    peers: PeerCache | None = None,
+) -> str | int | None:
     """Transcribes a voice message or a video note.
 
     Returns `None` if the message cannot be transcribed, `transcription_id` as an integer
     if the transcription is pending, or the transcribed text as a string if it's ready.
     """
+    if peers is not None:
+        peer = await peers.resolve_peer(message.chat.id)
+    else:
+        peer = await client.resolve_peer(message.chat.id)
     try:
         transcribed: types.messages.TranscribedAudio = await client.invoke(
             functions.messages.TranscribeAudio(
-                peer=await client.resolve_peer(message.chat.id),
+                peer=peer,
                 msg_id=message.id,
             )
         )
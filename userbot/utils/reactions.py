@@ -1,10 +1,17 @@
+from __future__ import annotations
+
 __all__ = [
     "react",
 ]
 
+from typing import TYPE_CHECKING
+
 from pyrogram import Client
 from pyrogram.raw import functions, types
 
+if TYPE_CHECKING:
+    from .peers import PeerCache
+
 
 async def react(
     client: Client,
@@ -12,6 +19,8 @@ async def react(
     message_id: int,
     reaction: str | int | None,
     add_to_existing: bool = False,
+    *,
+    peers: PeerCache | None = None,
 ) -> None:
     """Reacts to a message with a specified emoji or removes any reaction.
 
@@ -21,7 +30,10 @@ async def react(
     removed.
     """
     reactions = []
-    chat = await client.resolve_peer(chat_id)
+    if peers is not None:
+        chat = await peers.resolve_peer(chat_id)
+    else:
+        chat = await client.resolve_peer(chat_id)
     if reaction is not None:
         if isinstance(reaction, str):
             raw_reaction = types.ReactionEmoji(emoticon=reaction)
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+__all__ = [
+    "RequestPriority",
+    "RequestScheduler",
+    "request_priority",
+]
+
+import asyncio
+import bisect
+import contextvars
+import inspect
+import itertools
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from types import TracebackType
+from typing import Any, Iterator, NoReturn, Self
+
+from pyrogram import Client
+from pyrogram.errors import FloodWait, SlowmodeWait
+from pyrogram.raw.core import TLObject
+
+_log = logging.getLogger(__name__)
+
+# Idle buckets are forgotten when there are more of them, they're full anyway
+_MAX_IDLE_BUCKETS = 1000
+_MAX_FLOOD_RETRIES = 3
+
+# ("method", name) or ("chat", kind, id)
+_Key = tuple[Any, ...]
+
+
+class RequestPriority(IntEnum):
+    """Requests with lower values are sent first when they compete for the same rate limit."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    BULK = 2
+
+
+_priority: contextvars.ContextVar[RequestPriority] = contextvars.ContextVar(
+    "request_priority",
+    default=RequestPriority.INTERACTIVE,
+)
+
+
+@contextmanager
+def request_priority(priority: RequestPriority) -> Iterator[None]:
+    """Sends API requests made inside the block (and tasks created there) with the given
+    priority. Requests are interactive by default."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _TokenBucket:
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def delay(self, now: float) -> float:
+        """Returns the number of seconds until a token is available."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def pause(self, until: float) -> None:
+        """Gives no tokens until `until`, the bucket is refilled from scratch after that."""
+        if until > self.paused_until:
+            self.paused_until = until
+            self.tokens = 0
+            self.updated = until
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: RequestPriority
+    seq: int
+    keys: tuple[_Key, ...] = field(compare=False)
+    future: asyncio.Future[None] = field(compare=False)
+
+
+def _peer_key(query: TLObject) -> _Key | None:
+    """Returns the chat the request is sent to, if any."""
+    for name in ("peer", "channel"):
+        peer = getattr(query, name, None)
+        if peer is None:
+            continue
+        for attr in ("channel_id", "chat_id", "user_id"):
+            if (peer_id := getattr(peer, attr, None)) is not None:
+                return "chat", attr, peer_id
+        return "chat", type(peer).__name__
+    if isinstance(chat_id := getattr(query, "chat_id", None), int):
+        return "chat", "chat_id", chat_id
+    return None
+
+
+class RequestScheduler:
+    """Sends all API requests of the client, so the account doesn't hit flood limits.
+
+    Requests of each method are limited to `method_rate` per second, and requests to each chat
+    are limited to `chat_rate` per second. When requests compete for the same limit, they're sent
+    in order of their priority (see `request_priority`), so commands answer quickly even when a
+    bulk job is running.
+
+    When Telegram asks to wait (FloodWait), the method is paused for everyone for that time and
+    the request is retried. SlowmodeWait pauses the chat instead. Waits longer than
+    `max_flood_wait` seconds are raised to the caller.
+
+    The scheduler replaces `client.invoke`, so every high-level method goes through it. Media
+    uploads and downloads using separate sessions are not scheduled.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        *,
+        method_rate: float = 30,
+        chat_rate: float = 20,
+        max_flood_wait: int = 120,
+    ) -> None:
+        if method_rate <= 0 or chat_rate <= 0:
+            raise ValueError("Rates must be positive")
+        self._client = client
+        self._method_rate = method_rate
+        self._chat_rate = chat_rate
+        self._max_flood_wait = max_flood_wait
+        self._buckets: dict[_Key, _TokenBucket] = {}
+        # Sorted by priority, then by arrival
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: asyncio.Task[NoReturn] | None = None
+        self._queued: Counter[RequestPriority] = Counter()
+        self._max_queued: Counter[RequestPriority] = Counter()
+        self._requests = 0
+        self._flood_waits = 0
+        self._flood_wait_seconds = 0
+        self._invoke = client.invoke
+        self._invoke_signature = inspect.signature(client.invoke)
+        client.invoke = self.invoke  # type: ignore[method-assign]
+
+    @property
+    def client(self) -> Client:
+        return self._client
+
+    def _bucket(self, key: _Key) -> _TokenBucket:
+        if (bucket := self._buckets.get(key)) is None:
+            rate = self._method_rate if key[0] == "method" else self._chat_rate
+            bucket = self._buckets[key] = _TokenBucket(rate)
+        return bucket
+
+    def _forget_idle_buckets(self, now: float) -> None:
+        waiting = {key for waiter in self._waiters for key in waiter.keys}
+        for key, bucket in list(self._buckets.items()):
+            if key not in waiting and bucket.delay(now) == 0 and bucket.tokens >= bucket.capacity:
+                del self._buckets[key]
+
+    def _grant(self) -> float | None:
+        """Lets through the requests that may be sent now. Returns the number of seconds until
+        the next one may be sent, or `None` if nothing is waiting."""
+        now = time.monotonic()
+        # Limits a more important request is waiting for, less important ones may not use them
+        reserved: set[_Key] = set()
+        next_delay: float | None = None
+        remaining: list[_Waiter] = []
+        for waiter in self._waiters:
+            if waiter.future.done():  # the caller is cancelled
+                self._queued[waiter.priority] -= 1
+                continue
+            if reserved.intersection(waiter.keys):
+                remaining.append(waiter)
+                continue
+            buckets = {key: self._bucket(key) for key in waiter.keys}
+            delays = {key: bucket.delay(now) for key, bucket in buckets.items()}
+            if (delay := max(delays.values())) > 0:
+                # Only the exhausted limits, e.g. requests of the same method to other chats may
+                # still be sent while this chat is limited
+                reserved.update(key for key, key_delay in delays.items() if key_delay > 0)
+                next_delay = delay if next_delay is None else min(next_delay, delay)
+                remaining.append(waiter)
+                continue
+            for bucket in buckets.values():
+                bucket.take()
+            self._queued[waiter.priority] -= 1
+            waiter.future.set_result(None)
+        self._waiters = remaining
+        if len(self._buckets) > _MAX_IDLE_BUCKETS:
+            self._forget_idle_buckets(now)
+        return next_delay
+
+    async def _dispatch(self) -> NoReturn:
+        while True:
+            self._wakeup.clear()
+            delay = self._grant()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except TimeoutError:
+                pass
+
+    async def _acquire(self, keys: tuple[_Key, ...], priority: RequestPriority) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        waiter = _Waiter(
+            priority, next(self._seq), keys, asyncio.get_running_loop().create_future()
+        )
+        bisect.insort(self._waiters, waiter)
+        self._queued[priority] += 1
+        self._max_queued[priority] = max(self._max_queued[priority], self._queued[priority])
+        self._wakeup.set()
+        await waiter.future
+
+    async def invoke(self, query: TLObject, *args: Any, **kwargs: Any) -> Any:
+        """Same as `Client.invoke`, but waits for its turn and retries after FloodWait."""
+        method_key = ("method", query.QUALNAME)
+        peer_key = _peer_key(query)
+        keys = (method_key,) if peer_key is None else (method_key, peer_key)
+        priority = _priority.get()
+        # Pyrogram must not sleep on its own, other requests would keep hitting the limit meanwhile
+        bound = self._invoke_signature.bind(query, *args, **kwargs)
+        bound.arguments["sleep_threshold"] = 0
+        retries = 0
+        while True:
+            await self._acquire(keys, priority)
+            self._requests += 1
+            try:
+                return await self._invoke(*bound.args, **bound.kwargs)
+            except (FloodWait, SlowmodeWait) as e:
+                if e.value > self._max_flood_wait or retries >= _MAX_FLOOD_RETRIES:
+                    raise
+                retries += 1
+                self._flood_waits += 1
+                self._flood_wait_seconds += e.value
+                paused_key = peer_key if isinstance(e, SlowmodeWait) and peer_key else method_key
+                _log.warning(
+                    "%s: waiting %d seconds before retrying %s (%s)",
+                    e.ID,
+                    e.value,
+                    query.QUALNAME,
+                    priority.name.lower(),
+                )
+                self._bucket(paused_key).pause(time.monotonic() + e.value)
+
+    def stats(self) -> dict[str, Any]:
+        """Number of requests sent and FloodWaits met, and the number of requests waiting for
+        their turn now and at most, by priority."""
+        return {
+            "requests": self._requests,
+            "flood_waits": self._flood_waits,
+            "flood_wait_seconds": self._flood_wait_seconds,
+            "queued": {p.name.lower(): self._queued[p] for p in RequestPriority},
+            "max_queued": {p.name.lower(): self._max_queued[p] for p in RequestPriority},
+        }
+
+    async def close(self) -> None:
+        """Stops scheduling, requests waiting for their turn are cancelled."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        for waiter in self._waiters:
+            waiter.future.cancel()
+            self._queued[waiter.priority] -= 1
+        self._waiters.clear()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self.close()
@@ -1,5 +1,6 @@
 __all__ = [
     "fetch_stickers",
+    "normalize_emoji",
     "StickerInfo",
 ]
 
@@ -21,6 +22,12 @@ class StickerInfo(TypedDict):
     file_reference_b64: str
 
 
+def normalize_emoji(emoji: str) -> str:
+    """Normalizes emoji to be used as a sticker cache key."""
+    # \uFE0F is a variation selector, it's not needed for matching
+    return emoji.strip().replace("\uFE0F", "")
+
+
 async def fetch_stickers(client: Client) -> dict[str, list[StickerInfo]]:
     _log.debug("Fetching stickers...")
     all_stickers: types.messages.AllStickers = await client.invoke(
@@ -22,15 +22,28 @@ def ngettext(one: str, many: str, n: int) -> str:
 class Translation:
     DOMAIN: Final[str] = "evgfilim1-userbot"
     _LOCALE_DIR = Path.cwd() / "locales"
+    # Loaded translations are shared between instances, they're never modified after loading
+    _translations: dict[str | None, NullTranslations] = {}
 
     @classmethod
     def _get_translation(cls, language: str | None) -> NullTranslations:
-        return translation(
-            cls.DOMAIN,
-            localedir=cls._LOCALE_DIR,
-            languages=(language,) if language else None,
-            fallback=True,
-        )
+        language = language or None
+        if (tr := cls._translations.get(language)) is None:
+            tr = cls._translations[language] = translation(
+                cls.DOMAIN,
+                localedir=cls._LOCALE_DIR,
+                languages=(language,) if language else None,
+                fallback=True,
+            )
+        return tr
+
+    @classmethod
+    def preload(cls) -> None:
+        """Loads translations for all available languages, so creating a `Translation` doesn't
+        touch the filesystem later."""
+        cls._get_translation(None)
+        for language in cls.get_available_languages():
+            cls._get_translation(language)
 
     def __init__(self, language: str | None):
         self.tr = self._get_translation(language)
@@ -4,13 +4,21 @@ __all__ = [
     "resolve_users",
 ]
 
+import functools
 from dataclasses import dataclass, field
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable
 
-from lark import Lark, ParseTree, Tree, UnexpectedInput
 from pyrogram import Client
 
 from ..storage import Storage
+from .misc import lazy_import
+
+if TYPE_CHECKING:
+    from lark import Lark, ParseTree
+
+    from .peers import PeerCache
+
+lark = lazy_import("lark")
 
 _GRAMMAR = r"""
 // The Lark grammar for the user group string of evgfilim1/userbot
@@ -49,7 +57,11 @@ user_group: USER_GROUP_NAME ["[" _params? "]"]
 // Parser directives
 %import common (CNAME, INT, WORD)
 """
-_parser = Lark(_GRAMMAR, start="user_group")
+
+
+@functools.cache
+def _get_parser() -> Lark:
+    return lark.Lark(_GRAMMAR, start="user_group")
 
 
 @dataclass()
@@ -67,7 +79,7 @@ def _parse_user_group_tree(tree: ParseTree) -> _UserGroup:
     for param in tree.children[1:]:
         key_name = param.children[0].data
         values = (
-            _parse_user_group_tree(child) if isinstance(child, Tree) else child.value
+            _parse_user_group_tree(child) if isinstance(child, lark.Tree) else child.value
             for child in param.children[1].children
         )
         if key_name == "exclude":
@@ -82,8 +94,8 @@ def _parse_user_group_tree(tree: ParseTree) -> _UserGroup:
 def _parse_user_group_spec(user_group_spec: str) -> _UserGroup:
     """Parses user group spec and returns user group name and excluded users"""
     try:
-        tree: ParseTree = _parser.parse(user_group_spec)
-    except UnexpectedInput:
+        tree: ParseTree = _get_parser().parse(user_group_spec)
+    except lark.UnexpectedInput:
         raise ValueError(f"Invalid user group spec: {user_group_spec}")
 
     return _parse_user_group_tree(tree)
@@ -95,6 +107,7 @@ async def resolve_users(
     value: str | int | Iterable[str | int],
     *,
     resolve_ids: bool = False,
+    peers: PeerCache | None = None,
 ) -> set[int]:
     """Resolves users by ID, username or user group by user group string.
 
@@ -113,25 +126,26 @@ async def resolve_users(
 
     Returns a set of user IDs resolved.
     """
+    resolve_peer = peers.resolve_peer if peers is not None else client.resolve_peer
     if isinstance(value, Iterable) and not isinstance(value, str):
-        return set(await resolve_users(client, storage, item) for item in value)
+        return set(await resolve_users(client, storage, item, peers=peers) for item in value)
     if isinstance(value, int) or value.isdecimal():
         if resolve_ids:
-            peer = await client.resolve_peer(value)
+            peer = await resolve_peer(value)
             res = peer.user_id
         else:
             res = value if isinstance(value, int) else int(value)
         return {res}
     if value.startswith("@"):
-        peer = await client.resolve_peer(value)
+        peer = await resolve_peer(value)
         return {peer.user_id}
     user_group = _parse_user_group_spec(value)
     exclude_ids: set[int] = set()
     include_ids: set[int] = set()
     for item in user_group.exclude:
-        exclude_ids.update(await resolve_users(client, storage, item))
+        exclude_ids.update(await resolve_users(client, storage, item, peers=peers))
     for item in user_group.include:
-        include_ids.update(await resolve_users(client, storage, item))
+        include_ids.update(await resolve_users(client, storage, item, peers=peers))
     users = set()
     async for user_id in storage.list_users_in_group(user_group.name):
         if user_id not in exclude_ids: